@@ -1,13 +1,44 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
+from django.db.models import Case, Q, Value, When
+from django.db.models.functions import Lower
 
 
-class EmailBackend(ModelBackend):
+class UsernameOrEmailBackend(ModelBackend):
+    """Log in with the username or, case-insensitively, the email address.
+
+    Both are matched by a single query served by the unique indexes on
+    ``username`` and ``LOWER(email)``; a username match wins over an email
+    match. At most one password is hashed per attempt: unknown logins hash
+    a dummy one, so they take as long as wrong passwords.
+    """
+
+    def get_queryset(self, login: str):
+        """The user ``login`` refers to, best match first."""
+        return (
+            get_user_model()._default_manager
+            .alias(email_lower=Lower("email"))
+            .filter(
+                Q(username=login)
+                # the email index leaves out blank addresses
+                | Q(~Q(email=""), email_lower=Lower(Value(login)))
+            )
+            .order_by(Case(When(username=login, then=0), default=1))
+        )
+
     def authenticate(self, request, username=None, password=None, **kwargs):
         user_model = get_user_model()
-        users = user_model.objects.filter(email=username)
-        if users.exists():
-            user = users.first()
-            if user.check_password(password):
-                return user
+        if username is None:
+            username = kwargs.get(user_model.USERNAME_FIELD)
+        if not username or password is None:
+            return None
+
+        user = self.get_queryset(username).first()
+        if user is None:
+            # run the password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user
+            user_model().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
         return None
@@ -1,20 +1,45 @@
+from django import forms
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
 
+from .live import publish_on_commit
+from .managers import shift_counters
 from .models import (
     Race,
     RaceCategory,
     Kart,
     CustomUser,
-    RaceParticipation
+    RaceParticipation,
+    RegistrationTicket,
+    KartHold
+)
+from .pagination import CountingPaginator
+from .services import (
+    AlreadyRegisteredError,
+    KartUnavailableError,
+    RegistrationError,
+    take_kart,
+    take_seat
 )
 
 
 @admin.register(Race)
 class RaceAdmin(admin.ModelAdmin):
-    list_display = ("name", "category", "date")
-    list_filter = ("category",)
+    list_display = (
+        "name",
+        "category",
+        "date",
+        "participant_count",
+        "max_participants"
+    )
+    list_filter = ("category", "queued_registration")
     search_fields = ("category__name", "name")
+    readonly_fields = ("participant_count",)
+    paginator = CountingPaginator
+    show_full_result_count = False
 
 
 @admin.register(RaceCategory)
@@ -45,13 +70,100 @@ class CustomUserAdmin(UserAdmin):
         )
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_age()
+
+    @admin.display(description="age", ordering="current_age")
+    def age(self, obj):
+        return obj.current_age
+
+
+def _take_places(pk, previous, user, race, kart) -> tuple[dict, dict]:
+    """Take the seat and kart of a registration added or changed in the
+    admin, under the rules of the site, and hand back the ones it left.
+
+    ``previous`` holds the stored ``(user_id, race_id, kart_id)``, all
+    ``None`` for a new registration. Returns the live deltas; raises a
+    ``RegistrationError`` when the race is full or the kart is not free.
+    """
+    previous_user, previous_race, previous_kart = previous
+    if (user.pk, race.pk) != (previous_user, previous_race) and (
+        RaceParticipation.objects.filter(user=user, race=race)
+        .exclude(pk=pk).exists()
+    ):
+        raise AlreadyRegisteredError
+    seats, karts = {}, {}
+    if race.pk != previous_race:
+        take_seat(user, race)
+        seats[race.pk] = 1
+        if previous_race is not None:
+            shift_counters(Race, "participant_count", {previous_race: -1})
+            seats[previous_race] = -1
+    if kart.pk != previous_kart:
+        take_kart(user, race, kart)
+        karts[kart.pk] = -1
+        if previous_kart is not None:
+            Kart.objects.filter(pk=previous_kart).update(
+                available_quantity=F("available_quantity") + 1
+            )
+            karts[previous_kart] = 1
+    elif kart.category_id != race.category_id:
+        raise KartUnavailableError
+    KartHold.objects.filter(user=user, race=race).delete()
+    return seats, karts
+
+
+class RaceParticipationAdminForm(forms.ModelForm):
+    def clean(self):
+        cleaned_data = super().clean()
+        user, race, kart = (
+            cleaned_data.get(name) for name in ("user", "race", "kart")
+        )
+        if user and race and kart:
+            instance = self.instance
+            previous = (
+                (instance.user_id, instance.race_id, instance.kart_id)
+                if instance.pk else (None, None, None)
+            )
+            # a dry run in a savepoint, save_model takes them for good
+            try:
+                with transaction.atomic():
+                    _take_places(instance.pk, previous, user, race, kart)
+                    transaction.set_rollback(True)
+            except RegistrationError as error:
+                raise ValidationError(str(error))
+        return cleaned_data
+
 
 @admin.register(RaceParticipation)
 class RaceParticipationAdmin(admin.ModelAdmin):
+    form = RaceParticipationAdminForm
     list_display = ("user", "race", "kart", "date_registered")
     list_filter = ("race", "kart", "date_registered")
     search_fields = ("user__username", "race__name", "kart__name")
     date_hierarchy = "date_registered"
+    paginator = CountingPaginator
+    show_full_result_count = False
+
+    def save_model(self, request, obj, form, change):
+        previous = (None, None, None)
+        if change:
+            previous = RaceParticipation.objects.values_list(
+                "user_id", "race_id", "kart_id"
+            ).get(pk=obj.pk)
+        # the form checked them; a seat or kart taken since then raises
+        # and rolls the whole admin request back
+        seats, karts = _take_places(
+            obj.pk, previous, obj.user, obj.race, obj.kart
+        )
+        super().save_model(request, obj, form, change)
+        publish_on_commit(seats=seats, karts=karts)
+
+    def delete_model(self, request, obj):
+        RaceParticipation.objects.filter(pk=obj.pk).release()
+
+    def delete_queryset(self, request, queryset):
+        queryset.release()
 
 
 @admin.register(Kart)
@@ -59,3 +171,20 @@ class KartAdmin(admin.ModelAdmin):
     list_display = ("name", "category", "speed")
     list_filter = ("category", "speed")
     search_fields = ("name", "category__name")
+    paginator = CountingPaginator
+    show_full_result_count = False
+
+
+@admin.register(RegistrationTicket)
+class RegistrationTicketAdmin(admin.ModelAdmin):
+    list_display = ("user", "race", "kart", "status", "created_at")
+    list_filter = ("status", "race")
+    list_select_related = ("user", "race", "kart")
+    search_fields = ("user__username", "race__name")
+
+
+@admin.register(KartHold)
+class KartHoldAdmin(admin.ModelAdmin):
+    list_display = ("user", "race", "kart", "expires_at")
+    list_select_related = ("user", "race", "kart")
+    date_hierarchy = "expires_at"
@@ -0,0 +1,184 @@
+"""Read-only JSON API for kiosks and the mobile app.
+
+Every endpoint but ``suggestions`` answers conditional requests: the
+strong ``ETag`` and the ``Last-Modified`` date come from the model
+versions in ``karting.versions``, so a ``304 Not Modified`` is served
+from the cache alone, without reading the race or kart tables.
+Suggestions come from the in-process index of ``karting.autocomplete``.
+"""
+import datetime
+import hashlib
+
+from django.http import Http404, JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import condition, require_safe
+
+from karting.autocomplete import CATEGORY, KART, RACE, suggest
+from karting.models import Kart, Race, RaceCategory
+from karting.pagination import CursorPaginator, InvalidCursor
+from karting.versions import get_version, version_datetime
+
+PAGE_SIZE = 50
+
+SUGGESTION_KINDS = {
+    "race": (RACE, CATEGORY),
+    "kart": (KART, CATEGORY),
+}
+
+
+def conditional(*models, daily=False):
+    """Derive ``ETag`` and ``Last-Modified`` from the versions of models.
+
+    ``daily`` responses also change at midnight, for lists that only show
+    what is still to come.
+    """
+
+    def etag(request, *args, **kwargs):
+        versions = ":".join(str(get_version(model)) for model in models)
+        if daily:
+            versions += f":{timezone.now().date().isoformat()}"
+        return hashlib.sha256(
+            f"{request.get_full_path()}|{versions}".encode()
+        ).hexdigest()[:32]
+
+    def last_modified(request, *args, **kwargs):
+        modified = version_datetime(
+            max(get_version(model) for model in models)
+        )
+        if daily:
+            now = timezone.now()
+            midnight = datetime.datetime.combine(
+                now.date(), datetime.time.min, tzinfo=now.tzinfo
+            )
+            modified = max(modified, midnight)
+        return modified
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def _paginated(request, queryset, ordering, serialize):
+    paginator = CursorPaginator(queryset, PAGE_SIZE, ordering)
+    try:
+        page = paginator.page(request.GET.get("cursor"))
+    except InvalidCursor as error:
+        raise Http404(str(error))
+    return JsonResponse({
+        "results": [serialize(obj) for obj in page],
+        "next": page.next_cursor,
+        "previous": page.previous_cursor,
+    })
+
+
+def _filter_category(request, queryset):
+    category = request.GET.get("category")
+    if category:
+        if not category.isdigit():
+            raise Http404("Invalid category.")
+        queryset = queryset.filter(category_id=category)
+    return queryset
+
+
+def _race(race: Race) -> dict:
+    return {
+        "id": race.id,
+        "name": race.name,
+        "category": race.category_id,
+        "date": race.date,
+        "max_participants": race.max_participants,
+        "participant_count": race.participant_count,
+        "seats_left": max(race.max_participants - race.participant_count, 0),
+        "queued_registration": race.queued_registration,
+        "updated_at": race.updated_at,
+    }
+
+
+def _kart(kart: Kart) -> dict:
+    return {
+        "id": kart.id,
+        "name": kart.name,
+        "category": kart.category_id,
+        "speed": kart.speed,
+        "description": kart.description,
+        "available_quantity": kart.available_quantity,
+        "updated_at": kart.updated_at,
+    }
+
+
+@require_safe
+@conditional(Race, daily=True)
+def race_list(request):
+    """Upcoming races by date, optionally for one ``?category=``."""
+    races = _filter_category(request, Race.objects.upcoming())
+    return _paginated(request, races, ("date", "id"), _race)
+
+
+@require_safe
+@conditional(Race)
+def race_detail(request, pk):
+    try:
+        return JsonResponse(_race(Race.objects.get(pk=pk)))
+    except Race.DoesNotExist:
+        raise Http404("No race found.")
+
+
+@require_safe
+@conditional(Race, Kart)
+def race_availability(request, pk):
+    """Free seats of a race and free units of the karts it accepts."""
+    try:
+        race = Race.objects.get(pk=pk)
+    except Race.DoesNotExist:
+        raise Http404("No race found.")
+    karts = Kart.objects.filter(category_id=race.category_id).order_by("id")
+    return JsonResponse({
+        "race": race.id,
+        "max_participants": race.max_participants,
+        "participant_count": race.participant_count,
+        "seats_left": max(race.max_participants - race.participant_count, 0),
+        "karts": list(karts.values("id", "name", "available_quantity")),
+    })
+
+
+@require_safe
+@conditional(Kart)
+def kart_list(request):
+    karts = _filter_category(request, Kart.objects.all())
+    return _paginated(request, karts, ("id",), _kart)
+
+
+@require_safe
+@conditional(Kart)
+def kart_detail(request, pk):
+    try:
+        return JsonResponse(_kart(Kart.objects.get(pk=pk)))
+    except Kart.DoesNotExist:
+        raise Http404("No kart found.")
+
+
+@require_safe
+@conditional(RaceCategory)
+def category_list(request):
+    categories = RaceCategory.objects.order_by("name").values(
+        "id", "name", "description", "min_age", "max_age", "updated_at"
+    )
+    return JsonResponse({"results": list(categories)})
+
+
+@require_safe
+def suggestions(request):
+    """Upcoming races, karts and categories with a word starting ``?q=``.
+
+    ``?type=race`` or ``?type=kart`` narrows them to what the search box
+    of that list matches.
+    """
+    kinds = SUGGESTION_KINDS.get(
+        request.GET.get("type"),
+        (RACE, KART, CATEGORY)
+    )
+    results = suggest(request.GET.get("q", ""), kinds)
+    return JsonResponse({
+        "results": [
+            {"type": result.kind, "id": result.id, "name": result.name}
+            for result in results
+        ]
+    })
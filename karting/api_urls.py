@@ -0,0 +1,19 @@
+from django.urls import path
+
+from karting import api
+
+app_name = "api-v1"
+
+urlpatterns = [
+    path("races/", api.race_list, name="race-list"),
+    path("races/<int:pk>/", api.race_detail, name="race-detail"),
+    path(
+        "races/<int:pk>/availability/",
+        api.race_availability,
+        name="race-availability"
+    ),
+    path("karts/", api.kart_list, name="kart-list"),
+    path("karts/<int:pk>/", api.kart_detail, name="kart-detail"),
+    path("categories/", api.category_list, name="category-list"),
+    path("suggestions/", api.suggestions, name="suggestions"),
+]
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class KartingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "karting"
+
+    def ready(self):
+        from karting import signals  # noqa: F401
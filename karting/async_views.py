@@ -0,0 +1,83 @@
+"""Async variants of the busiest pages, served under ASGI.
+
+They read with the async ORM and cache API and only render once every
+row the template shows is fetched, so rendering never queries (a missed
+relation fails loudly with ``SynchronousOnlyOperation``). Responses are
+plain ``HttpResponse`` objects rendered in the view: a ``TemplateResponse``
+would be handed to a thread by the ASGI handler just to be rendered.
+
+The URLconf swaps them in for the sync views when ``ASYNC_VIEWS`` is on.
+"""
+from django.http import Http404, HttpRequest, HttpResponse
+from django.shortcuts import render
+
+from karting.cache import aget_home_data
+from karting.views import (
+    KartDetailView,
+    KartListView,
+    RaceDetailView,
+    RaceListView
+)
+from karting.visits import aget_visit_counts, record_visit
+
+
+async def index(request: HttpRequest) -> HttpResponse:
+    """View function for the home page of the site."""
+    user = request.user = await request.auser()
+    record_visit(user)
+    total_visits, num_visits = await aget_visit_counts(user)
+
+    context = {
+        **await aget_home_data(user.is_staff),
+        "num_visits": num_visits,
+        "total_visits": total_visits,
+    }
+
+    return render(request, "karting/index.html", context=context)
+
+
+class AsyncListMixin:
+    """Serve a ``CursorPaginationMixin`` list view asynchronously."""
+
+    async def get(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        self.object_list = self.get_queryset()
+        await self.apaginate()
+        context = self.get_context_data()
+        return render(request, self.get_template_names(), context)
+
+
+class AsyncDetailMixin:
+    """Serve a detail view looked up by primary key asynchronously."""
+
+    async def get(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        self.object = await self.aget_object()
+        context = self.get_context_data(object=self.object)
+        return render(request, self.get_template_names(), context)
+
+    async def aget_object(self):
+        queryset = self.get_queryset()
+        try:
+            return await queryset.aget(pk=self.kwargs[self.pk_url_kwarg])
+        except queryset.model.DoesNotExist:
+            raise Http404(
+                f"No {queryset.model._meta.verbose_name} found matching "
+                f"the query"
+            )
+
+
+class AsyncRaceListView(AsyncListMixin, RaceListView):
+    pass
+
+
+class AsyncRaceDetailView(AsyncDetailMixin, RaceDetailView):
+    pass
+
+
+class AsyncKartListView(AsyncListMixin, KartListView):
+    pass
+
+
+class AsyncKartDetailView(AsyncDetailMixin, KartDetailView):
+    pass
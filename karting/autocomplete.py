@@ -0,0 +1,129 @@
+"""In-process prefix index of race, kart and category names.
+
+Search box suggestions are answered from sorted arrays of lowercased name
+suffixes, one per word, searched with ``bisect``: "ra" finds "Race 1" and
+so does "1". The index is built lazily, with one query per model, and
+rebuilt only when the edit generation of one of them (see
+``karting.versions``) or the date changes, so a keystroke costs a single
+cache read and the seat and kart counts moved by registrations never
+force a rebuild.
+
+Only upcoming races are suggested, as the public race list shows.
+"""
+import bisect
+import threading
+from dataclasses import dataclass
+
+from django.utils import timezone
+
+from karting.models import Kart, Race, RaceCategory
+from karting.versions import get_edit_generations
+
+RACE = "race"
+KART = "kart"
+CATEGORY = "category"
+
+INDEXED_MODELS = (Race, Kart, RaceCategory)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    kind: str
+    id: int
+    name: str
+
+
+class PrefixIndex:
+    """Suggestions whose name has a word starting with a given prefix."""
+
+    def __init__(self, suggestions):
+        entries = []
+        for position, suggestion in enumerate(suggestions):
+            name = _normalize(suggestion.name)
+            start = 0
+            for word in name.split(" "):
+                entries.append((name[start:], position))
+                start += len(word) + 1
+        entries.sort()
+        self._keys = [key for key, _ in entries]
+        self._positions = [position for _, position in entries]
+        self._suggestions = list(suggestions)
+
+    def __len__(self):
+        return len(self._suggestions)
+
+    def lookup(self, prefix: str, limit: int) -> list[Suggestion]:
+        """Return up to ``limit`` matches, in the order of matched words."""
+        prefix = _normalize(prefix)
+        if not prefix:
+            return []
+        found = {}
+        index = bisect.bisect_left(self._keys, prefix)
+        while (
+            len(found) < limit
+            and index < len(self._keys)
+            and self._keys[index].startswith(prefix)
+        ):
+            position = self._positions[index]
+            found.setdefault(position, self._suggestions[position])
+            index += 1
+        return list(found.values())
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    token: tuple
+    indexes: dict
+
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def _token() -> tuple:
+    return (*get_edit_generations(*INDEXED_MODELS), timezone.now().date())
+
+
+def _build(token: tuple) -> _Snapshot:
+    races = Race.objects.upcoming().values_list("id", "name")
+    karts = Kart.objects.values_list("id", "name")
+    categories = RaceCategory.objects.values_list("id", "name")
+    return _Snapshot(
+        token,
+        {
+            RACE: PrefixIndex([Suggestion(RACE, *row) for row in races]),
+            KART: PrefixIndex([Suggestion(KART, *row) for row in karts]),
+            CATEGORY: PrefixIndex(
+                [Suggestion(CATEGORY, *row) for row in categories]
+            ),
+        }
+    )
+
+
+def get_indexes() -> dict:
+    """Return the prefix index of every kind, rebuilding a stale one."""
+    global _snapshot
+    # read the token before the rows, so changes committed while the
+    # index is being built make the next request rebuild it again
+    token = _token()
+    snapshot = _snapshot
+    if snapshot is None or snapshot.token != token:
+        with _lock:
+            snapshot = _snapshot
+            if snapshot is None or snapshot.token != token:
+                snapshot = _snapshot = _build(token)
+    return snapshot.indexes
+
+
+def suggest(prefix: str, kinds=(RACE, KART, CATEGORY), limit=10):
+    """Suggestions of ``kinds`` matching ``prefix``, ``limit`` per kind."""
+    indexes = get_indexes()
+    return [
+        suggestion
+        for kind in kinds
+        for suggestion in indexes[kind].lookup(prefix, limit)
+    ]
@@ -0,0 +1,268 @@
+import datetime
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.cache import cc_delim_re
+
+from karting.models import Kart, Race
+from karting.versions import aget_generations, get_generations
+
+HOME_GENERATION_KEY = "karting:home:generation"
+
+
+def _home_key(generation: int, audience: str) -> str:
+    """Build the cache key of the home page data for ``audience``.
+
+    The key embeds a generation token, bumped on every change to races,
+    karts or categories, and today's date, so entries cached yesterday
+    are never read once ``upcoming()`` moves on.
+    """
+    today = timezone.now().date()
+    return f"karting:home:{generation}:{audience}:{today.isoformat()}"
+
+
+def _seconds_to_midnight() -> int:
+    now = timezone.now()
+    midnight = datetime.datetime.combine(
+        now.date() + datetime.timedelta(days=1),
+        datetime.time.min,
+        tzinfo=now.tzinfo
+    )
+    return max(int((midnight - now).total_seconds()), 1)
+
+
+def _home_timeout() -> int:
+    return min(settings.HOME_CACHE_TIMEOUT, _seconds_to_midnight())
+
+
+def _home_querysets(is_staff: bool):
+    races = Race.objects.all() if is_staff else Race.objects.upcoming()
+    return races.order_by("date")[:3], Kart.objects.order_by("-speed")[:3]
+
+
+def get_home_data(is_staff: bool) -> dict:
+    """Return the upcoming races and fastest karts shown on the home page.
+
+    Staff see every race, everyone else only the upcoming ones, so the two
+    audiences are cached under separate keys. Entries expire after
+    ``HOME_CACHE_TIMEOUT`` seconds or at midnight, whichever comes first.
+    """
+    audience = "staff" if is_staff else "public"
+    key = _home_key(
+        cache.get_or_set(HOME_GENERATION_KEY, 0, None),
+        audience
+    )
+    data = cache.get(key)
+    if data is None:
+        races, karts = _home_querysets(is_staff)
+        data = {
+            "upcoming_races": list(races),
+            "popular_karts": list(karts),
+        }
+        cache.set(key, data, _home_timeout())
+    return data
+
+
+async def aget_home_data(is_staff: bool) -> dict:
+    audience = "staff" if is_staff else "public"
+    key = _home_key(
+        await cache.aget_or_set(HOME_GENERATION_KEY, 0, None),
+        audience
+    )
+    data = await cache.aget(key)
+    if data is None:
+        races, karts = _home_querysets(is_staff)
+        data = {
+            "upcoming_races": [race async for race in races],
+            "popular_karts": [kart async for kart in karts],
+        }
+        await cache.aset(key, data, _home_timeout())
+    return data
+
+
+def invalidate_home_data() -> None:
+    """Make every cached copy of the home page data stale at once."""
+    cache.set(HOME_GENERATION_KEY, time.time_ns(), None)
+
+
+PAGE_HITS_KEY = "karting:page:hits"
+PAGE_MISSES_KEY = "karting:page:misses"
+
+
+def _count(key: str) -> None:
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+async def _acount(key: str) -> None:
+    if not await cache.aadd(key, 1, None):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aset(key, 1, None)
+
+
+def page_cache_stats() -> dict:
+    hits = cache.get(PAGE_HITS_KEY, 0)
+    misses = cache.get(PAGE_MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+    }
+
+
+def _serves_anonymous(request) -> bool:
+    """Whether ``request`` gets the page every logged-out visitor gets."""
+    if request.method != "GET":
+        return False
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        if request.user.is_authenticated:
+            return False
+    # flash messages are rendered once, for one visitor
+    return not len(messages.get_messages(request))
+
+
+async def _aserves_anonymous(request) -> bool:
+    if request.method != "GET":
+        return False
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        if (await request.auser()).is_authenticated:
+            return False
+    return not len(messages.get_messages(request))
+
+
+def _page_key(request, generations, headers) -> str:
+    varying = "|".join(
+        f"{header}={request.headers.get(header, '')}" for header in headers
+    )
+    digest = hashlib.sha256(
+        f"{request.get_full_path()}|{varying}".encode()
+    ).hexdigest()
+    today = timezone.now().date().isoformat()
+    generation = ":".join(map(str, generations))
+    return f"karting:page:{generation}:{today}:{digest}"
+
+
+def _headers_key(request) -> str:
+    digest = hashlib.sha256(request.path.encode()).hexdigest()
+    return f"karting:page:headers:{digest}"
+
+
+def _cacheable(request, response) -> bool:
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+    )
+
+
+def _vary_headers(response) -> list[str]:
+    return sorted(
+        header.lower()
+        for header in cc_delim_re.split(response.get("Vary", ""))
+        if header and header.lower() != "cookie"
+    )
+
+
+def anonymous_page_cache(*models):
+    """Cache the whole response of a view for logged-out visitors.
+
+    Pages are keyed on the full path, the request headers the response
+    ``Vary`` on (apart from ``Cookie``: the page is the same for every
+    anonymous visitor) and the generations of ``models``, so any committed
+    change to those models serves fresh pages at once. Authenticated
+    users, visitors with pending messages and responses that set cookies
+    or use a CSRF token are never cached. Async views get an async
+    wrapper using the async cache API.
+    """
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            return _async_page_cache(view, models)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _serves_anonymous(request):
+                return view(request, *args, **kwargs)
+
+            headers = cache.get(_headers_key(request))
+            if headers is not None:
+                response = cache.get(
+                    _page_key(request, get_generations(*models), headers)
+                )
+                if response is not None:
+                    _count(PAGE_HITS_KEY)
+                    response["X-Page-Cache"] = "hit"
+                    return response
+
+            _count(PAGE_MISSES_KEY)
+            response = view(request, *args, **kwargs)
+            if hasattr(response, "render") and callable(response.render):
+                response = response.render()
+            if _cacheable(request, response):
+                headers = _vary_headers(response)
+                cache.set(
+                    _headers_key(request),
+                    headers,
+                    settings.PAGE_CACHE_TIMEOUT
+                )
+                cache.set(
+                    _page_key(request, get_generations(*models), headers),
+                    response,
+                    settings.PAGE_CACHE_TIMEOUT
+                )
+            response["X-Page-Cache"] = "miss"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _async_page_cache(view, models):
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if not await _aserves_anonymous(request):
+            return await view(request, *args, **kwargs)
+
+        headers = await cache.aget(_headers_key(request))
+        if headers is not None:
+            response = await cache.aget(
+                _page_key(request, await aget_generations(*models), headers)
+            )
+            if response is not None:
+                await _acount(PAGE_HITS_KEY)
+                response["X-Page-Cache"] = "hit"
+                return response
+
+        await _acount(PAGE_MISSES_KEY)
+        response = await view(request, *args, **kwargs)
+        if hasattr(response, "render") and callable(response.render):
+            response = await sync_to_async(response.render)()
+        if _cacheable(request, response):
+            headers = _vary_headers(response)
+            await cache.aset_many(
+                {
+                    _headers_key(request): headers,
+                    _page_key(
+                        request, await aget_generations(*models), headers
+                    ): response,
+                },
+                settings.PAGE_CACHE_TIMEOUT
+            )
+        response["X-Page-Cache"] = "miss"
+        return response
+
+    return wrapper
@@ -6,7 +6,13 @@ from karting.models import RaceParticipation, Kart, Race
 class RaceForm(forms.ModelForm):
     class Meta:
         model = Race
-        fields = ["name", "category", "date", "max_participants"]
+        fields = [
+            "name",
+            "category",
+            "date",
+            "max_participants",
+            "queued_registration"
+        ]
         widgets = {
             "date": forms.DateInput(attrs={
                 "type": "date",
@@ -25,10 +31,38 @@ class RaceRegistrationForm(forms.ModelForm):
         self.race_category = kwargs.pop("race_category")
         super().__init__(*args, **kwargs)
 
-        self.fields["kart"].queryset = Kart.objects.filter(
-            category=self.race_category,
-            available_quantity__gt=0
-        )
+        self.fields["kart"].queryset = Kart.objects.available(
+            self.user
+        ).filter(category=self.race_category)
+
+
+class GroupRegistrationForm(forms.Form):
+    MAX_DRIVERS = 100
+
+    drivers = forms.CharField(
+        widget=forms.Textarea(attrs={
+            "rows": 12,
+            "placeholder": "One driver per line: username[, kart name]",
+            "class": "form-control",
+        }),
+        help_text="One driver per line, optionally followed by a comma "
+                  "and the name of the preferred kart."
+    )
+
+    def clean_drivers(self) -> list[tuple[str, str]]:
+        drivers = []
+        for line in self.cleaned_data["drivers"].splitlines():
+            username, _, kart_name = line.partition(",")
+            if username.strip():
+                drivers.append((username.strip(), kart_name.strip()))
+
+        if not drivers:
+            raise forms.ValidationError("Enter at least one driver.")
+        if len(drivers) > self.MAX_DRIVERS:
+            raise forms.ValidationError(
+                f"Register at most {self.MAX_DRIVERS} drivers at once."
+            )
+        return drivers
 
 
 class RaceSearchForm(forms.Form):
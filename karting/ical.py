@@ -0,0 +1,136 @@
+"""iCalendar (RFC 5545) feeds of upcoming races.
+
+Calendar apps poll their feeds often, so each feed body is cached under a
+key made of its absolute URL, the generations of races and categories and
+today's date, since a race leaves the upcoming feeds at midnight. A miss
+streams the events straight from ``QuerySet.iterator()`` and stores the
+body once the last line is sent; a hit costs no query. The ``ETag`` is
+derived from the same key, so unchanged feeds get ``304 Not Modified``.
+
+Personal feeds follow registrations too: signing up or leaving always
+moves ``Race.participant_count`` and thus bumps the race generation.
+"""
+import datetime
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+
+from karting.models import Race, RaceCategory
+from karting.versions import get_generations
+
+CONTENT_TYPE = "text/calendar; charset=utf-8"
+PRODID = "-//Karting Race Manager//Race calendar//EN"
+TOKEN_SALT = "karting.ical"
+
+
+def feed_token(user) -> str:
+    """The secret part of the URL of a user's personal feed."""
+    return signing.Signer(salt=TOKEN_SALT).sign(str(user.pk))
+
+
+def user_id_from_token(token: str) -> int:
+    """Raise ``signing.BadSignature`` for tokens not made by us."""
+    return int(signing.Signer(salt=TOKEN_SALT).unsign(token))
+
+
+def escape(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line: str) -> str:
+    """Terminate a content line, folded into chunks of 75 octets."""
+    chunks, chunk, size, limit = [], [], 0, 75
+    for char in line:
+        width = len(char.encode())
+        if size + width > limit:
+            chunks.append("".join(chunk))
+            # continuation lines start with a space, which counts too
+            chunk, size, limit = [], 0, 74
+        chunk.append(char)
+        size += width
+    chunks.append("".join(chunk))
+    return "\r\n ".join(chunks) + "\r\n"
+
+
+def _event(request, race: Race) -> str:
+    stamp = race.updated_at.astimezone(datetime.timezone.utc)
+    url = request.build_absolute_uri(
+        reverse("karting:race-detail", args=[race.pk])
+    )
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:race-{race.pk}@{request.get_host()}",
+        f"DTSTAMP:{stamp:%Y%m%dT%H%M%SZ}",
+        f"DTSTART;VALUE=DATE:{race.date:%Y%m%d}",
+        f"DTEND;VALUE=DATE:{race.date + datetime.timedelta(days=1):%Y%m%d}",
+        f"SUMMARY:{escape(race.name)}",
+        "DESCRIPTION:" + escape(
+            f"{race.category.name}, "
+            f"{race.participant_count}/{race.max_participants} drivers"
+        ),
+        f"URL:{url}",
+        "END:VEVENT",
+    ]
+    return "".join(fold(line) for line in lines)
+
+
+def calendar(request, name: str, races):
+    """Yield the feed ``name`` of ``races`` one event at a time."""
+    yield "".join(fold(line) for line in [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{escape(name)}",
+    ])
+    for race in races.select_related("category").iterator():
+        yield _event(request, race)
+    yield fold("END:VCALENDAR")
+
+
+def feed_key(request) -> str:
+    generations = ":".join(map(str, get_generations(Race, RaceCategory)))
+    digest = hashlib.sha256(
+        request.build_absolute_uri().encode()
+    ).hexdigest()
+    today = timezone.now().date().isoformat()
+    return f"karting:ical:{generations}:{today}:{digest}"
+
+
+def feed_etag(request, *args, **kwargs) -> str:
+    return hashlib.sha256(feed_key(request).encode()).hexdigest()[:32]
+
+
+def feed_response(request, build):
+    """Serve the cached feed of ``request`` or stream and cache a new one.
+
+    ``build`` returns the feed name and its races; it only runs on a miss
+    and may raise ``Http404``.
+    """
+    key = feed_key(request)
+    body = cache.get(key)
+    if body is not None:
+        return HttpResponse(body, content_type=CONTENT_TYPE)
+
+    name, races = build()
+
+    def stream():
+        chunks = []
+        for chunk in calendar(request, name, races):
+            chunks.append(chunk)
+            yield chunk
+        cache.set(key, "".join(chunks), settings.ICAL_CACHE_TIMEOUT)
+
+    return StreamingHttpResponse(stream(), content_type=CONTENT_TYPE)
@@ -0,0 +1,211 @@
+"""In-process fan-out of live seat and kart counts per race.
+
+Writers call ``hub.publish()`` with the deltas they just committed; the
+hub applies them to the snapshot it keeps for every watched race and
+broadcasts the result to the subscribed streams. Messages for one race
+are coalesced to at most one per ``LIVE_UPDATE_INTERVAL`` seconds, so a
+burst of bookings costs each viewer a single message and no database
+reads: the snapshot is loaded when the first viewer of a race subscribes
+and dropped when the last one leaves.
+
+The hub lives in the server process and only hears of the writes made
+there. Changes made elsewhere (Celery workers, other server processes,
+``save()`` calls that publish no delta) reach the viewers when the
+snapshot is reloaded, every ``LIVE_REFRESH_SECONDS`` while the race is
+watched.
+"""
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass, field
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Channel:
+    loop: asyncio.AbstractEventLoop
+    loaded: asyncio.Future
+    snapshot: dict | None = None
+    subscribers: set = field(default_factory=set)
+    flush_handle: asyncio.Handle | None = None
+    last_sent: float = float("-inf")
+    # deltas published so far, to tell whether a load may have missed one
+    published: int = 0
+    refresher: asyncio.Task | None = None
+
+
+class LiveHub:
+    def __init__(
+        self, interval: float | None = None, refresh: float | None = None
+    ):
+        self._interval = interval
+        self._refresh = refresh
+        self._lock = threading.Lock()
+        self._channels: dict[int, _Channel] = {}
+
+    @property
+    def interval(self) -> float:
+        if self._interval is None:
+            return settings.LIVE_UPDATE_INTERVAL
+        return self._interval
+
+    @property
+    def refresh(self) -> float:
+        if self._refresh is None:
+            return settings.LIVE_REFRESH_SECONDS
+        return self._refresh
+
+    def watching(self, race_id: int) -> bool:
+        return race_id in self._channels
+
+    async def subscribe(self, race_id: int, load_snapshot, keepalive=None):
+        """Yield the current snapshot of a race, then every update.
+
+        ``load_snapshot`` is an async callable returning the snapshot
+        (``participant_count``, ``max_participants`` and ``karts`` as
+        ``{kart_id: available_quantity}``). It runs for the first viewer
+        of the race, then every ``refresh`` seconds while anyone watches.
+        ``None`` is yielded after ``keepalive`` seconds without updates.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=1)
+        with self._lock:
+            channel = self._channels.get(race_id)
+            if channel is None:
+                channel = self._channels[race_id] = _Channel(
+                    loop, loop.create_future()
+                )
+                channel.refresher = loop.create_task(
+                    self._keep_fresh(race_id, channel, load_snapshot)
+                )
+            channel.subscribers.add(queue)
+        try:
+            await asyncio.shield(channel.loaded)
+            with self._lock:
+                current = self._message(channel.snapshot)
+            yield current
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                channel.subscribers.discard(queue)
+                if not channel.subscribers:
+                    if channel.flush_handle is not None:
+                        channel.flush_handle.cancel()
+                    channel.refresher.cancel()
+                    self._channels.pop(race_id, None)
+
+    async def _keep_fresh(self, race_id: int, channel: _Channel, load):
+        try:
+            await self._load(race_id, channel, load)
+        except Exception as error:
+            channel.loaded.set_exception(error)
+            return
+        channel.loaded.set_result(None)
+        while True:
+            await asyncio.sleep(self.refresh)
+            try:
+                await self._load(race_id, channel, load)
+            except Exception:
+                logger.exception("Could not reload live race %s", race_id)
+
+    async def _load(self, race_id: int, channel: _Channel, load) -> None:
+        """Replace the snapshot with a fresh read of the database.
+
+        Deltas are published once committed, so a read that starts after
+        one has seen it; a read during which one arrives is retried, a
+        few times at most, and otherwise corrected by the next reload.
+        """
+        for _ in range(3):
+            published = channel.published
+            snapshot = await load(race_id)
+            if channel.published == published:
+                break
+        with self._lock:
+            changed = (
+                channel.snapshot is not None and snapshot != channel.snapshot
+            )
+            channel.snapshot = snapshot
+        if changed:
+            self._schedule(channel)
+
+    def publish(self, seats: dict | None = None, karts: dict | None = None):
+        """Apply committed deltas and schedule a broadcast.
+
+        ``seats`` maps race ids to participant count changes and ``karts``
+        maps kart ids to available quantity changes. Safe to call from
+        any thread; races nobody watches are skipped.
+        """
+        seats, karts = seats or {}, karts or {}
+        with self._lock:
+            for race_id, channel in self._channels.items():
+                snapshot = channel.snapshot
+                channel.published += 1
+                if snapshot is None:
+                    continue
+                changed = False
+                if seats.get(race_id):
+                    snapshot["participant_count"] = max(
+                        snapshot["participant_count"] + seats[race_id], 0
+                    )
+                    changed = True
+                for kart_id, delta in karts.items():
+                    if delta and kart_id in snapshot["karts"]:
+                        snapshot["karts"][kart_id] = max(
+                            snapshot["karts"][kart_id] + delta, 0
+                        )
+                        changed = True
+                if changed and not channel.loop.is_closed():
+                    channel.loop.call_soon_threadsafe(
+                        self._schedule, channel
+                    )
+
+    def _schedule(self, channel: _Channel) -> None:
+        if channel.flush_handle is not None:
+            return
+        delay = channel.last_sent + self.interval - channel.loop.time()
+        channel.flush_handle = channel.loop.call_later(
+            max(delay, 0), self._flush, channel
+        )
+
+    def _flush(self, channel: _Channel) -> None:
+        channel.flush_handle = None
+        channel.last_sent = channel.loop.time()
+        with self._lock:
+            message = self._message(channel.snapshot)
+            subscribers = list(channel.subscribers)
+        for queue in subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    @staticmethod
+    def _message(snapshot: dict) -> dict:
+        return {
+            "participant_count": snapshot["participant_count"],
+            "max_participants": snapshot["max_participants"],
+            "seats_left": max(
+                snapshot["max_participants"] - snapshot["participant_count"],
+                0
+            ),
+            "karts": dict(snapshot["karts"]),
+        }
+
+
+hub = LiveHub()
+
+
+def publish_on_commit(seats=None, karts=None, using=None) -> None:
+    """Broadcast counter deltas once the current transaction commits."""
+    transaction.on_commit(
+        partial(hub.publish, seats=seats, karts=karts),
+        using=using
+    )
@@ -0,0 +1,298 @@
+"""A small HTTP/1.1 load generator for timing the site on localhost.
+
+Each simulated client holds one keep-alive connection opened with
+``asyncio`` streams, so a single process can keep dozens of requests in
+flight against runserver, gunicorn or uvicorn without extra dependencies.
+Latencies are wall-clock seconds per request; a failed connection, or a
+response with a status other than the expected ones (any below 400 by
+default), counts as an error.
+"""
+import asyncio
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from urllib.parse import urlencode
+
+
+@dataclass
+class Response:
+    status: int
+    headers: dict[str, str]
+    cookies: dict[str, str]
+    body: bytes
+
+
+class Connection:
+    """A keep-alive HTTP/1.1 connection reopened whenever the server
+    closes it."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        data: dict | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> Response:
+        body = urlencode(data or {}).encode() if method == "POST" else b""
+        lines = [
+            f"{method} {path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            f"Content-Length: {len(body)}",
+        ]
+        if method == "POST":
+            lines.append("Content-Type: application/x-www-form-urlencoded")
+        lines += [
+            f"{name}: {value}" for name, value in (headers or {}).items()
+        ]
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        # a server may close an idle keep-alive connection at any time
+        for attempt in range(2):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(
+                    self.host, self.port
+                )
+            self.writer.write(head + body)
+            await self.writer.drain()
+            status_line = await self.reader.readline()
+            if status_line or attempt:
+                break
+            await self.close()
+        if not status_line:
+            await self.close()
+            raise ConnectionError("The server closed the connection.")
+        return await self._read_response(status_line)
+
+    async def _read_response(self, status_line: bytes) -> Response:
+        status = int(status_line.split()[1])
+        headers, cookies = {}, {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip().lower(), value.strip()
+            if name == "set-cookie":
+                cookie, _, _ = value.partition(";")
+                key, _, morsel = cookie.partition("=")
+                cookies[key.strip()] = morsel.strip()
+            else:
+                headers[name] = value
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = await self._read_chunks()
+        elif "content-length" in headers:
+            body = await self.reader.readexactly(
+                int(headers["content-length"])
+            )
+        else:
+            body = await self.reader.read()
+            headers["connection"] = "close"
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return Response(status, headers, cookies, body)
+
+    async def _read_chunks(self) -> bytes:
+        chunks = []
+        while size := int((await self.reader.readline()).split(b";")[0], 16):
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+        # trailers end with an empty line
+        while await self.reader.readline() not in (b"\r\n", b""):
+            pass
+        return b"".join(chunks)
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+
+@dataclass
+class Results:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies) + self.errors
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """The nearest-rank percentile of the latencies, in seconds."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = math.ceil(len(ordered) * percent / 100)
+        return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+    def record(self, started: float, ok: bool) -> None:
+        if ok:
+            self.latencies.append(time.perf_counter() - started)
+        else:
+            self.errors += 1
+
+    def summary(self) -> str:
+        return (
+            f"{self.requests} requests, {self.throughput:.1f} req/s, "
+            f"p50 {self.percentile(50) * 1000:.1f}ms "
+            f"p95 {self.percentile(95) * 1000:.1f}ms "
+            f"p99 {self.percentile(99) * 1000:.1f}ms, "
+            f"{self.error_rate:.1%} errors"
+        )
+
+
+async def fetch(
+    connection: Connection,
+    results: Results,
+    method: str,
+    path: str,
+    expect: tuple[int, ...] | None = None,
+    **kwargs
+) -> Response | None:
+    """Send one request and record its latency, or an error."""
+    started = time.perf_counter()
+    try:
+        response = await connection.request(method, path, **kwargs)
+    except (OSError, asyncio.IncompleteReadError, ValueError):
+        await connection.close()
+        response = None
+    results.record(
+        started,
+        response is not None and (
+            response.status in expect if expect else response.status < 400
+        )
+    )
+    return response
+
+
+class Session:
+    """A browser of the site: its connection and cookies.
+
+    Forms are posted with the CSRF cookie as their token, which Django
+    accepts in place of the masked token of the rendered form.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.connection = Connection(host, port)
+        self.cookies = {}
+
+    async def request(
+        self,
+        results: Results,
+        method: str,
+        path: str,
+        data: dict | None = None,
+        expect: tuple[int, ...] | None = None,
+    ) -> Response | None:
+        headers = {}
+        if method == "POST":
+            data = {
+                **(data or {}),
+                "csrfmiddlewaretoken": self.cookies.get("csrftoken", ""),
+            }
+        if self.cookies:
+            headers["Cookie"] = "; ".join(
+                f"{name}={value}" for name, value in self.cookies.items()
+            )
+        response = await fetch(
+            self.connection,
+            results,
+            method,
+            path,
+            expect,
+            data=data,
+            headers=headers
+        )
+        if response is not None:
+            for name, value in response.cookies.items():
+                # deleted cookies are sent back empty
+                if value and value != '""':
+                    self.cookies[name] = value
+                else:
+                    self.cookies.pop(name, None)
+        return response
+
+    async def close(self) -> None:
+        await self.connection.close()
+
+
+async def hammer(
+    host: str, port: int, paths: list[str], requests: int, concurrency: int
+) -> Results:
+    """GET ``paths`` in turn, ``requests`` times over ``concurrency``
+    connections."""
+    results = Results()
+    pending = iter(range(requests))
+
+    async def client():
+        connection = Connection(host, port)
+        for number in pending:
+            await fetch(
+                connection, results, "GET", paths[number % len(paths)]
+            )
+        await connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    results.elapsed = time.perf_counter() - started
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve(args: list[str], port: int, env: dict, timeout: float = 30):
+    """Run ``python args`` until the block ends, once it accepts
+    connections on ``port``."""
+    log = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        [sys.executable, *args],
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=log,
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                log.seek(0)
+                raise RuntimeError(f"{args[1]} exited:\n{log.read().decode()}")
+            try:
+                socket.create_connection(("127.0.0.1", port), 0.2).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{args[1]} did not start in time.")
+                time.sleep(0.1)
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        log.close()
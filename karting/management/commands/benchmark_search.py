@@ -0,0 +1,123 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from karting.models import Kart, Race, RaceCategory
+from karting.search import rebuild_index, search
+
+QUERIES = ("grand", "grand prix 4", "junior", "kart 99", "night")
+
+
+class Command(BaseCommand):
+    help = (
+        "Time race and kart search on a generated dataset, full-text "
+        "index against icontains. The data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=100_000,
+            help="Number of races and of karts to generate.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Number of timed runs per query.",
+        )
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        with transaction.atomic():
+            self.seed(rows)
+            self.stdout.write(
+                f"{rows} races and karts on {connection.vendor}, "
+                f"count plus first page of 20, {repeat} runs per query"
+            )
+            for model in (Race, Kart):
+                queryset = model.objects.select_related("category").order_by(
+                    "name"
+                )
+                for query in QUERIES:
+                    indexed = self.measure(
+                        lambda: search(queryset, query), repeat
+                    )
+                    scanned = self.measure(
+                        lambda: queryset.filter(
+                            Q(name__icontains=query)
+                            | Q(category__name__icontains=query)
+                        ),
+                        repeat
+                    )
+                    self.stdout.write(
+                        f"{model.__name__:<5} {query!r:<16} "
+                        f"index p50 {indexed[0]:7.2f}ms "
+                        f"p95 {indexed[1]:7.2f}ms | "
+                        f"icontains p50 {scanned[0]:7.2f}ms "
+                        f"p95 {scanned[1]:7.2f}ms"
+                    )
+            transaction.set_rollback(True)
+
+    def seed(self, rows):
+        today = timezone.now().date()
+        categories = RaceCategory.objects.bulk_create(
+            RaceCategory(
+                name=name,
+                description=name,
+                min_age=min_age,
+                max_age=min_age + 20
+            )
+            for name, min_age in (
+                ("Benchmark Junior", 8),
+                ("Benchmark Senior", 18),
+                ("Benchmark Masters", 35),
+            )
+        )
+        Race.objects.bulk_create(
+            (
+                Race(
+                    name=f"{('Grand Prix', 'Night Race', 'Sprint')[i % 3]} "
+                         f"{i}",
+                    category=categories[i % 3],
+                    date=today + timezone.timedelta(days=i % 365),
+                    max_participants=20
+                )
+                for i in range(rows)
+            ),
+            batch_size=5000
+        )
+        Kart.objects.bulk_create(
+            (
+                Kart(
+                    name=f"Kart {i}",
+                    category=categories[i % 3],
+                    speed=40 + i % 80,
+                    description="Generated",
+                    available_quantity=1
+                )
+                for i in range(rows)
+            ),
+            batch_size=5000
+        )
+        rebuild_index()
+
+    @staticmethod
+    def measure(build, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset = build()
+            queryset.count()
+            list(queryset[:20])
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        return (
+            statistics.median(timings),
+            timings[max(int(len(timings) * 0.95) - 1, 0)],
+        )
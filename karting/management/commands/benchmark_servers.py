@@ -0,0 +1,135 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from karting.loadtest import free_port, hammer, serve
+
+PATHS = (
+    "/",
+    "/race/",
+    "/race/?search=grand",
+    "/race/1/",
+    "/karts/",
+    "/karts/2/",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the busiest pages under gunicorn with threads and under "
+        "uvicorn with and without the async views, on the same generated "
+        "SQLite database with DEBUG off."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1000,
+            help="Number of races and of karts to generate.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=2000,
+            help="Number of timed requests per server.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=32,
+            help="Number of connections kept busy at once.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of worker processes of each server.",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Number of threads of each gunicorn worker.",
+        )
+
+    def handle(self, *args, **options):
+        workers = str(options["workers"])
+        gunicorn = [
+            "-m", "gunicorn", "karting_race_manager.wsgi:application",
+            "--worker-class", "gthread",
+            "--threads", str(options["threads"]),
+            "--workers", workers,
+            "--bind", "127.0.0.1:{port}",
+        ]
+        uvicorn = [
+            "-m", "uvicorn", "karting_race_manager.asgi:application",
+            "--workers", workers,
+            "--no-access-log",
+            "--port", "{port}",
+        ]
+        servers = {
+            "gunicorn (gthread)": (gunicorn, {"DJANGO_ASYNC_VIEWS": ""}),
+            "uvicorn (sync views)": (uvicorn, {"DJANGO_ASYNC_VIEWS": ""}),
+            "uvicorn (async views)": (
+                uvicorn, {"DJANGO_ASYNC_VIEWS": "True"}
+            ),
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            env = {
+                "DATABASE_URL": f"sqlite:///{Path(directory) / 'db.sqlite3'}",
+                "DJANGO_SETTINGS_MODULE": "karting_race_manager.settings",
+                "DJANGO_DEBUG": "False",
+                "DJANGO_SECRET_KEY": settings.SECRET_KEY,
+            }
+            self.seed(env, options["rows"])
+            self.stdout.write(
+                f"{options['rows']} races and karts, {options['requests']} "
+                f"requests over {options['concurrency']} connections, "
+                f"{workers} worker(s) each"
+            )
+            for name, (args, server_env) in servers.items():
+                port = free_port()
+                args = [arg.format(port=port) for arg in args]
+                try:
+                    with serve(args, port, {**env, **server_env}):
+                        # warm up connections, caches and compiled templates
+                        asyncio.run(
+                            hammer("127.0.0.1", port, PATHS, 100, 4)
+                        )
+                        results = asyncio.run(
+                            hammer(
+                                "127.0.0.1",
+                                port,
+                                PATHS,
+                                options["requests"],
+                                options["concurrency"]
+                            )
+                        )
+                except RuntimeError as error:
+                    raise CommandError(error)
+                self.stdout.write(f"{name:<22} {results.summary()}")
+
+    @staticmethod
+    def seed(env, rows):
+        for command in (
+            ["migrate", "--no-input", "--verbosity", "0"],
+            [
+                "shell",
+                "--command",
+                "from karting.management.commands.benchmark_search "
+                f"import Command; Command().seed({rows})",
+            ],
+        ):
+            subprocess.run(
+                [sys.executable, "manage.py", *command],
+                cwd=settings.BASE_DIR,
+                env={**os.environ, **env},
+                check=True,
+            )
@@ -0,0 +1,175 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import Client, RequestFactory
+from django.urls import resolve, reverse
+from django.utils.module_loading import import_string
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def performance_checks() -> list[tuple[str, bool, str]]:
+    """Return ``(setting, is_on, advice)`` for every tuned setting."""
+    template_loaders = [
+        loader
+        for engine in engines.all()
+        if hasattr(engine, "engine")
+        for loader in engine.engine.template_loaders
+    ]
+    database = connection.settings_dict
+    static_storage = import_string(settings.STORAGES["staticfiles"]["BACKEND"])
+    manifest = issubclass(static_storage, CompressedManifestStaticFilesStorage)
+    return [
+        (
+            "DEBUG off",
+            not settings.DEBUG,
+            "DEBUG keeps every SQL query and renders technical error pages.",
+        ),
+        (
+            "debug toolbar excluded",
+            "debug_toolbar" not in settings.INSTALLED_APPS
+            and not any(
+                middleware.startswith("debug_toolbar.")
+                for middleware in settings.MIDDLEWARE
+            ),
+            "The toolbar instruments every request.",
+        ),
+        (
+            "cached template loader",
+            bool(template_loaders) and all(
+                isinstance(loader, CachedLoader)
+                for loader in template_loaders
+            ),
+            "Templates are parsed again on every render.",
+        ),
+        (
+            "persistent database connections",
+            database.get("CONN_MAX_AGE") != 0,
+            "Every request opens a new database connection.",
+        ),
+        (
+            "connection health checks",
+            database.get("CONN_HEALTH_CHECKS", False),
+            "A dropped persistent connection fails the next request.",
+        ),
+        (
+            "compressed manifest static files",
+            manifest,
+            "Static files are served without hashed names, far-future "
+            "caching and compression.",
+        ),
+        (
+            "static files collected",
+            not manifest or staticfiles_storage.read_manifest() is not None,
+            "Pages fail until collectstatic writes the manifest.",
+        ),
+        (
+            "shared cache",
+            settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHES,
+            "Each process caches pages, counts and versions on its own.",
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the performance-critical settings that are off and time "
+        "a page through the whole middleware stack against its bare view."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url-name",
+            default="accounts:login",
+            help="Page to time; it should not need a logged-in user.",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=50,
+            help="Number of timed requests.",
+        )
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Exit with an error when a setting is off.",
+        )
+
+    def handle(self, *args, **options):
+        off = []
+        for name, is_on, advice in performance_checks():
+            if is_on:
+                self.stdout.write(f"{self.style.SUCCESS('on ')} {name}")
+            else:
+                off.append(name)
+                self.stdout.write(
+                    f"{self.style.WARNING('off')} {name}: {advice}"
+                )
+
+        if "static files collected" in off:
+            raise CommandError(
+                "Run collectstatic with these settings before timing pages."
+            )
+        url = reverse(options["url_name"])
+        stack = self.measure(self.through_stack(url), options["requests"])
+        view = self.measure(self.bare_view(url), options["requests"])
+        self.stdout.write(
+            f"{url} p50 over {options['requests']} requests: "
+            f"{stack:.2f}ms through the middleware, {view:.2f}ms in the "
+            f"view, {stack - view:.2f}ms overhead per request"
+        )
+
+        if off and options["strict"]:
+            raise CommandError(f"{len(off)} settings are off.")
+
+    @staticmethod
+    def host() -> str:
+        for host in settings.ALLOWED_HOSTS:
+            if host not in ("*", "") and not host.startswith("."):
+                return host
+        return "localhost"
+
+    def through_stack(self, url):
+        client = Client(
+            SERVER_NAME=self.host(),
+            REMOTE_ADDR="127.0.0.1",
+            raise_request_exception=False
+        )
+
+        def request():
+            response = client.get(url)
+            if response.status_code >= 400:
+                raise CommandError(f"{url} answered {response.status_code}.")
+        return request
+
+    def bare_view(self, url):
+        factory = RequestFactory(SERVER_NAME=self.host())
+        match = resolve(url)
+
+        def request():
+            response = match.func(
+                factory.get(url), *match.args, **match.kwargs
+            )
+            if hasattr(response, "render"):
+                response.render()
+        return request
+
+    @staticmethod
+    def measure(request, repeat: int) -> float:
+        request()  # warm up: imports, first template parse, connection
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            request()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from karting.services import CLEANUP_BATCH_SIZE, clear_past_registrations
+
+
+class Command(BaseCommand):
+    help = "Delete registrations of past races and return their karts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=CLEANUP_BATCH_SIZE,
+            help="Number of registrations deleted per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        report = clear_past_registrations(options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Deleted {report.deleted} registrations in "
+                f"{report.batches} batches, {report.elapsed:.2f}s "
+                f"({report.rate:.0f} rows/s)."
+            )
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from karting.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of races and karts."
+
+    def handle(self, *args, **options):
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from karting.models import Race
+
+
+class Command(BaseCommand):
+    help = "Recompute Race.participant_count from the registrations table."
+
+    def handle(self, *args, **options):
+        fixed = Race.objects.recount_participants()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Corrected participant count of {fixed} races."
+            )
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from karting.services import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Delete kart holds whose time limit has passed."
+
+    def handle(self, *args, **options):
+        released = release_expired_holds()
+        self.stdout.write(
+            self.style.SUCCESS(f"Released {released} expired holds.")
+        )
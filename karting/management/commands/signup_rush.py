@@ -0,0 +1,277 @@
+import asyncio
+import re
+import time
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, OuterRef, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from karting.loadtest import Results, Session, hammer
+from karting.managers import count_subquery
+from karting.models import (
+    Kart,
+    KartHold,
+    Race,
+    RaceCategory,
+    RaceParticipation
+)
+
+User = get_user_model()
+
+PASSWORD = "signup-rush-password"
+
+SELECTED_KART = re.compile(rb'<option value="(\d+)" selected>')
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test a running server the way a race opening does: anonymous "
+        "browsing, drivers logging in by email, then every driver posting "
+        "a registration for the same race at once. Run it with the "
+        "server's settings, as it creates the drivers, race and karts in "
+        "the server's database (and deletes them afterwards) and checks "
+        "that no race is overbooked and no kart quantity is negative."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            default="http://127.0.0.1:8000",
+            help="Address of the server under test.",
+        )
+        parser.add_argument(
+            "--drivers",
+            type=int,
+            default=100,
+            help="Number of drivers rushing the race.",
+        )
+        parser.add_argument(
+            "--seats",
+            type=int,
+            default=40,
+            help="Number of seats of the race.",
+        )
+        parser.add_argument(
+            "--karts",
+            type=int,
+            default=5,
+            help="Number of karts of the race's category.",
+        )
+        parser.add_argument(
+            "--kart-quantity",
+            type=int,
+            default=10,
+            help="Available quantity of each kart.",
+        )
+        parser.add_argument(
+            "--browse",
+            type=int,
+            default=1000,
+            help="Number of anonymous page views.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=32,
+            help="Number of browsers and logins in flight at once.",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the generated drivers, race and karts.",
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("Give the server as http://host:port.")
+        self.host, self.port = url.hostname, url.port or 80
+
+        stamp = int(time.time())
+        category, race, karts, drivers = self.seed(stamp, options)
+        try:
+            logged_in, posts = asyncio.run(
+                self.run(race, karts, drivers, options)
+            )
+            registered = RaceParticipation.objects.filter(race=race).count()
+            self.stdout.write(
+                f"{registered} of {logged_in} logged-in drivers got one "
+                f"of {race.max_participants} seats, "
+                f"{registered / posts.elapsed:.1f} registrations/s"
+            )
+            failures = self.check_invariants(race)
+        finally:
+            if not options["keep"]:
+                User.objects.filter(
+                    username__startswith=f"rush-{stamp}-"
+                ).delete()
+                category.delete()
+        if failures:
+            raise CommandError(f"{failures} invariant(s) broken.")
+
+    def seed(self, stamp, options):
+        category = RaceCategory.objects.create(
+            name=f"Signup Rush {stamp}",
+            description="Generated by signup_rush.",
+            min_age=0,
+            max_age=150
+        )
+        race = Race.objects.create(
+            name=f"Signup Rush {stamp}",
+            category=category,
+            date=timezone.now().date() + timezone.timedelta(days=30),
+            max_participants=options["seats"]
+        )
+        karts = Kart.objects.bulk_create(
+            Kart(
+                name=f"Rush Kart {i}",
+                category=category,
+                speed=80,
+                description="Generated by signup_rush.",
+                available_quantity=options["kart_quantity"]
+            )
+            for i in range(options["karts"])
+        )
+        # one hash for everyone, the server hashes on every login anyway
+        password = make_password(PASSWORD)
+        drivers = User.objects.bulk_create(
+            User(
+                username=f"rush-{stamp}-{i}",
+                email=f"rush-{stamp}-{i}@example.com",
+                password=password,
+                date_of_birth="1990-01-01"
+            )
+            for i in range(options["drivers"])
+        )
+        return category, race, karts, drivers
+
+    async def run(self, race, karts, drivers, options):
+        """Play the scenarios in turn, on one event loop as the logged-in
+        sessions' connections belong to it."""
+        self.report("browse", await self.browse(options))
+        sessions, logins = await self.log_in(drivers, options)
+        self.report("login", logins)
+        if not sessions:
+            raise CommandError("No driver could log in.")
+        forms, posts = await self.rush(sessions, race, karts)
+        self.report("register form", forms)
+        self.report("register", posts)
+        return len(sessions), posts
+
+    async def browse(self, options) -> Results:
+        return await hammer(
+            self.host,
+            self.port,
+            [reverse("karting:race-list"), reverse("karting:karts-list")],
+            options["browse"],
+            options["concurrency"]
+        )
+
+    async def log_in(self, drivers, options):
+        """Log every driver in by email, ``concurrency`` at a time."""
+        results = Results()
+        sessions = []
+        slots = asyncio.Semaphore(options["concurrency"])
+        login = reverse("accounts:login")
+
+        async def log_in(driver):
+            session = Session(self.host, self.port)
+            async with slots:
+                await session.request(results, "GET", login)
+                await session.request(
+                    results,
+                    "POST",
+                    login,
+                    {"username": driver.email, "password": PASSWORD},
+                    expect=(302,)
+                )
+            if "sessionid" in session.cookies:
+                sessions.append(session)
+            else:
+                await session.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*map(log_in, drivers))
+        results.elapsed = time.perf_counter() - started
+        return sessions, results
+
+    async def rush(self, sessions, race, karts):
+        """Open the registration form everywhere, then post all at once.
+
+        The form holds a seat and a kart for the first drivers, who post
+        the kart it preselects; the others post anyway, spread over the
+        karts, as they would after a reload.
+        """
+        forms, posts = Results(), Results()
+        path = reverse("karting:register-for-race", args=[race.pk])
+        ready = asyncio.Barrier(len(sessions) + 1)
+
+        async def register(number, session):
+            form = await session.request(
+                forms, "GET", path, expect=(200, 302)
+            )
+            held = SELECTED_KART.search(form.body) if form else None
+            kart = held[1].decode() if held else karts[number % len(karts)].pk
+            await ready.wait()
+            await session.request(
+                posts,
+                "POST",
+                path,
+                {"kart": kart},
+                # redirected when taken or refused, the form when the kart
+                # ran out
+                expect=(200, 302)
+            )
+            await session.close()
+
+        tasks = [
+            asyncio.create_task(register(number, session))
+            for number, session in enumerate(sessions)
+        ]
+        started = time.perf_counter()
+        await ready.wait()
+        forms.elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        await asyncio.gather(*tasks)
+        posts.elapsed = time.perf_counter() - started
+        return forms, posts
+
+    def report(self, scenario: str, results: Results) -> None:
+        self.stdout.write(f"{scenario:<14} {results.summary()}")
+
+    def check_invariants(self, race) -> int:
+        races = Race.objects.annotate(registered=Count("participations"))
+        checks = {
+            "no overbooked race": races.filter(
+                Q(participant_count__gt=F("max_participants"))
+                | Q(registered__gt=F("max_participants"))
+            ),
+            "seat count matches registrations": races.filter(
+                pk=race.pk
+            ).exclude(participant_count=F("registered")),
+            # a hold is deleted when its driver registers
+            "no seat promised twice": Race.objects.alias(
+                promised=F("participant_count") + count_subquery(
+                    KartHold.objects.live().filter(race=OuterRef("pk")),
+                    "race"
+                )
+            ).filter(promised__gt=F("max_participants")),
+            "no negative kart quantity": Kart.objects.filter(
+                available_quantity__lt=0
+            ),
+        }
+        failures = 0
+        for name, offenders in checks.items():
+            offenders = list(offenders.values_list("name", flat=True)[:5])
+            if offenders:
+                failures += 1
+                self.stdout.write(
+                    self.style.ERROR(f"FAIL {name}: {', '.join(offenders)}")
+                )
+            else:
+                self.stdout.write(self.style.SUCCESS(f"ok   {name}"))
+        return failures
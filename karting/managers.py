@@ -1,9 +1,98 @@
+from datetime import date
+
 from django.contrib.auth.models import UserManager
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (
+    BooleanField,
+    Case,
+    Count,
+    Exists,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When
+)
+from django.db.models.functions import Coalesce, ExtractYear, Greatest, Now
 from django.utils import timezone
 
+from karting.live import publish_on_commit
+from karting.pagination import invalidate_counts
+from karting.versions import bump_version
+
+
+def count_subquery(queryset, field: str):
+    """Correlated ``COUNT(*)`` of ``queryset`` grouped by ``field``."""
+    return Coalesce(
+        Subquery(
+            queryset.order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        Value(0),
+    )
+
+
+def shift_counters(model, field: str, deltas: dict) -> int:
+    """Add ``deltas[pk]`` to ``field`` of every row with a single UPDATE.
+
+    The per-row amounts are folded into one ``CASE`` expression and the
+    result is floored at zero to respect the positive integer columns.
+    """
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return 0
+    output_field = model._meta.get_field(field)
+    return model.objects.filter(pk__in=deltas).update(**{
+        field: Greatest(
+            Case(
+                *(
+                    When(pk=pk, then=F(field) + delta)
+                    for pk, delta in deltas.items()
+                ),
+                default=F(field),
+                output_field=output_field,
+            ),
+            0,
+            output_field=output_field,
+        )
+    })
+
+
+def age_expression(field: str = "date_of_birth"):
+    """Full years from the date in ``field`` to today, computed in SQL."""
+    today = date.today()
+    birthday_ahead = Q(**{f"{field}__month__gt": today.month}) | Q(**{
+        f"{field}__month": today.month,
+        f"{field}__day__gt": today.day,
+    })
+    return ExpressionWrapper(
+        Value(today.year)
+        - ExtractYear(field)
+        - Case(When(birthday_ahead, then=1), default=0),
+        output_field=IntegerField(),
+    )
+
 
-class CustomUserManager(UserManager):
+class CustomUserQuerySet(models.QuerySet):
+    def with_age(self):
+        """Annotate ``current_age``, the SQL twin of ``CustomUser.age``."""
+        return self.annotate(current_age=age_expression())
+
+    def eligible_for(self, category):
+        """Users old enough and young enough to race in ``category``."""
+        oldest, youngest = category.birth_date_range()
+        return self.filter(
+            date_of_birth__gt=oldest,
+            date_of_birth__lte=youngest
+        )
+
+
+class CustomUserManager(UserManager.from_queryset(CustomUserQuerySet)):
 
     def create_superuser(
             self,
@@ -25,7 +114,141 @@ class CustomUserManager(UserManager):
         return self.create_user(username, email, password, **extra_fields)
 
 
-class RaceManager(models.Manager):
+class TimestampedQuerySet(models.QuerySet):
+    """Keep ``updated_at`` and the model version right on bulk updates.
+
+    ``auto_now`` only applies to ``save()``, so counter updates such as
+    seat and kart bookings would otherwise go unnoticed by the API.
+    """
+
+    def update(self, **kwargs):
+        kwargs.setdefault("updated_at", Now())
+        updated = super().update(**kwargs)
+        if updated:
+            bump_version(self.model, using=self.db)
+        return updated
+
+
+class RaceQuerySet(TimestampedQuerySet):
     def upcoming(self):
         today = timezone.now().date()
         return self.filter(date__gte=today).order_by("date")
+
+    def eligible_for(self, user):
+        """Races whose category admits ``user`` at their current age."""
+        age = user.age
+        return self.filter(
+            category__min_age__lte=age,
+            category__max_age__gte=age
+        )
+
+    def open_to(self, user):
+        """Upcoming races ``user`` may enter and still has a seat in."""
+        return (
+            self.upcoming()
+            .eligible_for(user)
+            .with_is_registered(user)
+            .filter(
+                is_registered=False,
+                participant_count__lt=F("max_participants")
+            )
+        )
+
+    def with_is_registered(self, user):
+        """Annotate ``is_registered``: whether ``user`` signed up already."""
+        if not user.is_authenticated:
+            return self.annotate(
+                is_registered=Value(False, output_field=BooleanField())
+            )
+        participations = self.model._meta.get_field(
+            "participations"
+        ).related_model
+        return self.annotate(
+            is_registered=Exists(
+                participations.objects.filter(
+                    race=OuterRef("pk"),
+                    user_id=user.pk
+                )
+            )
+        )
+
+
+class RaceManager(models.Manager.from_queryset(RaceQuerySet)):
+    def recount_participants(self) -> int:
+        """Rebuild ``participant_count`` from the participation table.
+
+        Runs as a single UPDATE over the races whose counter has drifted
+        and returns how many of them were corrected.
+        """
+        participations = self.model._meta.get_field(
+            "participations"
+        ).related_model
+        actual = count_subquery(
+            participations.objects.filter(race=OuterRef("pk")), "race"
+        )
+        return (
+            self.alias(actual=actual)
+            .exclude(participant_count=F("actual"))
+            .update(participant_count=actual)
+        )
+
+
+class KartQuerySet(TimestampedQuerySet):
+    def with_free_quantity(self, user=None, user_ids=None):
+        """Annotate ``free_quantity``: units not promised to live holds.
+
+        Holds of ``user``, or of the users of ``user_ids``, are not
+        subtracted, so a driver always sees the kart they are holding.
+        """
+        holds = self.model._meta.get_field("holds").related_model
+        held = holds.objects.live().filter(kart=OuterRef("pk"))
+        if user is not None:
+            held = held.exclude(user=user)
+        if user_ids is not None:
+            held = held.exclude(user_id__in=user_ids)
+        return self.annotate(
+            free_quantity=ExpressionWrapper(
+                F("available_quantity") - count_subquery(held, "kart"),
+                output_field=models.IntegerField(),
+            )
+        )
+
+    def available(self, user=None):
+        return self.with_free_quantity(user).filter(free_quantity__gt=0)
+
+
+class KartHoldQuerySet(models.QuerySet):
+    def live(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+
+class RaceParticipationQuerySet(models.QuerySet):
+    def release(self) -> int:
+        """Delete the participations and hand back their seats and karts.
+
+        Seats and karts are restored with one grouped UPDATE each for all
+        affected races and karts rather than one save per participation.
+        """
+        race_model = self.model._meta.get_field("race").related_model
+        kart_model = self.model._meta.get_field("kart").related_model
+
+        with transaction.atomic():
+            per_race = self.order_by().values_list("race").annotate(
+                total=Count("pk")
+            )
+            seats = {race: -total for race, total in per_race}
+            shift_counters(race_model, "participant_count", seats)
+            per_kart = self.order_by().values_list("kart").annotate(
+                total=Count("pk")
+            )
+            karts = dict(per_kart)
+            shift_counters(kart_model, "available_quantity", karts)
+            publish_on_commit(seats=seats, karts=karts, using=self.db)
+
+            deleted, _ = self.delete()
+        # a fast bulk DELETE sends no post_delete signal
+        invalidate_counts(self.model)
+        return deleted
@@ -0,0 +1,287 @@
+"""Per-view request metrics, exposed in the Prometheus text format.
+
+``MetricsMiddleware`` records, for every request, the time taken to
+produce the response, the database queries it ran and their time, and the
+size of the response body, labelled with the URL name of the view, the
+method and the status class. Every histogram has fixed buckets and the
+number of label combinations is capped at ``METRICS_MAX_SERIES`` (extra
+ones are counted under ``view="other"``), so memory stays bounded
+whatever the traffic.
+
+Each thread records into its own shard, so requests never contend for a
+lock; shards are only summed when ``/metrics`` is scraped, and those of
+finished threads are folded together. Metrics are per process: scrape
+every process, or sum them in Prometheus.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+UNMATCHED = "unmatched"
+OTHER = "other"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (name, help, upper bounds of the buckets)
+HISTOGRAMS = (
+    (
+        "karting_request_duration_seconds",
+        "Time taken to produce a response.",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    (
+        "karting_request_queries",
+        "Database queries run per request.",
+        (0, 1, 2, 3, 5, 10, 20, 50, 100),
+    ),
+    (
+        "karting_request_query_seconds",
+        "Time spent in database queries per request.",
+        (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+    ),
+    (
+        "karting_response_size_bytes",
+        "Size of response bodies, streaming responses excepted.",
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    ),
+)
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int):
+        # one count per bucket plus the +Inf one, not cumulative
+        self.counts = [0] * (size + 1)
+        self.sum = 0.0
+
+    def add(self, other: "_Histogram") -> None:
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.sum += other.sum
+
+
+def _new_series() -> list[_Histogram]:
+    return [_Histogram(len(buckets)) for _, _, buckets in HISTOGRAMS]
+
+
+class Metrics:
+    def __init__(self, max_series: int | None = None):
+        self._max_series = max_series
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards: dict[threading.Thread, dict] = {}
+        self._retired: dict = {}
+        self._labels: set[tuple[str, str, str]] = set()
+
+    @property
+    def max_series(self) -> int:
+        if self._max_series is None:
+            return settings.METRICS_MAX_SERIES
+        return self._max_series
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "series", None)
+        if shard is None:
+            shard = self._local.series = {}
+            with self._lock:
+                self._retire_finished()
+                self._shards[threading.current_thread()] = shard
+        return shard
+
+    def _retire_finished(self) -> None:
+        """Fold the shards of finished threads together; hold the lock."""
+        for thread in [t for t in self._shards if not t.is_alive()]:
+            for labels, series in self._shards.pop(thread).items():
+                merged = self._retired.setdefault(labels, _new_series())
+                for histogram, other in zip(merged, series):
+                    histogram.add(other)
+
+    def _labels_for(self, view: str, method: str, status: int) -> tuple:
+        labels = (
+            view,
+            method if method in METHODS else OTHER,
+            f"{status // 100}xx",
+        )
+        if labels in self._labels:
+            return labels
+        with self._lock:
+            if len(self._labels) >= self.max_series:
+                return OTHER, OTHER, OTHER
+            self._labels.add(labels)
+        return labels
+
+    def observe(
+        self,
+        view: str,
+        method: str,
+        status: int,
+        seconds: float,
+        queries: int,
+        query_seconds: float,
+        size: int | None
+    ) -> None:
+        """Record one request; ``size`` is ``None`` for streaming ones."""
+        labels = self._labels_for(view, method, status)
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            series = shard[labels] = _new_series()
+        values = (seconds, queries, query_seconds, size)
+        for (_, _, buckets), histogram, value in zip(
+            HISTOGRAMS, series, values
+        ):
+            if value is not None:
+                histogram.counts[bisect_left(buckets, value)] += 1
+                histogram.sum += value
+
+    def collect(self) -> dict:
+        """Sum the shards into ``{labels: [histogram, ...]}``."""
+        with self._lock:
+            self._retire_finished()
+            shards = [self._retired, *self._shards.values()]
+        totals = {}
+        for shard in shards:
+            for labels, series in list(shard.items()):
+                merged = totals.setdefault(labels, _new_series())
+                for histogram, other in zip(merged, series):
+                    histogram.add(other)
+        return totals
+
+    def render(self) -> str:
+        totals = sorted(self.collect().items())
+        lines = []
+        for index, (name, help_text, buckets) in enumerate(HISTOGRAMS):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, series in totals:
+                histogram = series[index]
+                label_text = ",".join(
+                    f'{key}="{_escape(value)}"'
+                    for key, value in zip(("view", "method", "status"), labels)
+                )
+                cumulative = 0
+                bounds = [*map(float, buckets), "+Inf"]
+                for bound, count in zip(bounds, histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        f'{name}_bucket{{{label_text},le="{bound}"}} '
+                        f"{cumulative}"
+                    )
+                lines.append(f"{name}_sum{{{label_text}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{label_text}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shards.clear()
+            self._retired.clear()
+            self._labels.clear()
+            self._local = threading.local()
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+registry = Metrics()
+
+
+class _QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+_current_queries: ContextVar[_QueryStats | None] = ContextVar(
+    "karting_metrics_queries", default=None
+)
+
+
+def time_query(execute, sql, params, many, context):
+    """Execute wrapper adding every query to the current request's stats.
+
+    It is installed on each connection as it opens rather than entered per
+    request with ``connection.execute_wrapper()``: async views run their
+    queries on the connections of other threads, which the context
+    variable follows but a per-request wrapper would not.
+    """
+    stats = _current_queries.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - started
+
+
+def instrument_connection(connection) -> None:
+    """Install ``time_query`` on a newly opened connection."""
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class MetricsMiddleware:
+    """Record every response in ``registry``.
+
+    The duration runs until the response object is returned, so streamed
+    bodies are not included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = _QueryStats()
+        token = _current_queries.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_queries.reset(token)
+        self.record(request, response, started, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = _QueryStats()
+        token = _current_queries.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_queries.reset(token)
+        self.record(request, response, started, stats)
+        return response
+
+    @staticmethod
+    def record(request, response, started: float, stats: _QueryStats):
+        match = request.resolver_match
+        registry.observe(
+            view=match.view_name if match else UNMATCHED,
+            method=request.method,
+            status=response.status_code,
+            seconds=time.perf_counter() - started,
+            queries=stats.count,
+            query_seconds=stats.seconds,
+            size=None if response.streaming else len(response.content),
+        )
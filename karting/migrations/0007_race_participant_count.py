@@ -0,0 +1,40 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:13
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_participant_count(apps, schema_editor):
+    Race = apps.get_model("karting", "Race")
+    RaceParticipation = apps.get_model("karting", "RaceParticipation")
+    Race.objects.update(
+        participant_count=Coalesce(
+            Subquery(
+                RaceParticipation.objects.filter(race=OuterRef("pk"))
+                .order_by()
+                .values("race")
+                .annotate(total=Count("pk"))
+                .values("total")
+            ),
+            Value(0),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("karting", "0006_remove_race_karts_returned"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="race",
+            name="participant_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(
+            fill_participant_count, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("karting", "0007_race_participant_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="race",
+            name="queued_registration",
+            field=models.BooleanField(default=False, help_text="Queue sign-ups and confirm them in batches for races that sell out in seconds."),
+        ),
+        migrations.CreateModel(
+            name="RegistrationTicket",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("status", models.CharField(choices=[("pending", "Pending"), ("confirmed", "Confirmed"), ("rejected", "Rejected")], default="pending", max_length=10)),
+                ("reason", models.CharField(blank=True, max_length=255)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+                ("kart", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="registration_tickets", to="karting.kart")),
+                ("race", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="registration_tickets", to="karting.race")),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="registration_tickets", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "indexes": [models.Index(fields=["race", "status", "id"], name="ticket_queue_idx")],
+            },
+        ),
+    ]
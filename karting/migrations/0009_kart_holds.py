@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("karting", "0008_registration_queue"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="KartHold",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("expires_at", models.DateTimeField(db_index=True)),
+                ("kart", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="holds", to="karting.kart")),
+                ("race", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="holds", to="karting.race")),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="kart_holds", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "indexes": [models.Index(fields=["kart", "expires_at"], name="hold_kart_expiry_idx"), models.Index(fields=["race", "expires_at"], name="hold_race_expiry_idx")],
+                "constraints": [models.UniqueConstraint(fields=("user", "race"), name="one_hold_per_user_and_race")],
+            },
+        ),
+    ]
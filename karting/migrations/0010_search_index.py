@@ -0,0 +1,63 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:40
+
+from django.db import migrations
+
+TABLES = (
+    ("karting_race_search", "karting_race"),
+    ("karting_kart_search", "karting_kart"),
+)
+
+
+def create_search_tables(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table, source in TABLES:
+        select = (
+            f"FROM {source} INNER JOIN karting_racecategory "
+            f"ON {source}.category_id = karting_racecategory.id"
+        )
+        if vendor == "sqlite":
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE {table} USING fts5("
+                "name, category, "
+                "tokenize = 'unicode61 remove_diacritics 2', "
+                "prefix = '2 3')"
+            )
+            schema_editor.execute(
+                f"INSERT INTO {table} (rowid, name, category) "
+                f"SELECT {source}.id, {source}.name, "
+                f"karting_racecategory.name {select}"
+            )
+        elif vendor == "postgresql":
+            schema_editor.execute(
+                f"CREATE TABLE {table} ("
+                "object_id bigint PRIMARY KEY, "
+                "document tsvector NOT NULL)"
+            )
+            schema_editor.execute(
+                f"CREATE INDEX {table}_document_idx "
+                f"ON {table} USING gin (document)"
+            )
+            schema_editor.execute(
+                f"INSERT INTO {table} (object_id, document) "
+                f"SELECT {source}.id, "
+                f"setweight(to_tsvector('simple', {source}.name), 'A') || "
+                "setweight(to_tsvector('simple', karting_racecategory.name), "
+                f"'B') {select}"
+            )
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor in ("sqlite", "postgresql"):
+        for table, _ in TABLES:
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("karting", "0009_kart_holds"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
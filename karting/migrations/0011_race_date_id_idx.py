@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("karting", "0010_search_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="race",
+            index=models.Index(fields=["date", "id"], name="race_date_id_idx"),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:14
+
+import django.db.models.deletion
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("karting", "0012_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VisitCounter",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("count", models.PositiveBigIntegerField(default=0)),
+                ("user", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name="visit_counters", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "constraints": [models.UniqueConstraint(django.db.models.functions.comparison.Coalesce("user", 0), name="visit_counter_user_uniq")],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:18
+
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_duplicate_emails(apps, schema_editor):
+    user_model = apps.get_model("karting", "CustomUser")
+    duplicates = list(
+        user_model.objects.using(schema_editor.connection.alias)
+        .exclude(email="")
+        .values(email_lower=Lower("email"))
+        .annotate(users=Count("id"))
+        .filter(users__gt=1)
+        .values_list("email_lower", flat=True)
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Email addresses must be unique, regardless of case, before "
+            "migrating. Shared by several users: " + ", ".join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("karting", "0013_visit_counter"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="customuser",
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower("email"), condition=models.Q(("email", ""), _negated=True), name="user_email_ci_uniq", violation_error_message="A user with this email address already exists."),
+        ),
+    ]
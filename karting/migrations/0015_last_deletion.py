@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-18 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("karting", "0014_user_email_ci_uniq"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LastDeletion",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("model", models.CharField(max_length=100, unique=True)),
+                ("deleted_at", models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,18 +1,40 @@
 from datetime import date
 
+from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.db import models
+from django.db.models.functions import Coalesce, Lower
 
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
-from karting.managers import CustomUserManager, RaceManager
+from karting.managers import (
+    CustomUserManager,
+    KartHoldQuerySet,
+    KartQuerySet,
+    RaceManager,
+    RaceParticipationQuerySet,
+    TimestampedQuerySet
+)
 
 
 class CustomUser(AbstractUser):
     date_of_birth = models.DateField(null=False, blank=False)
     objects = CustomUserManager()
 
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # email doubles as a login, see accounts.backends
+            models.UniqueConstraint(
+                Lower("email"),
+                condition=~models.Q(email=""),
+                name="user_email_ci_uniq",
+                violation_error_message=(
+                    "A user with this email address already exists."
+                ),
+            ),
+        ]
+
     @property
     def age(self) -> int | None:
         if self.date_of_birth:
@@ -32,10 +54,20 @@ class RaceCategory(models.Model):
     description = models.TextField()
     min_age = models.PositiveIntegerField()
     max_age = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    objects = TimestampedQuerySet.as_manager()
 
     def __str__(self):
         return self.name
 
+    def birth_date_range(self) -> tuple[date, date]:
+        """Exclusive oldest and inclusive youngest eligible birth dates."""
+        today = date.today()
+        return (
+            today - relativedelta(years=self.max_age + 1),
+            today - relativedelta(years=self.min_age),
+        )
+
 
 class Kart(models.Model):
     name = models.CharField(max_length=100)
@@ -47,6 +79,8 @@ class Kart(models.Model):
     speed = models.PositiveIntegerField()
     description = models.TextField()
     available_quantity = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    objects = KartQuerySet.as_manager()
 
     def __str__(self) -> str:
         return self.name
@@ -61,28 +95,46 @@ class Race(models.Model):
     )
     date = models.DateField()
     max_participants = models.PositiveIntegerField()
+    participant_count = models.PositiveIntegerField(default=0)
+    queued_registration = models.BooleanField(
+        default=False,
+        help_text="Queue sign-ups and confirm them in batches "
+                  "for races that sell out in seconds."
+    )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
     objects = RaceManager()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["date", "id"], name="race_date_id_idx"),
+        ]
+
     def __str__(self) -> str:
         return self.name
 
+    def save(self, *args, **kwargs):
+        # participant_count only moves through conditional UPDATEs; writing
+        # back the value loaded with the row would undo sign-ups committed
+        # in the meantime
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name != "participant_count"
+            ]
+        super().save(*args, **kwargs)
+
     def is_user_eligible(self, user) -> bool:
         return self.category.min_age <= user.age <= self.category.max_age
 
     def is_full(self) -> bool:
-        return self.participations.count() >= self.max_participants
+        return self.participant_count >= self.max_participants
 
     def clear_past_registrations(self):
         if self.date < timezone.now().date():
-            removed_participations = self.participations.all()
-            count = removed_participations.count()
-
-            for participation in removed_participations:
-                kart = participation.kart
-                kart.available_quantity += 1
-                kart.save()
-
-            removed_participations.delete()
+            count = self.participations.release()
+            self.participant_count = 0
             return count
         return 0
 
@@ -104,6 +156,132 @@ class RaceParticipation(models.Model):
         related_name="race_participations"
     )
     date_registered = models.DateTimeField(auto_now_add=True)
+    objects = RaceParticipationQuerySet.as_manager()
 
     def __str__(self) -> str:
         return f"{self.user.username} - {self.race.name} ({self.kart.name})"
+
+
+class RegistrationTicket(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        CONFIRMED = "confirmed", "Confirmed"
+        REJECTED = "rejected", "Rejected"
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="registration_tickets"
+    )
+    race = models.ForeignKey(
+        Race,
+        on_delete=models.CASCADE,
+        related_name="registration_tickets"
+    )
+    kart = models.ForeignKey(
+        Kart,
+        on_delete=models.CASCADE,
+        related_name="registration_tickets"
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING
+    )
+    reason = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["race", "status", "id"],
+                name="ticket_queue_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user} - {self.race} ({self.status})"
+
+    def reject(self, reason: str) -> None:
+        self.status = self.Status.REJECTED
+        self.reason = reason
+
+
+class KartHold(models.Model):
+    """A short-lived promise of a seat and a kart while the form is open."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="kart_holds"
+    )
+    race = models.ForeignKey(
+        Race,
+        on_delete=models.CASCADE,
+        related_name="holds"
+    )
+    kart = models.ForeignKey(
+        Kart,
+        on_delete=models.CASCADE,
+        related_name="holds"
+    )
+    expires_at = models.DateTimeField(db_index=True)
+    objects = KartHoldQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "race"],
+                name="one_hold_per_user_and_race"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["kart", "expires_at"],
+                name="hold_kart_expiry_idx"
+            ),
+            models.Index(
+                fields=["race", "expires_at"],
+                name="hold_race_expiry_idx"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user} - {self.race} ({self.kart})"
+
+
+class VisitCounter(models.Model):
+    """Home page visits of one user, or of everyone without a user."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="visit_counters"
+    )
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # a single row per user and a single total row
+            models.UniqueConstraint(
+                Coalesce("user", 0),
+                name="visit_counter_user_uniq"
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user or 'Total'}: {self.count}"
+
+
+class LastDeletion(models.Model):
+    """When a row of a model was last deleted.
+
+    ``MAX(updated_at)`` cannot tell a deleted row, so versions rebuilt from
+    it (see ``karting.versions``) take this date into account as well.
+    """
+    model = models.CharField(max_length=100, unique=True)
+    deleted_at = models.DateTimeField()
+
+    def __str__(self) -> str:
+        return f"{self.model}: {self.deleted_at}"
@@ -0,0 +1,333 @@
+"""Paginators that avoid exact ``COUNT(*)`` queries on large lists.
+
+``CursorPaginator`` reads pages with ``WHERE (key) > (last key) ORDER BY
+key LIMIT n`` instead of ``OFFSET``, so a deep page costs as much as the
+first one and no count is needed. Cursors are opaque URL-safe tokens
+holding the key of the row a page starts after (or ends before).
+
+``CountingPaginator`` keeps numbered pages but caches the total per
+filter and trusts the planner's estimate for big results.
+"""
+import base64
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import InvalidPage, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.http import Http404
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+@dataclass
+class CursorPage:
+    object_list: list
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+    cursor_based = True
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Paginate ``queryset`` by the unique ``ordering`` key.
+
+    ``ordering`` lists ascending field paths ending with a unique one, for
+    example ``("date", "id")``.
+    """
+
+    def __init__(self, queryset, per_page: int, ordering: tuple):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering
+        self.fields = [self._resolve(path) for path in ordering]
+
+    def _resolve(self, path: str):
+        model = self.queryset.model
+        *relations, name = path.split("__")
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        return model._meta.get_field(name)
+
+    def _encode(self, obj, direction: str) -> str:
+        key = []
+        for path in self.ordering:
+            value = obj
+            for attr in path.split("__"):
+                value = getattr(value, attr)
+            key.append(value)
+        token = json.dumps([direction, key], cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+    def _decode(self, cursor: str) -> tuple[str, list]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            direction, key = json.loads(base64.urlsafe_b64decode(padded))
+            if direction not in ("n", "p") or len(key) != len(self.fields):
+                raise ValueError
+            return direction, [
+                field.to_python(value)
+                for field, value in zip(self.fields, key)
+            ]
+        except (ValueError, TypeError, ValidationError) as error:
+            raise InvalidCursor("Invalid cursor.") from error
+
+    def _beyond(self, key: list, backwards: bool) -> Q:
+        """Rows strictly after ``key`` (or before it) in key order."""
+        lookup = "lt" if backwards else "gt"
+        condition = None
+        for path, value in reversed(list(zip(self.ordering, key))):
+            beyond = Q(**{f"{path}__{lookup}": value})
+            if condition is not None:
+                beyond |= Q(**{path: value}) & condition
+            condition = beyond
+        return condition
+
+    def _page_queryset(self, cursor: str | None):
+        """The rows of the page plus one, and whether it reads backwards."""
+        queryset = self.queryset.order_by(*self.ordering)
+        backwards = False
+        if cursor:
+            direction, key = self._decode(cursor)
+            backwards = direction == "p"
+            queryset = queryset.filter(self._beyond(key, backwards))
+        if backwards:
+            queryset = queryset.reverse()
+        return queryset[:self.per_page + 1], backwards
+
+    def _page(self, rows: list, backwards: bool, cursor) -> CursorPage:
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+
+        page = CursorPage(rows)
+        if rows and has_next:
+            page.next_cursor = self._encode(rows[-1], "n")
+        if rows and has_previous:
+            page.previous_cursor = self._encode(rows[0], "p")
+        return page
+
+    def page(self, cursor: str | None = None) -> CursorPage:
+        queryset, backwards = self._page_queryset(cursor)
+        return self._page(list(queryset), backwards, cursor)
+
+    async def apage(self, cursor: str | None = None) -> CursorPage:
+        queryset, backwards = self._page_queryset(cursor)
+        return self._page([row async for row in queryset], backwards, cursor)
+
+
+class CursorPaginationMixin:
+    """Serve a ``ListView`` page by page through a ``?cursor=`` token.
+
+    Set ``cursor_ordering`` to the unique key of the list. Views fall back
+    to the regular numbered pages when ``use_cursor_pagination`` says so,
+    e.g. for searches ordered by relevance or for old ``?page=`` links.
+    """
+    cursor_ordering: tuple = ("id",)
+    cursor_query_param = "cursor"
+
+    # set by apaginate() for the async views
+    _fetched_page = None
+
+    def use_cursor_pagination(self) -> bool:
+        return self.page_kwarg not in self.request.GET
+
+    def paginate_queryset(self, queryset, page_size):
+        if self._fetched_page is not None:
+            return self._fetched_page
+        if not self.use_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = CursorPaginator(queryset, page_size, self.cursor_ordering)
+        try:
+            page = paginator.page(
+                self.request.GET.get(self.cursor_query_param)
+            )
+        except InvalidCursor as error:
+            raise Http404(str(error))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    async def apaginate(self) -> None:
+        """Fetch the page of ``object_list`` with the async ORM.
+
+        Async views call it before ``get_context_data()``, which then gets
+        the fetched page instead of leaving the queries to the template.
+        Numbered pages need a paginator with an ``acount()`` method.
+        """
+        queryset = self.object_list
+        page_size = self.get_paginate_by(queryset)
+        if not page_size:
+            return
+        if self.use_cursor_pagination():
+            paginator = CursorPaginator(
+                queryset, page_size, self.cursor_ordering
+            )
+            try:
+                page = await paginator.apage(
+                    self.request.GET.get(self.cursor_query_param)
+                )
+            except InvalidCursor as error:
+                raise Http404(str(error))
+        else:
+            paginator = self.get_paginator(
+                queryset,
+                page_size,
+                orphans=self.get_paginate_orphans(),
+                allow_empty_first_page=self.get_allow_empty(),
+            )
+            await paginator.acount()
+            number = self.request.GET.get(self.page_kwarg) or 1
+            try:
+                if number == "last":
+                    number = paginator.num_pages
+                page = paginator.page(number)
+            except InvalidPage as error:
+                raise Http404(str(error))
+            page.object_list = [row async for row in page.object_list]
+        self._fetched_page = (
+            paginator, page, page.object_list, page.has_other_pages()
+        )
+
+
+def _count_generation_key(model) -> str:
+    return f"karting:count:{model._meta.label_lower}:generation"
+
+
+def invalidate_counts(model) -> None:
+    """Drop every cached total of ``model`` lists."""
+    cache.set(_count_generation_key(model), time.time_ns(), None)
+
+
+def estimate_count(queryset) -> int | None:
+    """Return the planner's row estimate of ``queryset`` on PostgreSQL.
+
+    An unfiltered table is read from ``pg_class.reltuples``, anything else
+    from ``EXPLAIN``. Other databases return ``None``.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+            if row and row[0] >= 0:
+                return int(row[0])
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class CountingPaginator(Paginator):
+    """Numbered pages with a cached, possibly estimated, total.
+
+    Totals are cached per normalized query (the SQL of the unordered
+    queryset) for ``PAGINATOR_COUNT_TIMEOUT`` seconds and dropped by the
+    ``post_save``/``post_delete`` handlers of the listed model. When the
+    planner expects more than ``PAGINATOR_ESTIMATE_THRESHOLD`` rows the
+    estimate is used instead of an exact ``COUNT(*)``.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return super().count
+        try:
+            key = self._cache_key(
+                queryset,
+                cache.get_or_set(
+                    _count_generation_key(queryset.model), 0, None
+                )
+            )
+        except EmptyResultSet:
+            return 0
+
+        total = cache.get(key)
+        if total is None:
+            estimate = estimate_count(queryset)
+            if (
+                estimate is not None
+                and estimate > settings.PAGINATOR_ESTIMATE_THRESHOLD
+            ):
+                total = estimate
+            else:
+                total = queryset.count()
+            cache.set(key, total, settings.PAGINATOR_COUNT_TIMEOUT)
+        return total
+
+    async def acount(self) -> int:
+        """Fill ``count`` with the async ORM and cache API."""
+        if "count" in self.__dict__:
+            return self.count
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet):
+            return self.count
+        try:
+            key = self._cache_key(
+                queryset,
+                await cache.aget_or_set(
+                    _count_generation_key(queryset.model), 0, None
+                )
+            )
+        except EmptyResultSet:
+            total = 0
+        else:
+            total = await cache.aget(key)
+            if total is None:
+                estimate = await sync_to_async(estimate_count)(queryset)
+                if (
+                    estimate is not None
+                    and estimate > settings.PAGINATOR_ESTIMATE_THRESHOLD
+                ):
+                    total = estimate
+                else:
+                    total = await queryset.acount()
+                await cache.aset(key, total, settings.PAGINATOR_COUNT_TIMEOUT)
+        self.__dict__["count"] = total
+        return total
+
+    @staticmethod
+    def _cache_key(queryset, generation: int) -> str:
+        sql, params = queryset.order_by().query.sql_with_params()
+        digest = hashlib.sha256(
+            f"{queryset.db}:{sql}:{params!r}".encode()
+        ).hexdigest()
+        return (
+            f"karting:count:{queryset.model._meta.label_lower}:"
+            f"{generation}:{digest}"
+        )
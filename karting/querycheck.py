@@ -0,0 +1,158 @@
+"""Detection of queries repeated with the same shape within one request.
+
+Django sends parameters apart from the SQL, so the SQL of a query is its
+shape: the N+1 pattern of a loop reading a relation that was not
+``select_related()`` runs one shape once per row. While a check is active
+every query's SQL is counted, and the first time a shape runs more than
+``QUERY_REPEAT_THRESHOLD`` times the stack of that call is kept; nothing
+else is done per query, so the check is cheap enough for staging.
+
+``QUERY_REPEAT_ACTION`` chooses what ``RepeatedQueryMiddleware`` does with
+the offending shapes of a request: ``"log"`` them as warnings, ``"raise"``
+``RepeatedQueryError`` (the test runner's choice), or ``"off"``.
+"""
+import logging
+import traceback
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from karting import metrics
+
+logger = logging.getLogger(__name__)
+
+_STACK_DEPTH = 5
+# frames of the query wrappers and middleware themselves tell nothing
+_INSTRUMENTATION = {__file__, metrics.__file__}
+
+
+class RepeatedQueryError(Exception):
+    pass
+
+
+@dataclass
+class RepeatedQuery:
+    sql: str
+    count: int
+    stack: list[str]
+
+    def __str__(self) -> str:
+        location = "\n".join(self.stack) or "  (no project frame)"
+        return f"{self.count} x {self.sql}\n{location}"
+
+
+@dataclass
+class QueryCheck:
+    threshold: int
+    counts: dict[str, int] = field(default_factory=dict)
+    stacks: dict[str, list[str]] = field(default_factory=dict)
+
+    def count(self, sql: str) -> None:
+        count = self.counts.get(sql, 0) + 1
+        self.counts[sql] = count
+        if count == self.threshold + 1:
+            self.stacks[sql] = _project_stack()
+
+    def repeated(self) -> list[RepeatedQuery]:
+        return [
+            RepeatedQuery(sql, self.counts[sql], stack)
+            for sql, stack in self.stacks.items()
+        ]
+
+
+def _project_stack() -> list[str]:
+    """The innermost frames of the project's own code."""
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and "-packages" not in frame.filename
+        and frame.filename not in _INSTRUMENTATION
+    ]
+    return [
+        f"  {frame.filename}:{frame.lineno} in {frame.name}"
+        for frame in frames[-_STACK_DEPTH:]
+    ]
+
+
+_current_check: ContextVar[QueryCheck | None] = ContextVar(
+    "karting_query_check", default=None
+)
+
+
+def count_query(execute, sql, params, many, context):
+    """Execute wrapper counting every query of the active check."""
+    check = _current_check.get()
+    if check is not None:
+        check.count(sql)
+    return execute(sql, params, many, context)
+
+
+def instrument_connection(connection) -> None:
+    """Install ``count_query`` on a newly opened connection."""
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+@contextmanager
+def check_queries(threshold: int | None = None):
+    """Count the queries run inside the block, async ones included.
+
+    Yields the ``QueryCheck``, whose ``repeated()`` lists the shapes run
+    more than ``threshold`` times (``QUERY_REPEAT_THRESHOLD`` by default).
+    """
+    check = QueryCheck(
+        settings.QUERY_REPEAT_THRESHOLD if threshold is None else threshold
+    )
+    token = _current_check.set(check)
+    try:
+        yield check
+    finally:
+        _current_check.reset(token)
+
+
+def report(request, repeated: list[RepeatedQuery]) -> None:
+    """Log or raise, as ``QUERY_REPEAT_ACTION`` says, for ``repeated``."""
+    if not repeated:
+        return
+    where = f"{request.method} {request.path}"
+    if settings.QUERY_REPEAT_ACTION == "raise":
+        raise RepeatedQueryError(
+            f"Repeated queries in {where}:\n"
+            + "\n".join(map(str, repeated))
+        )
+    for query in repeated:
+        logger.warning("Repeated query in %s: %s", where, query)
+
+
+class RepeatedQueryMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if settings.QUERY_REPEAT_ACTION == "off":
+            return self.get_response(request)
+        with check_queries() as check:
+            response = self.get_response(request)
+        report(request, check.repeated())
+        return response
+
+    async def __acall__(self, request):
+        if settings.QUERY_REPEAT_ACTION == "off":
+            return await self.get_response(request)
+        with check_queries() as check:
+            response = await self.get_response(request)
+        report(request, check.repeated())
+        return response
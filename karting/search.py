@@ -0,0 +1,195 @@
+"""Full-text search over race and kart names and their category names.
+
+Every searchable model has a ``<db_table>_search`` table that holds one
+document per row, keyed by the row's primary key:
+
+* SQLite: an FTS5 virtual table (``name``, ``category``) ranked by bm25
+  with name matches weighted ten times higher;
+* PostgreSQL: a ``tsvector`` column with a GIN index ranked by ts_rank,
+  with the name weighted ``A`` and the category ``B``.
+
+The tables are created by migration ``0010_search_index`` and kept in
+sync by the signal handlers in ``karting.signals``. Other databases fall
+back to ``icontains`` lookups.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+from karting.models import Kart, Race
+
+SEARCH_MODELS = (Race, Kart)
+
+SQLITE = "sqlite"
+POSTGRESQL = "postgresql"
+
+_WORD = re.compile(r"\w+")
+
+_PG_DOCUMENT = (
+    "setweight(to_tsvector('simple', {name}), 'A') || "
+    "setweight(to_tsvector('simple', {category}), 'B')"
+)
+
+
+def search_table(model) -> str:
+    return f"{model._meta.db_table}_search"
+
+
+def is_supported(vendor: str) -> bool:
+    return vendor in (SQLITE, POSTGRESQL)
+
+
+def _terms(query: str) -> list[str]:
+    return [word.lower() for word in _WORD.findall(query)]
+
+
+def _fts5_query(terms: list[str]) -> str:
+    """Match the words as a phrase in one column, the last one as a prefix.
+
+    ``Race 1`` thus finds "Race 1" and "Race 12" but not "Race 2" of
+    "Category 1".
+    """
+    return '"{}"*'.format(" ".join(terms))
+
+
+def _tsquery(terms: list[str]) -> str:
+    return " <-> ".join(terms) + ":*"
+
+
+def search(queryset, query: str):
+    """Filter ``queryset`` down to rows matching ``query``, best first.
+
+    The result is ordered by relevance, then by primary key. Without a
+    full-text index the usual ``icontains`` filter is applied and the
+    ordering of ``queryset`` is kept.
+    """
+    model = queryset.model
+    terms = _terms(query)
+    vendor = connections[queryset.db].vendor
+    if not terms or not is_supported(vendor):
+        return queryset.filter(
+            Q(name__icontains=query) | Q(category__name__icontains=query)
+        )
+
+    quote = connections[queryset.db].ops.quote_name
+    table = quote(search_table(model))
+    pk = "{}.{}".format(
+        quote(model._meta.db_table),
+        quote(model._meta.pk.column)
+    )
+    if vendor == SQLITE:
+        return queryset.extra(
+            select={"search_rank": f"bm25({table}, 10.0, 1.0)"},
+            tables=[search_table(model)],
+            where=[f"{table} MATCH %s", f"{table}.rowid = {pk}"],
+            params=[_fts5_query(terms)],
+            order_by=["search_rank", "pk"],
+        )
+    tsquery = "to_tsquery('simple', %s)"
+    return queryset.extra(
+        select={"search_rank": f"ts_rank({table}.document, {tsquery})"},
+        select_params=[_tsquery(terms)],
+        tables=[search_table(model)],
+        where=[
+            f"{table}.document @@ {tsquery}",
+            f"{table}.object_id = {pk}",
+        ],
+        params=[_tsquery(terms)],
+        order_by=["-search_rank", "pk"],
+    )
+
+
+def _reindex(model, condition: str = "", params=(), using="default"):
+    """Rebuild the documents of ``model`` rows matching ``condition``.
+
+    ``condition`` is an SQL fragment over the model table, for example
+    ``"karting_race.id = %s"``; an empty one reindexes every row.
+    """
+    connection = connections[using]
+    if not is_supported(connection.vendor):
+        return
+    quote = connection.ops.quote_name
+    table = quote(search_table(model))
+    source = quote(model._meta.db_table)
+    category = quote(
+        model._meta.get_field("category").related_model._meta.db_table
+    )
+    name, category_name = f"{source}.name", f"{category}.name"
+    if connection.vendor == SQLITE:
+        sql = (
+            f"INSERT OR REPLACE INTO {table} (rowid, name, category) "
+            f"SELECT {source}.id, {name}, {category_name}"
+        )
+    else:
+        document = _PG_DOCUMENT.format(name=name, category=category_name)
+        sql = (
+            f"INSERT INTO {table} (object_id, document) "
+            f"SELECT {source}.id, {document}"
+        )
+    sql += (
+        f" FROM {source} INNER JOIN {category}"
+        f" ON {source}.category_id = {category}.id"
+    )
+    if condition:
+        sql += f" WHERE {condition}"
+    if connection.vendor == POSTGRESQL:
+        sql += (
+            " ON CONFLICT (object_id)"
+            " DO UPDATE SET document = EXCLUDED.document"
+        )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def index_object(instance, using="default") -> None:
+    """Add or refresh the document of a race or kart."""
+    model = type(instance)
+    _reindex(
+        model,
+        f"{model._meta.db_table}.id = %s",
+        [instance.pk],
+        using
+    )
+
+
+def index_category(category, using="default") -> None:
+    """Refresh the documents of every race and kart in ``category``."""
+    for model in SEARCH_MODELS:
+        _reindex(
+            model,
+            f"{model._meta.db_table}.category_id = %s",
+            [category.pk],
+            using
+        )
+
+
+def unindex_object(instance, using="default") -> None:
+    """Drop the document of a deleted race or kart."""
+    connection = connections[using]
+    if not is_supported(connection.vendor):
+        return
+    table = connection.ops.quote_name(search_table(type(instance)))
+    column = "rowid" if connection.vendor == SQLITE else "object_id"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE {column} = %s",
+            [instance.pk]
+        )
+
+
+def rebuild_index(using="default") -> None:
+    """Reindex every race and kart, e.g. after ``bulk_create``."""
+    connection = connections[using]
+    if not is_supported(connection.vendor):
+        return
+    with connection.cursor() as cursor:
+        for model in SEARCH_MODELS:
+            cursor.execute(
+                "DELETE FROM {}".format(
+                    connection.ops.quote_name(search_table(model))
+                )
+            )
+    for model in SEARCH_MODELS:
+        _reindex(model, using=using)
@@ -0,0 +1,444 @@
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import (
+    BooleanField,
+    Exists,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q
+)
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from karting.managers import count_subquery, shift_counters
+from karting.models import (
+    Kart,
+    KartHold,
+    Race,
+    RaceParticipation,
+    RegistrationTicket
+)
+from karting.live import publish_on_commit
+from karting.pagination import invalidate_counts
+
+
+CLEANUP_BATCH_SIZE = 1000
+
+QUEUE_BATCH_SIZE = 200
+
+
+class RegistrationError(Exception):
+    message = "Registration failed."
+
+    def __str__(self) -> str:
+        return self.message
+
+
+class RaceFullError(RegistrationError):
+    message = "This race is full."
+
+
+class AlreadyRegisteredError(RegistrationError):
+    message = "You are already registered for this race."
+
+
+class KartUnavailableError(RegistrationError):
+    message = "The selected kart is no longer available."
+
+
+def register_for_race(user, race: Race, kart: Kart) -> RaceParticipation:
+    """Reserve a seat in ``race`` and one unit of ``kart`` for ``user``.
+
+    Everything happens in one transaction with a fixed number of queries.
+    The seat is taken with a conditional UPDATE on ``participant_count``,
+    which also row-locks the race so concurrent sign-ups for the same race
+    queue up behind each other, and the kart is taken the same way so
+    ``available_quantity`` can never drop below zero. Seats and karts
+    promised to other drivers by live holds are left alone, and the
+    driver's own hold is consumed.
+    """
+    with transaction.atomic():
+        take_seat(user, race)
+        if RaceParticipation.objects.filter(
+            race_id=race.pk,
+            user_id=user.pk,
+        ).exists():
+            raise AlreadyRegisteredError
+        take_kart(user, race, kart)
+
+        KartHold.objects.filter(user_id=user.pk, race_id=race.pk).delete()
+        publish_on_commit(seats={race.pk: 1}, karts={kart.pk: -1})
+        return RaceParticipation.objects.create(
+            user=user,
+            race=race,
+            kart=kart,
+        )
+
+
+def take_seat(user, race: Race) -> None:
+    """Count ``user`` in ``race`` unless its free seats are all taken.
+
+    Seats promised to other drivers by live holds are not free. Raises
+    ``RaceFullError``; the conditional UPDATE row-locks the race until
+    the transaction ends.
+    """
+    other_holds = KartHold.objects.live().exclude(user_id=user.pk)
+    seated = Race.objects.filter(
+        pk=race.pk,
+        participant_count__lt=F("max_participants") - count_subquery(
+            other_holds.filter(race_id=race.pk), "race"
+        ),
+    ).update(participant_count=F("participant_count") + 1)
+    if not seated:
+        raise RaceFullError
+
+
+def take_kart(user, race: Race, kart: Kart) -> None:
+    """Take a unit of ``kart`` for ``user`` in ``race``.
+
+    The kart must belong to the race category and have a unit that no
+    other driver's live hold promises. Raises ``KartUnavailableError``.
+    """
+    other_holds = KartHold.objects.live().exclude(user_id=user.pk)
+    reserved = Kart.objects.filter(
+        pk=kart.pk,
+        category_id=race.category_id,
+        available_quantity__gt=count_subquery(
+            other_holds.filter(kart_id=kart.pk), "kart"
+        ),
+    ).update(available_quantity=F("available_quantity") - 1)
+    if not reserved:
+        raise KartUnavailableError
+
+
+def hold_kart(user, race: Race) -> KartHold | None:
+    """Promise ``user`` a seat and the freest kart for a few minutes.
+
+    Called when the registration form is shown so the kart preselected in
+    the form is still there when the form is posted. Returns ``None`` when
+    every seat or kart is already taken or held by someone else.
+    The race row stays locked until the hold is stored, so forms opened
+    at the same moment cannot all be promised the last seats.
+    """
+    with transaction.atomic():
+        participant_count = Race.objects.select_for_update().values_list(
+            "participant_count", flat=True
+        ).get(pk=race.pk)
+        held_seats = race.holds.live().exclude(user_id=user.pk).count()
+        if participant_count + held_seats >= race.max_participants:
+            return None
+
+        kart = (
+            Kart.objects.available(user)
+            .filter(category_id=race.category_id)
+            .order_by("-free_quantity", "pk")
+            .first()
+        )
+        if kart is None:
+            return None
+
+        hold, _ = KartHold.objects.update_or_create(
+            user=user,
+            race=race,
+            defaults={
+                "kart": kart,
+                "expires_at": timezone.now() + timedelta(
+                    seconds=settings.KART_HOLD_SECONDS
+                ),
+            },
+        )
+        return hold
+
+
+def release_expired_holds() -> int:
+    deleted, _ = KartHold.objects.expired().delete()
+    return deleted
+
+
+def unregister_from_race(user, race_id: int) -> None:
+    """Drop the registration of ``user`` and hand the kart back.
+
+    Raises ``RaceParticipation.DoesNotExist`` when there is nothing to drop.
+    """
+    with transaction.atomic():
+        participation = RaceParticipation.objects.select_for_update().get(
+            race_id=race_id,
+            user=user,
+        )
+        Race.objects.filter(pk=race_id).update(
+            participant_count=Greatest(F("participant_count") - 1, 0)
+        )
+        Kart.objects.filter(pk=participation.kart_id).update(
+            available_quantity=F("available_quantity") + 1
+        )
+        participation.delete()
+        publish_on_commit(
+            seats={race_id: -1},
+            karts={participation.kart_id: 1}
+        )
+    invalidate_counts(RaceParticipation)
+
+
+@dataclass
+class CleanupReport:
+    deleted: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Deleted registrations per second."""
+        return self.deleted / self.elapsed if self.elapsed else 0.0
+
+
+def clear_past_registrations(
+        batch_size: int = CLEANUP_BATCH_SIZE
+) -> CleanupReport:
+    """Delete every registration for races that already took place.
+
+    Work is split into batches of ``batch_size`` rows, each in its own
+    transaction, so a long history never holds locks for the whole run.
+    Every batch restores karts and seats with one grouped UPDATE for all
+    affected karts and one for all races (see ``shift_counters``).
+    """
+    past = RaceParticipation.objects.filter(
+        race__date__lt=timezone.now().date()
+    )
+    report = CleanupReport()
+    started = time.perf_counter()
+
+    while True:
+        with transaction.atomic():
+            batch = list(
+                past.order_by("pk").values_list("pk", flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            report.deleted += RaceParticipation.objects.filter(
+                pk__in=batch
+            ).release()
+        report.batches += 1
+
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+def process_registration_queue(
+        race_id: int,
+        batch_size: int = QUEUE_BATCH_SIZE
+) -> int:
+    """Confirm or reject pending tickets of a queued race in FIFO order.
+
+    Tickets are drained ``batch_size`` at a time. Each batch is applied in
+    one transaction with a fixed number of queries no matter how many
+    tickets it holds, so a sign-up rush turns into a handful of
+    sequential bulk writes instead of hundreds of writers fighting over
+    the same race row. Each batch locks the race before picking its
+    tickets, so workers draining the same race take turns and a later
+    ticket never gets a seat before an earlier one. Returns the number
+    of tickets processed.
+    """
+    processed = 0
+    while True:
+        with transaction.atomic():
+            race = Race.objects.select_for_update().get(pk=race_id)
+            tickets = list(
+                RegistrationTicket.objects.filter(
+                    race_id=race_id,
+                    status=RegistrationTicket.Status.PENDING
+                )
+                .order_by("id")[:batch_size]
+            )
+            if not tickets:
+                return processed
+            _apply_tickets(race, tickets)
+        processed += len(tickets)
+
+
+def _apply_tickets(race: Race, tickets: list) -> None:
+    """Confirm what fits of a batch of tickets, and reject the rest.
+
+    Seats and karts promised to other drivers by live holds are left
+    alone, as they are for direct registrations. The caller holds the
+    race row lock.
+    """
+    race_id = race.pk
+    user_ids = {ticket.user_id for ticket in tickets}
+    held_seats = race.holds.live().exclude(user_id__in=user_ids).count()
+    free_seats = race.max_participants - race.participant_count - held_seats
+    registered = set(
+        RaceParticipation.objects.filter(
+            race_id=race_id,
+            user_id__in=user_ids
+        ).values_list("user_id", flat=True)
+    )
+    karts = dict(
+        Kart.objects.select_for_update()
+        .with_free_quantity(user_ids=user_ids)
+        .filter(
+            pk__in={ticket.kart_id for ticket in tickets},
+            category_id=race.category_id
+        ).values_list("pk", "free_quantity")
+    )
+
+    now = timezone.now()
+    taken = {}
+    participations = []
+    for ticket in tickets:
+        if ticket.user_id in registered:
+            ticket.reject(AlreadyRegisteredError.message)
+        elif len(participations) >= free_seats:
+            ticket.reject(RaceFullError.message)
+        elif karts.get(ticket.kart_id, 0) <= taken.get(ticket.kart_id, 0):
+            ticket.reject(KartUnavailableError.message)
+        else:
+            ticket.status = RegistrationTicket.Status.CONFIRMED
+            registered.add(ticket.user_id)
+            taken[ticket.kart_id] = taken.get(ticket.kart_id, 0) + 1
+            participations.append(
+                RaceParticipation(
+                    user_id=ticket.user_id,
+                    race_id=race_id,
+                    kart_id=ticket.kart_id
+                )
+            )
+        ticket.processed_at = now
+
+    _book(race_id, participations)
+    RegistrationTicket.objects.bulk_update(
+        tickets,
+        ["status", "reason", "processed_at"]
+    )
+
+
+def _book(race_id: int, participations: list) -> None:
+    """Insert confirmed participations and take their seats and karts.
+
+    The drivers' holds on the race are dropped, as their seats and karts
+    are now taken for good. Callers must hold the race row lock and have
+    checked availability.
+    """
+    if not participations:
+        return
+    RaceParticipation.objects.bulk_create(participations)
+    KartHold.objects.filter(
+        race_id=race_id,
+        user_id__in=[participation.user_id for participation in participations]
+    ).delete()
+    invalidate_counts(RaceParticipation)
+    Race.objects.filter(pk=race_id).update(
+        participant_count=F("participant_count") + len(participations)
+    )
+    taken = Counter(participation.kart_id for participation in participations)
+    kart_deltas = {kart_id: -count for kart_id, count in taken.items()}
+    shift_counters(Kart, "available_quantity", kart_deltas)
+    publish_on_commit(
+        seats={race_id: len(participations)},
+        karts=kart_deltas
+    )
+
+
+@dataclass
+class GroupEntry:
+    username: str
+    kart_name: str = ""
+    kart: Kart | None = None
+    error: str = ""
+
+
+def register_group(race: Race, entries: list[GroupEntry]) -> list[GroupEntry]:
+    """Register a whole team for ``race`` at once.
+
+    Drivers are looked up and checked for eligibility and duplicates in
+    one query, karts are allocated in one pass over the free karts of the
+    race category (a driver's preferred kart first, otherwise the freest
+    one), and everything is written with ``bulk_create`` plus one grouped
+    UPDATE for the karts. Every entry comes back with either its ``kart``
+    or an ``error``.
+    """
+    usernames = {entry.username for entry in entries}
+    with transaction.atomic():
+        race = Race.objects.select_for_update().select_related(
+            "category"
+        ).get(pk=race.pk)
+        oldest, youngest = race.category.birth_date_range()
+        drivers = {
+            driver.username: driver
+            for driver in get_user_model().objects.filter(
+                username__in=usernames
+            ).annotate(
+                is_registered=Exists(
+                    RaceParticipation.objects.filter(
+                        race_id=race.pk,
+                        user=OuterRef("pk")
+                    )
+                ),
+                is_eligible=ExpressionWrapper(
+                    Q(date_of_birth__gt=oldest, date_of_birth__lte=youngest),
+                    output_field=BooleanField()
+                ),
+            )
+        }
+        held_seats = race.holds.live().exclude(
+            user__username__in=usernames
+        ).count()
+        karts = list(
+            Kart.objects.select_for_update()
+            .available()
+            .filter(category_id=race.category_id)
+            .order_by("-free_quantity", "pk")
+        )
+
+        free_seats = (
+            race.max_participants - race.participant_count - held_seats
+        )
+        free_karts = {kart.pk: kart.free_quantity for kart in karts}
+        karts_by_name = {kart.name.lower(): kart for kart in karts}
+        seen = set()
+        participations = []
+        for entry in entries:
+            driver = drivers.get(entry.username)
+            if entry.username in seen:
+                entry.error = "Listed more than once."
+            elif driver is None:
+                entry.error = "Unknown driver."
+            elif not driver.is_eligible:
+                entry.error = "Not eligible for this race category."
+            elif driver.is_registered:
+                entry.error = AlreadyRegisteredError.message
+            elif len(participations) >= free_seats:
+                entry.error = RaceFullError.message
+            else:
+                entry.kart = _pick_kart(
+                    karts_by_name.get(entry.kart_name.lower()),
+                    karts,
+                    free_karts
+                )
+                if entry.kart is None:
+                    entry.error = KartUnavailableError.message
+                else:
+                    free_karts[entry.kart.pk] -= 1
+                    participations.append(
+                        RaceParticipation(
+                            user=driver,
+                            race=race,
+                            kart=entry.kart
+                        )
+                    )
+            seen.add(entry.username)
+
+        _book(race.pk, participations)
+    return entries
+
+
+def _pick_kart(preferred, karts, free_karts):
+    if preferred is not None and free_karts[preferred.pk] > 0:
+        return preferred
+    return next((kart for kart in karts if free_karts[kart.pk] > 0), None)
@@ -0,0 +1,86 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from karting import metrics, querycheck, search
+from karting.cache import invalidate_home_data
+from karting.models import (
+    CustomUser,
+    Kart,
+    Race,
+    RaceCategory,
+    RaceParticipation
+)
+from karting.pagination import invalidate_counts
+from karting.versions import (
+    bump_edit_generation,
+    bump_version,
+    record_deletion
+)
+
+
+@receiver([post_save, post_delete], sender=Race)
+@receiver([post_save, post_delete], sender=Kart)
+@receiver([post_save, post_delete], sender=RaceCategory)
+def invalidate_home_cache(sender, **kwargs):
+    invalidate_home_data()
+
+
+@receiver([post_save, post_delete], sender=Race)
+@receiver([post_save, post_delete], sender=Kart)
+@receiver([post_save, post_delete], sender=RaceCategory)
+def record_change(sender, using, **kwargs):
+    bump_version(sender, using=using)
+    bump_edit_generation(sender, using=using)
+
+
+@receiver(post_delete, sender=Race)
+@receiver(post_delete, sender=Kart)
+@receiver(post_delete, sender=RaceCategory)
+def remember_deletion(sender, using, **kwargs):
+    record_deletion(sender, using=using)
+
+
+@receiver(post_save, sender=Race)
+@receiver(post_save, sender=Kart)
+def index_for_search(sender, instance, using, **kwargs):
+    search.index_object(instance, using)
+
+
+@receiver(post_delete, sender=Race)
+@receiver(post_delete, sender=Kart)
+def unindex_for_search(sender, instance, using, **kwargs):
+    search.unindex_object(instance, using)
+
+
+@receiver(post_save, sender=RaceCategory)
+def reindex_category_for_search(sender, instance, created, using, **kwargs):
+    if not created:
+        search.index_category(instance, using)
+
+
+# RaceParticipation gets no post_delete handler: it would turn the bulk
+# DELETE of RaceParticipationQuerySet.release() into a row-by-row one, so
+# release() and the services invalidate its counts themselves.
+@receiver([post_save, post_delete], sender=Race)
+@receiver([post_save, post_delete], sender=Kart)
+@receiver(post_save, sender=RaceParticipation)
+def invalidate_cached_counts(sender, **kwargs):
+    invalidate_counts(sender)
+
+
+@receiver(pre_delete, sender=CustomUser)
+@receiver(pre_delete, sender=Kart)
+@receiver(pre_delete, sender=Race)
+def release_participations(sender, instance, using, **kwargs):
+    """Hand back the seats and karts of registrations deleted in cascade."""
+    field = {CustomUser: "user", Kart: "kart", Race: "race"}[sender]
+    RaceParticipation.objects.using(using).filter(
+        **{field: instance}
+    ).release()
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    metrics.instrument_connection(connection)
+    querycheck.instrument_connection(connection)
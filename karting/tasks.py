@@ -0,0 +1,26 @@
+from celery import shared_task
+
+from karting import services
+
+
+@shared_task
+def clear_past_registrations(
+        batch_size: int = services.CLEANUP_BATCH_SIZE
+) -> dict:
+    report = services.clear_past_registrations(batch_size)
+    return {
+        "deleted": report.deleted,
+        "batches": report.batches,
+        "elapsed": report.elapsed,
+        "rate": report.rate,
+    }
+
+
+@shared_task
+def process_registration_queue(race_id: int) -> int:
+    return services.process_registration_queue(race_id)
+
+
+@shared_task
+def release_expired_holds() -> int:
+    return services.release_expired_holds()
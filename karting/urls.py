@@ -1,10 +1,14 @@
 from django.conf import settings
 from django.conf.urls.static import static
-from django.urls import path
+from django.urls import URLPattern, path
 
+from karting import async_views
+from karting.cache import anonymous_page_cache
+from karting.models import Kart, Race, RaceCategory
 from karting.views import (
     index,
     RaceListView,
+    EligibleRaceListView,
     KartListView,
     KartDetailView,
     RaceDetailView,
@@ -17,18 +21,34 @@ from karting.views import (
     RegisterForRaceView,
     unregister_from_race_view,
     ClearRegistrationsView,
-
+    RegistrationTicketView,
+    GroupRegistrationView,
+    race_live_view,
+    race_calendar_view,
+    user_calendar_view,
+    metrics_view,
 )
 
 app_name = "karting"
 
+race_page_cache = anonymous_page_cache(Race, RaceCategory)
+kart_page_cache = anonymous_page_cache(Kart, RaceCategory)
+
 urlpatterns = [
     # main page
     path("", index, name="index"),
     # karts
-    path("karts/", KartListView.as_view(), name="karts-list"),
+    path(
+        "karts/",
+        kart_page_cache(KartListView.as_view()),
+        name="karts-list"
+    ),
     path("karts/create/", KartCreateView.as_view(), name="kart-create"),
-    path("karts/<int:pk>/", KartDetailView.as_view(), name="kart-detail"),
+    path(
+        "karts/<int:pk>/",
+        kart_page_cache(KartDetailView.as_view()),
+        name="kart-detail"
+    ),
     path(
         "karts/<int:pk>/update/",
         KartUpdateView.as_view(),
@@ -40,9 +60,34 @@ urlpatterns = [
         name="kart-delete"
     ),
     # races
-    path("race/", RaceListView.as_view(), name="race-list"),
+    path(
+        "race/",
+        race_page_cache(RaceListView.as_view()),
+        name="race-list"
+    ),
+    path(
+        "race/eligible/",
+        EligibleRaceListView.as_view(),
+        name="eligible-races"
+    ),
     path("race/create/", RaceCreateView.as_view(), name="race-create"),
-    path("race/<int:pk>/", RaceDetailView.as_view(), name="race-detail"),
+    path(
+        "race/<int:pk>/",
+        race_page_cache(RaceDetailView.as_view()),
+        name="race-detail"
+    ),
+    path("race/<int:pk>/live/", race_live_view, name="race-live"),
+    path("race/calendar.ics", race_calendar_view, name="race-calendar"),
+    path(
+        "race/category/<int:category_id>/calendar.ics",
+        race_calendar_view,
+        name="category-calendar"
+    ),
+    path(
+        "race/my/<str:token>/calendar.ics",
+        user_calendar_view,
+        name="user-calendar"
+    ),
     path(
         "race/<int:pk>/update/",
         RaceUpdateView.as_view(),
@@ -58,6 +103,16 @@ urlpatterns = [
         RegisterForRaceView.as_view(),
         name="register-for-race"
     ),
+    path(
+        "race/<int:race_id>/register-group/",
+        GroupRegistrationView.as_view(),
+        name="register-group-for-race"
+    ),
+    path(
+        "race/<int:race_id>/tickets/<int:pk>/",
+        RegistrationTicketView.as_view(),
+        name="registration-ticket"
+    ),
     path(
         "race/<int:race_id>/unregister/",
         unregister_from_race_view,
@@ -69,4 +124,38 @@ urlpatterns = [
         ClearRegistrationsView.as_view(),
         name="clear-registrations"
     ),
+    # monitoring
+    path("metrics", metrics_view, name="metrics"),
 ] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+
+# Under ASGI the busiest pages are served by async views, which query
+# with the async ORM instead of holding a worker thread
+ASYNC_VIEWS = {
+    "index": async_views.index,
+    "karts-list": kart_page_cache(async_views.AsyncKartListView.as_view()),
+    "kart-detail": kart_page_cache(
+        async_views.AsyncKartDetailView.as_view()
+    ),
+    "race-list": race_page_cache(async_views.AsyncRaceListView.as_view()),
+    "race-detail": race_page_cache(
+        async_views.AsyncRaceDetailView.as_view()
+    ),
+}
+
+
+def with_async_views(patterns: list) -> list:
+    return [
+        URLPattern(
+            pattern.pattern,
+            ASYNC_VIEWS[pattern.name],
+            pattern.default_args,
+            pattern.name
+        )
+        if getattr(pattern, "name", None) in ASYNC_VIEWS
+        else pattern
+        for pattern in patterns
+    ]
+
+
+if settings.ASYNC_VIEWS:
+    urlpatterns = with_async_views(urlpatterns)
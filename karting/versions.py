@@ -0,0 +1,140 @@
+"""Change versions of races, karts and categories.
+
+A version is the ``time.time_ns()`` of the last committed change to any
+row of a model. It is kept in the cache so conditional API requests can
+be answered without reading the model table; after an eviction, or every
+``VERSION_CACHE_TIMEOUT`` seconds, it is rebuilt once from
+``MAX(updated_at)`` and the date of the last deletion, kept in the
+database by ``record_deletion``, so processes that do not share a cache
+catch up with each other's changes and a deletion never takes the
+version back.
+
+A generation changes together with the version but never reads the
+database: after an eviction a fresh one is issued, which is enough for
+server-side cache keys that only need to tell stale entries apart. An
+edit generation works the same way but only follows rows saved or
+deleted one by one, not the bulk updates of seat and kart counters that
+every registration makes, for caches of names and dates.
+"""
+import datetime
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+
+def _version_key(model) -> str:
+    return f"karting:version:{model._meta.label_lower}"
+
+
+def _generation_key(model) -> str:
+    return f"karting:generation:{model._meta.label_lower}"
+
+
+def _edit_generation_key(model) -> str:
+    return f"karting:edit-generation:{model._meta.label_lower}"
+
+
+def _store(model) -> None:
+    now = time.time_ns()
+    cache.set_many(
+        {_version_key(model): now, _generation_key(model): now},
+        settings.VERSION_CACHE_TIMEOUT
+    )
+
+
+def bump_version(model, using=None) -> None:
+    """Record a change of ``model`` once the current transaction commits."""
+    transaction.on_commit(partial(_store, model), using=using)
+
+
+def _store_edit(model) -> None:
+    cache.set(
+        _edit_generation_key(model),
+        time.time_ns(),
+        settings.VERSION_CACHE_TIMEOUT
+    )
+
+
+def bump_edit_generation(model, using=None) -> None:
+    """Record an edit of a ``model`` row once the transaction commits."""
+    transaction.on_commit(partial(_store_edit, model), using=using)
+
+
+def record_deletion(model, using=None) -> None:
+    """Store the date of a deletion of ``model`` rows with the deletion."""
+    from karting.models import LastDeletion
+
+    label, now = model._meta.label_lower, timezone.now()
+    deletions = LastDeletion.objects.using(using)
+    if not deletions.filter(model=label).update(deleted_at=now):
+        deletions.create(model=label, deleted_at=now)
+
+
+def get_version(model) -> int:
+    from karting.models import LastDeletion
+
+    version = cache.get(_version_key(model))
+    if version is None:
+        latest = model.objects.aggregate(latest=Max("updated_at"))["latest"]
+        deleted = LastDeletion.objects.filter(
+            model=model._meta.label_lower
+        ).values_list("deleted_at", flat=True).first()
+        latest = max(filter(None, (latest, deleted)), default=None)
+        version = int(latest.timestamp() * 1_000_000_000) if latest else 0
+        cache.add(
+            _version_key(model), version, settings.VERSION_CACHE_TIMEOUT
+        )
+    return version
+
+
+def get_generation(model) -> int:
+    return cache.get_or_set(
+        _generation_key(model), time.time_ns, settings.VERSION_CACHE_TIMEOUT
+    )
+
+
+def _get_many(keys) -> tuple[int, ...]:
+    found = cache.get_many(keys)
+    return tuple(
+        found[key] if key in found else cache.get_or_set(
+            key, time.time_ns, settings.VERSION_CACHE_TIMEOUT
+        )
+        for key in keys
+    )
+
+
+def get_generations(*models) -> tuple[int, ...]:
+    """Return the generations of ``models`` in one cache round trip."""
+    return _get_many([_generation_key(model) for model in models])
+
+
+def get_edit_generations(*models) -> tuple[int, ...]:
+    """Return the edit generations of ``models`` in one cache round trip."""
+    return _get_many([_edit_generation_key(model) for model in models])
+
+
+async def aget_generation(model) -> int:
+    return await cache.aget_or_set(
+        _generation_key(model), time.time_ns, settings.VERSION_CACHE_TIMEOUT
+    )
+
+
+async def aget_generations(*models) -> tuple[int, ...]:
+    keys = [_generation_key(model) for model in models]
+    found = await cache.aget_many(keys)
+    return tuple([
+        found[key] if key in found else await aget_generation(model)
+        for key, model in zip(keys, models)
+    ])
+
+
+def version_datetime(version: int) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(
+        version / 1_000_000_000,
+        tz=datetime.timezone.utc
+    )
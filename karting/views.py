@@ -1,44 +1,85 @@
+import json
+from functools import partial
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Q
-from django.http import HttpRequest, HttpResponse
+from django.core import signing
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    StreamingHttpResponse
+)
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse_lazy
-from django.utils import timezone
 from django.views import generic
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import condition, require_safe
 
+from karting import ical, metrics
+from karting.cache import get_home_data
 from karting.forms import (
+    GroupRegistrationForm,
     RaceRegistrationForm,
     RaceSearchForm,
     KartSearchForm,
     RaceForm
 )
-from karting.models import Race, Kart, RaceParticipation
+from karting.models import (
+    Race,
+    RaceCategory,
+    Kart,
+    RaceParticipation,
+    RegistrationTicket
+)
+from karting.live import hub
+from karting.pagination import CountingPaginator, CursorPaginationMixin
+from karting.search import search
+from karting.services import (
+    GroupEntry,
+    KartUnavailableError,
+    RegistrationError,
+    clear_past_registrations,
+    hold_kart,
+    register_for_race,
+    register_group,
+    unregister_from_race
+)
+from karting.tasks import process_registration_queue
+from karting.visits import get_visit_counts, record_visit
 
 
 def index(request: HttpRequest) -> HttpResponse:
     """View function for the home page of the site."""
-    if request.user.is_staff:
-        upcoming_races = Race.objects.order_by("date")[:3]
-    else:
-        upcoming_races = Race.objects.upcoming().order_by("date")[:3]
-    popular_karts = Kart.objects.order_by("-speed")[:3]
-    num_visits = request.session.get("num_visits", 0)
-    request.session["num_visits"] = num_visits + 1
+    record_visit(request.user)
+    total_visits, num_visits = get_visit_counts(request.user)
 
     context = {
-        "upcoming_races": upcoming_races,
-        "popular_karts": popular_karts,
-        "num_visits": num_visits + 1,
+        **get_home_data(request.user.is_staff),
+        "num_visits": num_visits,
+        "total_visits": total_visits,
     }
 
     return render(request, "karting/index.html", context=context)
 
 
-class RaceListView(generic.ListView):
+class RaceListView(CursorPaginationMixin, generic.ListView):
     model = Race
     template_name = "karting/race_list.html"
     paginate_by = 2
+    paginator_class = CountingPaginator
+    cursor_ordering = ("date", "id")
+
+    def use_cursor_pagination(self):
+        # search results are ordered by relevance, not by date
+        return (
+            super().use_cursor_pagination()
+            and not self.request.GET.get("search")
+        )
 
     def get_queryset(self):
         if self.request.user.is_staff:
@@ -49,19 +90,35 @@ class RaceListView(generic.ListView):
         search_query = self.request.GET.get("search")
 
         if search_query:
-            queryset = queryset.filter(
-                Q(name__icontains=search_query)
-                | Q(category__name__icontains=search_query)
-            )
+            queryset = search(queryset, search_query)
 
         return queryset
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(**kwargs)
         context["search_form"] = RaceSearchForm(self.request.GET)
+        if self.request.user.is_authenticated:
+            context["calendar_token"] = ical.feed_token(self.request.user)
         return context
 
 
+class EligibleRaceListView(
+    LoginRequiredMixin,
+    CursorPaginationMixin,
+    generic.ListView
+):
+    """Upcoming races the driver may enter and still has a seat in."""
+    template_name = "karting/eligible_race_list.html"
+    context_object_name = "race_list"
+    paginate_by = 6
+    cursor_ordering = ("date", "id")
+
+    def get_queryset(self):
+        return Race.objects.open_to(self.request.user).select_related(
+            "category"
+        )
+
+
 class RaceCreateView(generic.CreateView):
     model = Race
     form_class = RaceForm
@@ -70,7 +127,7 @@ class RaceCreateView(generic.CreateView):
 
 class RaceUpdateView(generic.UpdateView):
     model = Race
-    fields = "__all__"
+    form_class = RaceForm
     success_url = reverse_lazy("karting:race-list")
 
 
@@ -81,38 +138,46 @@ class RaceDeleteView(generic.DeleteView):
 
 class RaceDetailView(generic.DetailView):
     model = Race
-    queryset = Race.objects.select_related("category")
     template_name = "karting/race-detail.html"
 
+    def get_queryset(self):
+        return Race.objects.select_related("category").with_is_registered(
+            self.request.user
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        race = self.get_object()
+        race = self.object
 
         is_eligible = False
         can_register = True
-        is_registered = False
+        is_registered = race.is_registered
 
         if self.request.user.is_authenticated:
             is_eligible = race.is_user_eligible(self.request.user)
-            is_registered = RaceParticipation.objects.filter(
-                race=race,
-                user=self.request.user
-            ).exists()
             can_register = not race.is_full() and not is_registered
 
         context["is_eligible"] = is_eligible
         context["is_registered"] = is_registered
         context["can_register"] = can_register
-        context["participants_count"] = race.participations.count()
+        context["participants_count"] = race.participant_count
         return context
 
 
-class KartListView(generic.ListView):
+class KartListView(CursorPaginationMixin, generic.ListView):
     model = Kart
     template_name = "karting/kart_list.html"
     context_object_name = "karts"
     queryset = Kart.objects.select_related("category")
     paginate_by = 5
+    paginator_class = CountingPaginator
+    cursor_ordering = ("category__name", "id")
+
+    def use_cursor_pagination(self):
+        return (
+            super().use_cursor_pagination()
+            and not self.request.GET.get("search")
+        )
 
     def get_queryset(self):
         queryset = Kart.objects.select_related("category")
@@ -122,10 +187,7 @@ class KartListView(generic.ListView):
             search_term = form.cleaned_data["search"]
 
             if search_term:
-                queryset = queryset.filter(
-                    Q(name__icontains=search_term)
-                    | Q(category__name__icontains=search_term)
-                )
+                return search(queryset, search_term)
         queryset = queryset.order_by("category__name")
         return queryset
 
@@ -165,13 +227,16 @@ class KartDetailView(generic.DetailView):
 class RegisterForRaceView(generic.View):
 
     def get_race(self, race_id):
-        return get_object_or_404(Race, id=race_id)
+        return get_object_or_404(
+            Race.objects.select_related("category"),
+            id=race_id
+        )
 
     def user_already_registered(self, user, race):
         return RaceParticipation.objects.filter(user=user, race=race).exists()
 
     def handle_registration_errors(self, request, race):
-        if race.participations.count() >= race.max_participants:
+        if race.is_full():
             messages.error(request, "This race is full.")
             return True
 
@@ -184,24 +249,45 @@ class RegisterForRaceView(generic.View):
 
         return False
 
-    def render_registration_form(self, request, race, form):
+    def render_registration_form(self, request, race, form, hold=None):
         return render(request, "karting/register_for_race.html", {
             "race": race,
             "username": request.user.username,
             "form": form,
+            "hold": hold,
         })
 
+    def enqueue_registration(self, request, race, kart):
+        ticket = RegistrationTicket.objects.create(
+            user=request.user,
+            race=race,
+            kart=kart
+        )
+        transaction.on_commit(
+            partial(process_registration_queue.delay, race.id)
+        )
+        return redirect(
+            "karting:registration-ticket",
+            race_id=race.id,
+            pk=ticket.id
+        )
+
     def get(self, request, race_id):
         race = self.get_race(race_id)
 
         if self.handle_registration_errors(request, race):
             return redirect("karting:race-detail", pk=race.id)
 
+        hold = None
+        if request.user.is_authenticated and not race.queued_registration:
+            hold = hold_kart(request.user, race)
+
         form = RaceRegistrationForm(
             user=request.user,
-            race_category=race.category
+            race_category=race.category,
+            initial={"kart": hold.kart_id} if hold else None
         )
-        return self.render_registration_form(request, race, form)
+        return self.render_registration_form(request, race, form, hold)
 
     def post(self, request, race_id):
         if not request.user.is_authenticated:
@@ -212,10 +298,6 @@ class RegisterForRaceView(generic.View):
             return redirect("accounts:login")
 
         race = self.get_race(race_id)
-
-        if self.handle_registration_errors(request, race):
-            return redirect("karting:race-detail", pk=race.id)
-
         form = RaceRegistrationForm(
             request.POST,
             user=request.user,
@@ -223,19 +305,85 @@ class RegisterForRaceView(generic.View):
         )
 
         if form.is_valid():
-            race_participation = form.save(commit=False)
-            race_participation.user = request.user
-            race_participation.race = race
-            race_participation.save()
-
-            kart = form.cleaned_data["kart"]
-            kart.available_quantity -= 1
-            kart.save()
+            if race.queued_registration:
+                return self.enqueue_registration(
+                    request,
+                    race,
+                    form.cleaned_data["kart"]
+                )
+            try:
+                register_for_race(
+                    request.user,
+                    race,
+                    form.cleaned_data["kart"]
+                )
+            except KartUnavailableError as error:
+                form.add_error("kart", str(error))
+                return self.render_registration_form(request, race, form)
+            except RegistrationError as error:
+                messages.error(request, str(error))
             return redirect("karting:race-detail", pk=race.id)
 
         return self.render_registration_form(request, race, form)
 
 
+class GroupRegistrationView(
+    LoginRequiredMixin,
+    UserPassesTestMixin,
+    generic.FormView
+):
+    form_class = GroupRegistrationForm
+    template_name = "karting/group_registration.html"
+
+    def test_func(self):
+        user = self.request.user
+        return user.is_staff or user.has_perm("karting.add_raceparticipation")
+
+    def dispatch(self, request, *args, **kwargs):
+        self.race = get_object_or_404(
+            Race.objects.select_related("category"),
+            id=kwargs["race_id"]
+        )
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["race"] = self.race
+        return context
+
+    def form_valid(self, form):
+        results = register_group(
+            self.race,
+            [
+                GroupEntry(username=username, kart_name=kart_name)
+                for username, kart_name in form.cleaned_data["drivers"]
+            ]
+        )
+        self.race.refresh_from_db(fields=["participant_count"])
+        registered = sum(1 for result in results if not result.error)
+        messages.info(
+            self.request,
+            f"{registered} of {len(results)} drivers have been registered."
+        )
+        return self.render_to_response(
+            self.get_context_data(form=form, results=results)
+        )
+
+
+class RegistrationTicketView(LoginRequiredMixin, generic.DetailView):
+    template_name = "karting/registration_ticket.html"
+    context_object_name = "ticket"
+
+    def get_queryset(self):
+        return RegistrationTicket.objects.select_related(
+            "race",
+            "kart"
+        ).filter(
+            user=self.request.user,
+            race_id=self.kwargs["race_id"]
+        )
+
+
 def unregister_from_race_view(request, race_id):
     if not request.user.is_authenticated:
         messages.error(
@@ -244,17 +392,10 @@ def unregister_from_race_view(request, race_id):
         )
         return redirect("accounts:login")
 
-    participation = get_object_or_404(
-        RaceParticipation,
-        race_id=race_id,
-        user=request.user
-    )
-
-    kart = participation.kart
-    kart.available_quantity += 1
-    kart.save()
-
-    participation.delete()
+    try:
+        unregister_from_race(request.user, race_id)
+    except RaceParticipation.DoesNotExist:
+        raise Http404("You are not registered for this race.")
 
     messages.success(
         request,
@@ -268,11 +409,7 @@ class ClearRegistrationsView(LoginRequiredMixin, UserPassesTestMixin, generic.Vi
         return self.request.user.is_staff
 
     def post(self, request):
-        past_races = Race.objects.filter(date__lt=timezone.now().date())
-        total_removed_count = 0
-
-        for race in past_races:
-            total_removed_count += race.clear_past_registrations()
+        total_removed_count = clear_past_registrations().deleted
 
         if total_removed_count > 0:
             messages.success(
@@ -283,3 +420,114 @@ class ClearRegistrationsView(LoginRequiredMixin, UserPassesTestMixin, generic.Vi
             messages.info(request, "No registrations have been deleted.")
 
         return redirect("karting:race-list")
+
+
+async def _load_live_snapshot(race_id: int) -> dict:
+    race = await Race.objects.filter(pk=race_id).values(
+        "participant_count", "max_participants", "category_id"
+    ).aget()
+    karts = Kart.objects.filter(category_id=race["category_id"]).values_list(
+        "id", "available_quantity"
+    )
+    return {
+        "participant_count": race["participant_count"],
+        "max_participants": race["max_participants"],
+        "karts": {kart_id: quantity async for kart_id, quantity in karts},
+    }
+
+
+async def _race_event_stream(race_id: int):
+    updates = hub.subscribe(
+        race_id,
+        _load_live_snapshot,
+        keepalive=settings.LIVE_KEEPALIVE_SECONDS
+    )
+    try:
+        async for message in updates:
+            if message is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: seats\ndata: {json.dumps(message)}\n\n"
+    except Race.DoesNotExist:
+        return
+    finally:
+        await updates.aclose()
+
+
+async def race_live_view(request: HttpRequest, pk: int) -> HttpResponse:
+    """Stream seat and kart counts of a race as server-sent events.
+
+    Needs an ASGI server; the counts come from ``karting.live.hub``, so
+    only the first viewer of a race costs a database read. Under WSGI the
+    stream would tie up a worker forever, so browsers get a 204, which
+    tells ``EventSource`` not to reconnect.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    if not hub.watching(pk) and not await Race.objects.filter(pk=pk).aexists():
+        raise Http404("No race found.")
+    return StreamingHttpResponse(
+        _race_event_stream(pk),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@require_safe
+@condition(etag_func=ical.feed_etag)
+def race_calendar_view(
+    request: HttpRequest,
+    category_id: int | None = None
+) -> HttpResponse:
+    """Upcoming races, optionally of one category, as an iCalendar feed."""
+
+    def build():
+        races = Race.objects.upcoming()
+        if category_id is None:
+            return "Karting races", races
+        category = get_object_or_404(RaceCategory, pk=category_id)
+        return (
+            f"Karting races: {category.name}",
+            races.filter(category=category)
+        )
+
+    return ical.feed_response(request, build)
+
+
+@require_safe
+@condition(etag_func=ical.feed_etag)
+def user_calendar_view(request: HttpRequest, token: str) -> HttpResponse:
+    """The upcoming races a user signed up for, as an iCalendar feed.
+
+    Calendar apps cannot log in, so the feed URL carries a signed user id
+    instead of relying on the session.
+    """
+    try:
+        user_id = ical.user_id_from_token(token)
+    except (signing.BadSignature, ValueError):
+        raise Http404("No calendar found.")
+
+    def build():
+        races = Race.objects.upcoming().filter(
+            pk__in=RaceParticipation.objects.filter(
+                user_id=user_id
+            ).values("race_id")
+        )
+        return "My karting races", races
+
+    return ical.feed_response(request, build)
+
+
+@require_safe
+@never_cache
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Request metrics of this process for Prometheus."""
+    if (
+        request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS
+        and not request.user.is_staff
+    ):
+        raise PermissionDenied
+    return HttpResponse(
+        metrics.registry.render(),
+        content_type=metrics.CONTENT_TYPE
+    )
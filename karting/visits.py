@@ -0,0 +1,222 @@
+"""Home page visit counts, buffered in memory and written in batches.
+
+Every process counts visits in memory and stores the increments from a
+background thread every ``VISIT_FLUSH_INTERVAL`` seconds or
+``VISIT_FLUSH_SIZE`` visits, whichever comes first, so serving the home
+page never writes to the database nor waits for a broker. A batch is
+applied with a handful of queries, whatever its size, and put back into
+the buffer when the database cannot take it.
+
+Displayed counts are the stored ones, cached until the next flush, plus
+the increments still buffered in this process. Increments buffered by a
+process that dies are lost, which is acceptable for visit counts.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+
+from karting.managers import shift_counters
+from karting.models import VisitCounter
+
+logger = logging.getLogger(__name__)
+
+
+def _count_key(user_id: int | None) -> str:
+    return f"karting:visits:{user_id or 'total'}"
+
+
+class VisitBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._visits = 0
+        self._since = time.monotonic()
+        self._writer = None
+
+    def add(self, user_id: int | None = None) -> None:
+        """Count a visit, of ``user_id`` if given, and flush when due."""
+        with self._lock:
+            self._pending[None] += 1
+            if user_id is not None:
+                self._pending[user_id] += 1
+            self._visits += 1
+            due = (
+                self._visits >= settings.VISIT_FLUSH_SIZE
+                or time.monotonic() - self._since
+                >= settings.VISIT_FLUSH_INTERVAL
+            )
+        if due:
+            self.flush()
+
+    def pending(self, user_id: int | None = None) -> int:
+        return self._pending[user_id]
+
+    def drain(self) -> list[tuple[int | None, int]]:
+        """Take the buffered increments as ``(user_id, visits)`` pairs."""
+        with self._lock:
+            return self._take()
+
+    def _take(self) -> list[tuple[int | None, int]]:
+        batch = list(self._pending.items())
+        self._pending.clear()
+        self._visits = 0
+        self._since = time.monotonic()
+        return batch
+
+    def restore(self, batch) -> None:
+        """Put back increments that could not be stored."""
+        with self._lock:
+            self._pending.update(dict(batch))
+
+    def flush(self) -> None:
+        """Store the buffered increments from a background thread.
+
+        At most one thread writes at a time; while it runs, visits keep
+        piling up for the next flush.
+        """
+        with self._lock:
+            if self._writer is not None and self._writer.is_alive():
+                return
+            batch = self._take()
+            if batch:
+                self._writer = threading.Thread(
+                    target=self._store_in_background,
+                    args=(batch,),
+                    name="visit-flush",
+                    daemon=True
+                )
+                self._writer.start()
+
+    def store(self) -> None:
+        """Add the buffered increments to the stored counts."""
+        self._store(self.drain())
+
+    def _store(self, batch) -> None:
+        if not batch:
+            return
+        try:
+            apply_visits(batch)
+        except Exception:
+            logger.exception("Could not store a batch of visits")
+            self.restore(batch)
+
+    def _store_in_background(self, batch) -> None:
+        try:
+            self._store(batch)
+        finally:
+            connections.close_all()
+
+    def close(self) -> None:
+        """Wait for a running write, then store what is left."""
+        if self._writer is not None:
+            self._writer.join(timeout=5)
+        self.store()
+
+
+buffer = VisitBuffer()
+atexit.register(buffer.close)
+
+
+def record_visit(user) -> None:
+    buffer.add(user.pk if user.is_authenticated else None)
+
+
+def apply_visits(batch) -> int:
+    """Add a batch of ``(user_id, visits)`` pairs to the stored counts."""
+    visits = dict(batch)
+    users = set(
+        get_user_model().objects.filter(
+            pk__in=[user_id for user_id in visits if user_id is not None]
+        ).values_list("pk", flat=True)
+    )
+    # increments of users deleted in the meantime are dropped
+    visits = {
+        user_id: count
+        for user_id, count in visits.items()
+        if user_id is None or user_id in users
+    }
+    VisitCounter.objects.bulk_create(
+        [VisitCounter(user_id=user_id) for user_id in visits],
+        ignore_conflicts=True
+    )
+    counters = dict(
+        VisitCounter.objects.filter(
+            Q(user__isnull=True) | Q(user_id__in=users)
+        ).values_list("user_id", "pk")
+    )
+    shift_counters(
+        VisitCounter,
+        "count",
+        {counters[user_id]: count for user_id, count in visits.items()}
+    )
+    cache.delete_many([_count_key(user_id) for user_id in visits])
+    return sum(count for user_id, count in visits.items() if user_id is None)
+
+
+def _stored_counts(owners: list):
+    """The stored counts of ``owners`` (``None`` for the total)."""
+    condition = Q(user_id__in=[owner for owner in owners if owner])
+    if None in owners:
+        condition |= Q(user__isnull=True)
+    return VisitCounter.objects.filter(condition).values_list(
+        "user_id", "count"
+    )
+
+
+def _with_pending(stored: dict, user_id) -> tuple[int, int | None]:
+    total = stored[None] + buffer.pending()
+    if user_id is None:
+        return total, None
+    return total, stored[user_id] + buffer.pending(user_id)
+
+
+def get_visit_counts(user) -> tuple[int, int | None]:
+    """Return the total visits and those of ``user`` (``None`` if anonymous).
+
+    Stored counts are read from the cache, and from the database only
+    after a flush or an eviction.
+    """
+    user_id = user.pk if user.is_authenticated else None
+    wanted = [None] if user_id is None else [None, user_id]
+    keys = {_count_key(owner): owner for owner in wanted}
+    stored = {
+        keys[key]: count for key, count in cache.get_many(keys).items()
+    }
+    missing = [owner for owner in wanted if owner not in stored]
+    if missing:
+        rows = dict(_stored_counts(missing))
+        fetched = {owner: rows.get(owner, 0) for owner in missing}
+        cache.set_many(
+            {_count_key(owner): count for owner, count in fetched.items()},
+            settings.VISIT_COUNT_CACHE_TIMEOUT
+        )
+        stored.update(fetched)
+    return _with_pending(stored, user_id)
+
+
+async def aget_visit_counts(user) -> tuple[int, int | None]:
+    user_id = user.pk if user.is_authenticated else None
+    wanted = [None] if user_id is None else [None, user_id]
+    keys = {_count_key(owner): owner for owner in wanted}
+    stored = {
+        keys[key]: count
+        for key, count in (await cache.aget_many(keys)).items()
+    }
+    missing = [owner for owner in wanted if owner not in stored]
+    if missing:
+        rows = {owner: count async for owner, count in _stored_counts(missing)}
+        fetched = {owner: rows.get(owner, 0) for owner in missing}
+        await cache.aset_many(
+            {_count_key(owner): count for owner, count in fetched.items()},
+            settings.VISIT_COUNT_CACHE_TIMEOUT
+        )
+        stored.update(fetched)
+    return _with_pending(stored, user_id)
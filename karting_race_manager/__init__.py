@@ -0,0 +1,3 @@
+from karting_race_manager.celery import app as celery_app
+
+__all__ = ("celery_app",)
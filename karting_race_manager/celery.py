@@ -0,0 +1,19 @@
+"""
+Celery application for karting_race_manager project.
+
+Task modules are discovered from the installed apps and configured from
+the ``CELERY_*`` entries in Django settings.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault(
+    "DJANGO_SETTINGS_MODULE",
+    "karting_race_manager.settings"
+)
+
+app = Celery("karting_race_manager")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
@@ -13,6 +13,8 @@ import os
 import dj_database_url
 from pathlib import Path
 
+from celery.schedules import crontab
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -51,7 +53,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "karting.middleware.WhiteNoiseMiddleware",
+    "karting.metrics.MetricsMiddleware",
+    "karting.querycheck.RepeatedQueryMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -61,6 +65,12 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+# The toolbar instruments every request and its middleware is sync only,
+# which would hand every request to a thread under ASGI
+if not DEBUG:
+    INSTALLED_APPS.remove("debug_toolbar")
+    MIDDLEWARE.remove("debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "karting_race_manager.urls"
 
 TEMPLATES = [
@@ -97,6 +107,86 @@ db_from_end = dj_database_url.config(conn_max_age=500)
 
 DATABASES["default"].update(db_from_end)
 
+# A SQLite transaction that has only read so far fails at once with
+# "database is locked" when it then writes behind another writer, as
+# concurrent sign-ups do; starting every transaction as a writer makes it
+# wait for the lock instead
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES["default"].setdefault("OPTIONS", {})
+    DATABASES["default"]["OPTIONS"]["transaction_mode"] = "IMMEDIATE"
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# e.g. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://127.0.0.1:6379
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
+# Model versions behind ETags and cache keys; each process re-reads them
+# from the database this often, which is how processes with a local cache
+# (the default) notice changes made by the others
+VERSION_CACHE_TIMEOUT = 60
+
+# Upper bound for the cached home page data, entries also expire at midnight
+HOME_CACHE_TIMEOUT = 600
+
+# Whole race and kart pages served to logged-out visitors; entries are also
+# dropped as soon as the models they show change
+PAGE_CACHE_TIMEOUT = 300
+
+# Generated iCalendar feeds; their keys change with races, categories and
+# the date, so this only bounds how long unused feeds linger
+ICAL_CACHE_TIMEOUT = 3600
+
+# Paginated lists cache their totals briefly and, on PostgreSQL, trust the
+# planner's row estimate above the threshold instead of running COUNT(*)
+PAGINATOR_COUNT_TIMEOUT = 60
+PAGINATOR_ESTIMATE_THRESHOLD = 10_000
+
+# Home page visits are buffered per process and written by the worker in
+# batches, after this many visits or seconds, whichever comes first
+VISIT_FLUSH_SIZE = 100
+VISIT_FLUSH_INTERVAL = 10
+VISIT_COUNT_CACHE_TIMEOUT = 3600
+
+# Live race updates: at most one message per race per interval (seconds),
+# a comment line on idle streams so proxies keep them open, and a fresh
+# read of watched races for the changes made by other processes
+LIVE_UPDATE_INTERVAL = 0.2
+LIVE_KEEPALIVE_SECONDS = 15
+LIVE_REFRESH_SECONDS = 5
+
+# Serve the home, race and kart pages with async views. Only worth it
+# under ASGI (under WSGI every async view needs an event loop of its own),
+# and even there measured slower than gunicorn threads, so opt in with
+# DJANGO_ASYNC_VIEWS=True and compare with benchmark_servers first
+ASYNC_VIEWS = os.environ.get("DJANGO_ASYNC_VIEWS", "") == "True"
+
+# /metrics is served to staff and to these addresses (the scraper's, as
+# seen by Django, i.e. behind a proxy the proxy's); label combinations
+# beyond the cap are counted together
+METRICS_ALLOWED_IPS = os.environ.get(
+    "METRICS_ALLOWED_IPS", "127.0.0.1"
+).split(",")
+METRICS_MAX_SERIES = 500
+
+# Requests running one query shape more than the threshold times (usually
+# an N+1) are logged, raised on ("raise", as in the tests) or let through
+# ("off")
+QUERY_REPEAT_ACTION = os.environ.get(
+    "QUERY_REPEAT_ACTION", "log" if DEBUG else "off"
+)
+QUERY_REPEAT_THRESHOLD = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -160,10 +250,37 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 AUTHENTICATION_BACKENDS = [
-    'accounts.backends.EmailBackend',
-    'django.contrib.auth.backends.ModelBackend',
+    "accounts.backends.UsernameOrEmailBackend",
 ]
 
+TEST_RUNNER = "tests.runner.QueryCheckTestRunner"
+
 INTERNAL_IPS = [
     "127.0.0.1",
 ]
+
+
+# Celery
+# Without a broker there is no worker either: tasks then run in the process
+# that queues them, so queued sign-ups are still confirmed (the nightly
+# cleanup then needs cron to run manage.py clear_past_registrations)
+CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "")
+
+CELERY_TASK_ALWAYS_EAGER = not CELERY_BROKER_URL
+
+CELERY_TASK_IGNORE_RESULT = True
+
+CELERY_BEAT_SCHEDULE = {
+    "clear-past-registrations": {
+        "task": "karting.tasks.clear_past_registrations",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "release-expired-holds": {
+        "task": "karting.tasks.release_expired_holds",
+        "schedule": crontab(),
+    },
+}
+
+
+# How long a kart shown on the registration form stays reserved
+KART_HOLD_SECONDS = 300
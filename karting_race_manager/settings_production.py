@@ -0,0 +1,74 @@
+"""
+Production settings for karting_race_manager project.
+
+Select them for the web processes, the Celery worker and ``collectstatic``
+alike with
+
+    DJANGO_SETTINGS_MODULE=karting_race_manager.settings_production
+
+and run ``python manage.py check_performance`` to confirm they apply.
+"""
+import os
+
+from karting_race_manager.settings import *  # noqa: F401, F403
+from karting_race_manager.settings import (
+    DATABASES,
+    INSTALLED_APPS,
+    MIDDLEWARE,
+    TEMPLATES,
+)
+
+DEBUG = False
+
+# The toolbar instruments every request even when it is not shown
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app != "debug_toolbar"]
+
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE
+    if not middleware.startswith("debug_toolbar.")
+]
+
+# Set to "log" on staging to report N+1 queries
+QUERY_REPEAT_ACTION = os.environ.get("QUERY_REPEAT_ACTION", "off")
+
+# Parse every template once per process
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        "APP_DIRS": False,
+        "OPTIONS": {
+            **TEMPLATES[0]["OPTIONS"],
+            "loaders": [
+                (
+                    "django.template.loaders.cached.Loader",
+                    [
+                        "django.template.loaders.filesystem.Loader",
+                        "django.template.loaders.app_directories.Loader",
+                    ],
+                ),
+            ],
+        },
+    },
+]
+
+# Keep connections across requests, and check them before reuse instead
+# of failing the first request after the database dropped them
+DATABASES = {
+    **DATABASES,
+    "default": {
+        **DATABASES["default"],
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+    },
+}
+
+# Hashed, pre-compressed static files served by WhiteNoise with far-future
+# cache headers; needs ``collectstatic`` with these settings
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
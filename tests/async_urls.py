@@ -0,0 +1,19 @@
+"""The project's URLs with the async views, as served under ASGI."""
+from django.urls import include, path
+
+from karting import urls as karting_urls
+
+urlpatterns = [
+    path(
+        "",
+        include(
+            (
+                karting_urls.with_async_views(karting_urls.urlpatterns),
+                "karting"
+            ),
+            namespace="karting"
+        )
+    ),
+    path("accounts/", include("accounts.urls", namespace="accounts")),
+    path("api/v1/", include("karting.api_urls", namespace="api-v1")),
+]
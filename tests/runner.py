@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from karting import visits
+from karting_race_manager.celery import app
+
+
+class QueryCheckTestRunner(DiscoverRunner):
+    """Fail every request of the tests that repeats a query shape.
+
+    Tasks are also queued on an in-memory broker rather than run eagerly,
+    so tests see sign-ups wait for the worker as they do in production,
+    and visits are only flushed when a test asks for it, never from a
+    background thread in the middle of another test.
+
+    SQLite test databases live in a temporary file rather than in memory,
+    so concurrency tests can open a connection per thread.
+    """
+
+    def setup_databases(self, **kwargs):
+        for connection in connections.all():
+            test = connection.settings_dict["TEST"]
+            if connection.vendor == "sqlite" and not test["NAME"]:
+                test["NAME"] = os.path.join(
+                    tempfile.gettempdir(),
+                    f"test_{connection.alias}_{os.getpid()}.sqlite3"
+                )
+        return super().setup_databases(**kwargs)
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        app.conf.update(
+            CELERY_BROKER_URL="memory://",
+            CELERY_TASK_ALWAYS_EAGER=False
+        )
+        self._test_settings = override_settings(
+            QUERY_REPEAT_ACTION="raise", VISIT_FLUSH_INTERVAL=float("inf")
+        )
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        # the test database is gone by the time the exit hook would store them
+        visits.buffer.drain()
+        self._test_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,216 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from karting.models import Race, RaceCategory, Kart
+from karting.services import register_for_race
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = RaceCategory.objects.create(
+            name="Category 1",
+            description="Description 1",
+            min_age=18,
+            max_age=35
+        )
+        self.kart = Kart.objects.create(
+            name="Kart 1",
+            category=self.category,
+            speed=100,
+            description="Fast Kart",
+            available_quantity=2
+        )
+        self.race = Race.objects.create(
+            name="Race 1",
+            category=self.category,
+            date=timezone.now().date() + timezone.timedelta(days=5),
+            max_participants=3
+        )
+        self.driver = User.objects.create_user(
+            username="driver",
+            password="password",
+            date_of_birth="1990-01-01"
+        )
+        self.availability_url = reverse(
+            "api-v1:race-availability",
+            args=[self.race.id]
+        )
+
+    def test_race_list(self):
+        Race.objects.create(
+            name="Past Race",
+            category=self.category,
+            date=timezone.now().date() - timezone.timedelta(days=1),
+            max_participants=3
+        )
+
+        response = self.client.get(reverse("api-v1:race-list"))
+
+        results = response.json()["results"]
+        self.assertEqual([race["name"] for race in results], ["Race 1"])
+        self.assertEqual(results[0]["seats_left"], 3)
+        self.assertIsNone(response.json()["next"])
+
+    def test_availability(self):
+        data = self.client.get(self.availability_url).json()
+
+        self.assertEqual(data["seats_left"], 3)
+        self.assertEqual(
+            data["karts"],
+            [{"id": self.kart.id, "name": "Kart 1", "available_quantity": 2}]
+        )
+
+    def test_conditional_request_skips_the_database(self):
+        response = self.client.get(self.availability_url)
+        etag = response.headers["ETag"]
+        self.assertIn("Last-Modified", response.headers)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.availability_url,
+                headers={"if-none-match": etag}
+            )
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(
+            self.availability_url,
+            headers={"if-modified-since": response.headers["Last-Modified"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_booking_changes_etag(self):
+        etag = self.client.get(self.availability_url).headers["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            register_for_race(self.driver, self.race, self.kart)
+
+        response = self.client.get(
+            self.availability_url,
+            headers={"if-none-match": etag}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["seats_left"], 2)
+
+    def test_bulk_update_touches_updated_at(self):
+        before = self.race.updated_at
+
+        Race.objects.filter(pk=self.race.pk).update(participant_count=1)
+
+        self.race.refresh_from_db()
+        self.assertGreater(self.race.updated_at, before)
+
+    def test_version_is_rebuilt_after_eviction(self):
+        etag = self.client.get(reverse("api-v1:kart-list")).headers["ETag"]
+        cache.clear()
+
+        response = self.client.get(
+            reverse("api-v1:kart-list"),
+            headers={"if-none-match": etag}
+        )
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_race_list_changes_at_midnight(self):
+        response = self.client.get(reverse("api-v1:race-list"))
+        tomorrow = timezone.now() + timezone.timedelta(days=1)
+
+        with mock.patch("django.utils.timezone.now", return_value=tomorrow):
+            for headers in (
+                {"if-none-match": response.headers["ETag"]},
+                {"if-modified-since": response.headers["Last-Modified"]},
+            ):
+                with self.subTest(headers=headers):
+                    response = self.client.get(
+                        reverse("api-v1:race-list"), headers=headers
+                    )
+                    self.assertEqual(response.status_code, 200)
+
+    def test_versions_are_reread_from_the_database(self):
+        url = reverse("api-v1:race-detail", args=[self.race.id])
+        etag = self.client.get(url).headers["ETag"]
+        # changed by another process, whose cache this one does not share
+        Race.objects.filter(pk=self.race.pk).update(max_participants=4)
+        later = time.time() + settings.VERSION_CACHE_TIMEOUT + 1
+
+        with mock.patch("time.time", return_value=later):
+            response = self.client.get(url, headers={"if-none-match": etag})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["max_participants"], 4)
+
+    def test_deletion_survives_version_expiry(self):
+        Race.objects.create(
+            name="Race 2",
+            category=self.category,
+            date=timezone.now().date() + timezone.timedelta(days=6),
+            max_participants=3
+        )
+        url = reverse("api-v1:race-list")
+        response = self.client.get(url)
+        headers = {
+            "if-none-match": response.headers["ETag"],
+            "if-modified-since": response.headers["Last-Modified"],
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.race.delete()
+        cache.clear()
+        response = self.client.get(url, headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [race["name"] for race in response.json()["results"]],
+            ["Race 2"]
+        )
+
+    def test_kart_list_filters_by_category(self):
+        other = RaceCategory.objects.create(
+            name="Category 2",
+            description="Description 2",
+            min_age=6,
+            max_age=12
+        )
+        Kart.objects.create(
+            name="Kart 2",
+            category=other,
+            speed=60,
+            description="Slow Kart",
+            available_quantity=1
+        )
+
+        response = self.client.get(
+            reverse("api-v1:kart-list"),
+            {"category": other.id}
+        )
+
+        self.assertEqual(
+            [kart["name"] for kart in response.json()["results"]],
+            ["Kart 2"]
+        )
+
+    def test_category_list_and_details(self):
+        categories = self.client.get(reverse("api-v1:category-list")).json()
+        self.assertEqual(categories["results"][0]["name"], "Category 1")
+
+        kart = self.client.get(
+            reverse("api-v1:kart-detail", args=[self.kart.id])
+        ).json()
+        self.assertEqual(kart["available_quantity"], 2)
+
+        response = self.client.get(reverse("api-v1:race-detail", args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_read_only(self):
+        response = self.client.post(reverse("api-v1:race-list"))
+
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,157 @@
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from karting import visits
+from karting.models import Kart, Race, RaceCategory, RaceParticipation
+
+User = get_user_model()
+
+
+@override_settings(ROOT_URLCONF="tests.async_urls")
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.now().date()
+        cls.category = RaceCategory.objects.create(
+            name="Senior",
+            description="Description",
+            min_age=18,
+            max_age=60
+        )
+        cls.races = [
+            Race.objects.create(
+                name=f"Race {i}",
+                category=cls.category,
+                date=today + timezone.timedelta(days=i + 1),
+                max_participants=10
+            )
+            for i in range(3)
+        ]
+        cls.kart = Kart.objects.create(
+            name="Kart 1",
+            category=cls.category,
+            speed=80,
+            description="Kart",
+            available_quantity=5
+        )
+        cls.driver = User.objects.create_user(
+            username="driver",
+            password="password",
+            date_of_birth="1990-01-01"
+        )
+        RaceParticipation.objects.create(
+            user=cls.driver,
+            race=cls.races[0],
+            kart=cls.kart
+        )
+
+    def setUp(self):
+        cache.clear()
+        visits.buffer.drain()
+
+    def tearDown(self):
+        visits.buffer.drain()
+
+    def test_pages_are_routed_to_async_views(self):
+        for name, args in (
+            ("karting:index", []),
+            ("karting:race-list", []),
+            ("karting:race-detail", [self.races[0].id]),
+            ("karting:karts-list", []),
+            ("karting:kart-detail", [self.kart.id]),
+        ):
+            with self.subTest(name):
+                match = resolve(reverse(name, args=args))
+                self.assertTrue(iscoroutinefunction(match.func))
+
+    async def test_index(self):
+        response = await self.async_client.get(reverse("karting:index"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Race 0")
+        self.assertContains(response, "1 visit in total.")
+
+    async def test_race_list_walks_cursor_pages(self):
+        response = await self.async_client.get(reverse("karting:race-list"))
+
+        self.assertEqual(
+            [race.name for race in response.context["race_list"]],
+            ["Race 0", "Race 1"]
+        )
+        page = response.context["page_obj"]
+        response = await self.async_client.get(
+            reverse("karting:race-list"), {"cursor": page.next_cursor}
+        )
+        self.assertEqual(
+            [race.name for race in response.context["race_list"]],
+            ["Race 2"]
+        )
+
+    async def test_race_list_numbered_page(self):
+        response = await self.async_client.get(
+            reverse("karting:race-list"), {"page": 2}
+        )
+
+        self.assertEqual(response.context["paginator"].count, 3)
+        self.assertEqual(
+            [race.name for race in response.context["race_list"]],
+            ["Race 2"]
+        )
+
+    async def test_invalid_pages_are_not_found(self):
+        url = reverse("karting:race-list")
+
+        for params in ({"cursor": "nonsense"}, {"page": 9}):
+            with self.subTest(params):
+                response = await self.async_client.get(url, params)
+                self.assertEqual(response.status_code, 404)
+
+    async def test_kart_search(self):
+        response = await self.async_client.get(
+            reverse("karting:karts-list"), {"search": "kart"}
+        )
+
+        self.assertEqual(
+            [kart.name for kart in response.context["karts"]],
+            ["Kart 1"]
+        )
+
+    def test_race_detail_of_registered_driver(self):
+        self.async_client.force_login(self.driver)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = async_to_sync(self.async_client.get)(
+                reverse("karting:race-detail", args=[self.races[0].id])
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["is_registered"])
+        self.assertContains(response, "Senior")
+        # session, user and race
+        self.assertEqual(len(queries), 3)
+
+    async def test_missing_objects_are_not_found(self):
+        for name in ("karting:race-detail", "karting:kart-detail"):
+            with self.subTest(name):
+                response = await self.async_client.get(
+                    reverse(name, args=[0])
+                )
+                self.assertEqual(response.status_code, 404)
+
+    def test_anonymous_pages_are_cached(self):
+        url = reverse("karting:kart-detail", args=[self.kart.id])
+        get = async_to_sync(self.async_client.get)
+
+        first = get(url)
+        with CaptureQueriesContext(connection) as queries:
+            second = get(url)
+
+        self.assertEqual(first["X-Page-Cache"], "miss")
+        self.assertEqual(second["X-Page-Cache"], "hit")
+        self.assertEqual(len(queries), 0)
@@ -0,0 +1,118 @@
+from unittest import mock
+
+from django.contrib.auth import authenticate, get_user_model, hashers
+from django.db import IntegrityError, connection
+from django.test import TestCase
+
+from accounts.backends import UsernameOrEmailBackend
+from accounts.forms import RegistrationForm
+
+User = get_user_model()
+
+
+class UsernameOrEmailBackendTests(TestCase):
+    def setUp(self):
+        self.driver = User.objects.create_user(
+            username="driver",
+            email="Driver@Example.com",
+            password="password",
+            date_of_birth="1990-01-01"
+        )
+
+    def count_hashes(self):
+        make = mock.patch(
+            "django.contrib.auth.base_user.make_password",
+            wraps=hashers.make_password
+        )
+        check = mock.patch(
+            "django.contrib.auth.base_user.check_password",
+            wraps=hashers.check_password
+        )
+        return make, check
+
+    def test_username_or_email(self):
+        self.assertEqual(
+            authenticate(username="driver", password="password"),
+            self.driver
+        )
+        self.assertEqual(
+            authenticate(username="driver@example.COM", password="password"),
+            self.driver
+        )
+        self.assertIsNone(authenticate(username="driver", password="wrong"))
+        self.assertIsNone(authenticate(username="Driver", password="password"))
+
+    def test_username_wins_over_someone_elses_email(self):
+        other = User.objects.create_user(
+            username="driver@example.com",
+            email="other@example.com",
+            password="other",
+            date_of_birth="1990-01-01"
+        )
+
+        self.assertEqual(
+            authenticate(username="driver@example.com", password="other"),
+            other
+        )
+
+    def test_inactive_users_are_rejected(self):
+        self.driver.is_active = False
+        self.driver.save()
+
+        self.assertIsNone(authenticate(username="driver", password="password"))
+
+    def test_one_query_and_one_hash_per_attempt(self):
+        for login in ["driver", "driver@example.com", "nobody"]:
+            make, check = self.count_hashes()
+            with self.assertNumQueries(1), make as made, check as checked:
+                authenticate(username=login, password="wrong")
+
+            self.assertEqual(made.call_count + checked.call_count, 1, login)
+
+    def test_lookup_uses_the_indexes(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Reads SQLite's query plan.")
+
+        plan = UsernameOrEmailBackend().get_queryset(
+            "driver@example.com"
+        ).explain()
+
+        self.assertIn("user_email_ci_uniq", plan)
+        self.assertNotIn("SCAN karting_customuser", plan)
+
+    def test_email_is_unique_regardless_of_case(self):
+        with self.assertRaises(IntegrityError):
+            User.objects.create_user(
+                username="copycat",
+                email="driver@EXAMPLE.com",
+                password="password",
+                date_of_birth="1990-01-01"
+            )
+
+    def test_blank_emails_may_repeat(self):
+        for username in ["first", "second"]:
+            User.objects.create_user(
+                username=username,
+                password="password",
+                date_of_birth="1990-01-01"
+            )
+
+        self.assertEqual(User.objects.filter(email="").count(), 2)
+
+    def test_registration_form_rejects_a_taken_email(self):
+        form = RegistrationForm(data={
+            "username": "copycat",
+            "email": "DRIVER@example.com",
+            "first_name": "Copy",
+            "last_name": "Cat",
+            "date_of_birth": "1990-01-01",
+            "password1": "Sup3r-secret-pass",
+            "password2": "Sup3r-secret-pass",
+            "agree_terms": True,
+        })
+
+        self.assertFalse(form.is_valid())
+        self.assertIn(
+            "A user with this email address already exists.",
+            str(form.errors)
+        )
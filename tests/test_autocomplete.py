@@ -0,0 +1,143 @@
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from karting.autocomplete import PrefixIndex, Suggestion
+from karting.models import Race, RaceCategory, Kart
+
+
+class PrefixIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = PrefixIndex([
+            Suggestion("race", 1, "Race 1"),
+            Suggestion("race", 12, "Race  12"),
+            Suggestion("race", 2, "Night Sprint"),
+        ])
+
+    def test_matches_the_start_of_any_word(self):
+        self.assertEqual(
+            [s.id for s in self.index.lookup("RA", 10)],
+            [1, 12]
+        )
+        self.assertEqual(
+            [s.id for s in self.index.lookup("sprint", 10)],
+            [2]
+        )
+        self.assertEqual(
+            [s.id for s in self.index.lookup("race 1", 10)],
+            [1, 12]
+        )
+        self.assertEqual(self.index.lookup("print", 10), [])
+        self.assertEqual(self.index.lookup("  ", 10), [])
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.lookup("r", 1)), 1)
+
+    def test_lookup_is_well_under_a_millisecond(self):
+        index = PrefixIndex([
+            Suggestion("kart", number, f"Kart {number} Model {number % 97}")
+            for number in range(20_000)
+        ])
+
+        started = time.perf_counter()
+        for number in range(1000):
+            index.lookup(f"kart {number}", 10)
+        elapsed = (time.perf_counter() - started) / 1000
+
+        self.assertLess(elapsed, 0.0005)
+
+
+class SuggestionsViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = RaceCategory.objects.create(
+            name="Junior",
+            description="Description 1",
+            min_age=8,
+            max_age=14
+        )
+        self.kart = Kart.objects.create(
+            name="Junior Rocket",
+            category=self.category,
+            speed=60,
+            description="Small Kart",
+            available_quantity=2
+        )
+        self.race = Race.objects.create(
+            name="Junior Cup",
+            category=self.category,
+            date=timezone.now().date() + timezone.timedelta(days=5),
+            max_participants=3
+        )
+        Race.objects.create(
+            name="Junior Classic",
+            category=self.category,
+            date=timezone.now().date() - timezone.timedelta(days=5),
+            max_participants=3
+        )
+        self.url = reverse("api-v1:suggestions")
+
+    def suggestions(self, **params):
+        response = self.client.get(self.url, params)
+        return [
+            (result["type"], result["name"])
+            for result in response.json()["results"]
+        ]
+
+    def test_suggests_every_kind_but_past_races(self):
+        self.assertEqual(
+            self.suggestions(q="jun"),
+            [
+                ("race", "Junior Cup"),
+                ("kart", "Junior Rocket"),
+                ("category", "Junior"),
+            ]
+        )
+
+    def test_type_narrows_the_kinds(self):
+        self.assertEqual(
+            self.suggestions(q="jun", type="kart"),
+            [("kart", "Junior Rocket"), ("category", "Junior")]
+        )
+
+    def test_keystrokes_skip_the_database(self):
+        self.suggestions(q="j")
+
+        with self.assertNumQueries(0):
+            self.suggestions(q="ju")
+            self.suggestions(q="jun")
+
+    def test_index_follows_committed_changes(self):
+        self.suggestions(q="jun")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kart.name = "Rocket"
+            self.kart.save()
+
+        self.assertEqual(
+            self.suggestions(q="rock", type="kart"),
+            [("kart", "Rocket")]
+        )
+        self.assertEqual(
+            self.suggestions(q="jun", type="kart"),
+            [("category", "Junior")]
+        )
+
+    def test_registrations_keep_the_index(self):
+        self.suggestions(q="j")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Kart.objects.filter(pk=self.kart.pk).update(available_quantity=1)
+            Race.objects.filter(pk=self.race.pk).update(participant_count=1)
+
+        with self.assertNumQueries(0):
+            self.suggestions(q="ju")
+
+    def test_list_pages_wire_the_search_box(self):
+        response = self.client.get(reverse("karting:karts-list"))
+
+        self.assertContains(response, 'id="search-suggestions"')
+        self.assertContains(response, 'type: "kart"')
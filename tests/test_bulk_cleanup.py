@@ -0,0 +1,107 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from karting.models import Race, RaceCategory, Kart, RaceParticipation
+from karting.services import clear_past_registrations
+from karting.tasks import clear_past_registrations as cleanup_task
+
+User = get_user_model()
+
+
+class BulkCleanupTests(TestCase):
+    def setUp(self):
+        today = timezone.now().date()
+        self.category = RaceCategory.objects.create(
+            name="Category 1",
+            description="Description 1",
+            min_age=18,
+            max_age=35
+        )
+        self.karts = [
+            Kart.objects.create(
+                name=f"Kart {i}",
+                category=self.category,
+                speed=100,
+                description="Fast Kart",
+                available_quantity=0
+            )
+            for i in range(2)
+        ]
+        self.past_races = [
+            Race.objects.create(
+                name=f"Past Race {i}",
+                category=self.category,
+                date=today - timezone.timedelta(days=i + 1),
+                max_participants=10,
+                participant_count=3
+            )
+            for i in range(2)
+        ]
+        self.future_race = Race.objects.create(
+            name="Future Race",
+            category=self.category,
+            date=today + timezone.timedelta(days=5),
+            max_participants=10,
+            participant_count=1
+        )
+        users = [
+            User.objects.create_user(
+                username=f"driver{i}",
+                password="password",
+                date_of_birth="1990-01-01"
+            )
+            for i in range(3)
+        ]
+        for race in self.past_races:
+            for i, user in enumerate(users):
+                RaceParticipation.objects.create(
+                    user=user,
+                    race=race,
+                    kart=self.karts[i % 2]
+                )
+        RaceParticipation.objects.create(
+            user=users[0],
+            race=self.future_race,
+            kart=self.karts[0]
+        )
+
+    def test_restores_karts_and_counters(self):
+        report = clear_past_registrations(batch_size=4)
+
+        self.assertEqual(report.deleted, 6)
+        self.assertEqual(report.batches, 2)
+        self.assertEqual(
+            [kart.available_quantity for kart in Kart.objects.order_by("pk")],
+            [4, 2]
+        )
+        for race in self.past_races:
+            race.refresh_from_db()
+            self.assertEqual(race.participant_count, 0)
+        self.future_race.refresh_from_db()
+        self.assertEqual(self.future_race.participant_count, 1)
+        self.assertEqual(RaceParticipation.objects.count(), 1)
+
+    def test_queries_grow_with_batches_not_rows(self):
+        # one batch: pks, grouped races and karts, one UPDATE for the
+        # races and one for the karts, a single DELETE and savepoints;
+        # then an empty probe
+        with self.assertNumQueries(13):
+            clear_past_registrations(batch_size=100)
+
+    def test_command_reports_throughput(self):
+        out = StringIO()
+
+        call_command("clear_past_registrations", "--batch-size=5", stdout=out)
+
+        self.assertIn("Deleted 6 registrations in 2 batches", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+
+    def test_background_task(self):
+        result = cleanup_task.apply(kwargs={"batch_size": 10}).get()
+
+        self.assertEqual(result["deleted"], 6)
+        self.assertEqual(result["batches"], 1)
@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from karting.management.commands.check_performance import performance_checks
+from karting_race_manager import settings_production
+
+
+class ProductionSettingsTests(TestCase):
+    def test_toolbar_is_excluded(self):
+        self.assertNotIn("debug_toolbar", settings_production.INSTALLED_APPS)
+        self.assertFalse(any(
+            middleware.startswith("debug_toolbar.")
+            for middleware in settings_production.MIDDLEWARE
+        ))
+        self.assertFalse(settings_production.DEBUG)
+
+    def test_connections_persist(self):
+        database = settings_production.DATABASES["default"]
+
+        self.assertGreater(database["CONN_MAX_AGE"], 0)
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
+
+    @override_settings(TEMPLATES=settings_production.TEMPLATES)
+    def test_templates_are_cached(self):
+        checks = {name: is_on for name, is_on, _ in performance_checks()}
+
+        self.assertTrue(checks["cached template loader"])
+
+
+class CheckPerformanceCommandTests(TestCase):
+    def test_reports_settings_and_overhead(self):
+        out = StringIO()
+
+        call_command("check_performance", requests=2, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("debug toolbar excluded", output)
+        self.assertIn("shared cache", output)
+        self.assertIn("overhead per request", output)
+
+    def test_strict_fails_when_a_setting_is_off(self):
+        with self.assertRaisesMessage(CommandError, "settings are off"):
+            call_command(
+                "check_performance", requests=1, strict=True,
+                stdout=StringIO()
+            )
+
+    @override_settings(
+        STORAGES={
+            "default": {
+                "BACKEND": "django.core.files.storage.FileSystemStorage",
+            },
+            "staticfiles": {
+                "BACKEND":
+                    "whitenoise.storage.CompressedManifestStaticFilesStorage",
+            },
+        },
+        STATIC_ROOT="/nonexistent/static/",
+    )
+    def test_missing_manifest_stops_before_timing(self):
+        out = StringIO()
+
+        with self.assertRaisesMessage(CommandError, "collectstatic"):
+            call_command("check_performance", requests=1, stdout=out)
+
+        self.assertIn("off static files collected", out.getvalue())
@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from karting.models import Race, RaceCategory
+from karting.pagination import CountingPaginator
+
+User = get_user_model()
+
+
+class CountingPaginatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = RaceCategory.objects.create(
+            name="Category 1",
+            description="Description 1",
+            min_age=18,
+            max_age=35
+        )
+        for i in range(5):
+            Race.objects.create(
+                name=f"Race {i}",
+                category=self.category,
+                date=timezone.now().date() + timezone.timedelta(days=i),
+                max_participants=10
+            )
+
+    def count(self, queryset):
+        return CountingPaginator(queryset, 2).count
+
+    def test_count_is_cached_per_filter(self):
+        self.assertEqual(self.count(Race.objects.order_by("date")), 5)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.count(Race.objects.order_by("-id")), 5)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                self.count(Race.objects.filter(name="Race 1")),
+                1
+            )
+
+    def test_saving_a_race_invalidates(self):
+        self.count(Race.objects.all())
+
+        Race.objects.first().delete()
+
+        self.assertEqual(self.count(Race.objects.all()), 4)
+
+    @override_settings(PAGINATOR_ESTIMATE_THRESHOLD=100)
+    def test_large_estimate_replaces_count(self):
+        with mock.patch(
+            "karting.pagination.estimate_count",
+            return_value=25_000
+        ):
+            with self.assertNumQueries(0):
+                total = self.count(Race.objects.all())
+
+        self.assertEqual(total, 25_000)
+
+    def test_small_estimate_is_counted_exactly(self):
+        with mock.patch("karting.pagination.estimate_count", return_value=3):
+            self.assertEqual(self.count(Race.objects.all()), 5)
+
+    def test_empty_queryset(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.count(Race.objects.none()), 0)
+
+    def test_numbered_race_list(self):
+        response = self.client.get(reverse("karting:race-list"), {"page": 2})
+
+        self.assertEqual(response.context["paginator"].num_pages, 3)
+        self.assertContains(response, "Race 2")
+
+    def test_admin_changelist(self):
+        admin = User.objects.create_superuser(
+            username="admin",
+            password="password",
+            date_of_birth="1990-01-01"
+        )
+        self.client.force_login(admin)
+
+        for name in ("race", "kart", "raceparticipation"):
+            response = self.client.get(
+                reverse(f"admin:karting_{name}_changelist")
+            )
+            self.assertEqual(response.status_code, 200)
@@ -0,0 +1,133 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from karting.models import Race, RaceCategory, Kart
+from karting.pagination import CursorPaginator
+
+User = get_user_model()
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        today = timezone.now().date()
+        self.categories = [
+            RaceCategory.objects.create(
+                name=name,
+                description="Description",
+                min_age=18,
+                max_age=35
+            )
+            for name in ("Senior", "Junior")
+        ]
+        # several races share a date, so the id breaks the ties
+        self.races = [
+            Race.objects.create(
+                name=f"Race {i}",
+                category=self.categories[0],
+                date=today + timezone.timedelta(days=i // 3),
+                max_participants=10
+            )
+            for i in range(7)
+        ]
+        for i in range(6):
+            Kart.objects.create(
+                name=f"Kart {i}",
+                category=self.categories[i % 2],
+                speed=80,
+                description="Kart",
+                available_quantity=1
+            )
+
+    def walk(self, paginator):
+        pages, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            pages.append([obj.name for obj in page])
+            if not page.has_next():
+                return pages, page
+            cursor = page.next_cursor
+
+    def test_walks_forward_in_key_order(self):
+        pages, _ = self.walk(
+            CursorPaginator(Race.objects.all(), 3, ("date", "id"))
+        )
+
+        self.assertEqual(pages, [
+            ["Race 0", "Race 1", "Race 2"],
+            ["Race 3", "Race 4", "Race 5"],
+            ["Race 6"],
+        ])
+
+    def test_walks_back(self):
+        paginator = CursorPaginator(Race.objects.all(), 3, ("date", "id"))
+        _, last = self.walk(paginator)
+
+        middle = paginator.page(last.previous_cursor)
+        first = paginator.page(middle.previous_cursor)
+
+        self.assertEqual(
+            [race.name for race in middle],
+            ["Race 3", "Race 4", "Race 5"]
+        )
+        self.assertEqual(
+            [race.name for race in first],
+            ["Race 0", "Race 1", "Race 2"]
+        )
+        self.assertFalse(first.has_previous())
+        self.assertTrue(first.has_next())
+
+    def test_orders_karts_by_category_name(self):
+        pages, _ = self.walk(
+            CursorPaginator(
+                Kart.objects.select_related("category"),
+                2,
+                ("category__name", "id")
+            )
+        )
+
+        self.assertEqual(pages, [
+            ["Kart 1", "Kart 3"],
+            ["Kart 5", "Kart 0"],
+            ["Kart 2", "Kart 4"],
+        ])
+
+    def test_deep_page_costs_one_query_without_count(self):
+        paginator = CursorPaginator(Race.objects.all(), 2, ("date", "id"))
+        cursor = paginator.page(paginator.page().next_cursor).next_cursor
+
+        with self.assertNumQueries(1) as queries:
+            paginator.page(cursor)
+
+        self.assertNotIn("COUNT", queries.captured_queries[0]["sql"])
+        self.assertNotIn("OFFSET", queries.captured_queries[0]["sql"])
+
+    def test_race_list_follows_cursor(self):
+        response = self.client.get(reverse("karting:race-list"))
+        self.assertContains(response, "Race 1")
+        self.assertNotContains(response, "Race 2")
+
+        response = self.client.get(
+            reverse("karting:race-list"),
+            {"cursor": response.context["page_obj"].next_cursor}
+        )
+        self.assertContains(response, "Race 2")
+        self.assertContains(response, "Race 3")
+        self.assertContains(response, "?cursor=")
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(
+            reverse("karting:karts-list"),
+            {"cursor": "not-a-cursor"}
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_numbered_pages_still_work(self):
+        response = self.client.get(reverse("karting:race-list"), {"page": 2})
+
+        self.assertContains(response, "Race 2")
+        self.assertEqual(response.context["paginator"].num_pages, 4)
@@ -0,0 +1,177 @@
+from datetime import date
+from unittest import mock
+
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from karting.models import Race, RaceCategory, Kart
+from karting.services import register_for_race
+
+User = get_user_model()
+
+
+class AgeAnnotationTests(TestCase):
+    def test_matches_the_age_property(self):
+        today = date.today()
+        births = [
+            today - relativedelta(years=20),
+            today - relativedelta(years=20, days=1),
+            today - relativedelta(years=20, days=-1),
+            today - relativedelta(years=20, months=1),
+            today - relativedelta(years=20, months=-1),
+            date(2000, 2, 29),
+            date(1999, 12, 31),
+            date(2001, 1, 1),
+        ]
+        for number, birth in enumerate(births):
+            User.objects.create_user(
+                username=f"driver{number}",
+                password="password",
+                date_of_birth=birth
+            )
+
+        with self.assertNumQueries(1):
+            users = list(User.objects.with_age())
+
+        for user in users:
+            self.assertEqual(user.current_age, user.age, user.date_of_birth)
+
+    def test_leap_day_birthday(self):
+        user = User.objects.create_user(
+            username="leap",
+            password="password",
+            date_of_birth=date(2000, 2, 29)
+        )
+
+        for today, age in [
+            (date(2023, 2, 28), 22),
+            (date(2023, 3, 1), 23),
+            (date(2024, 2, 29), 24),
+        ]:
+            with mock.patch("karting.managers.date") as fake:
+                fake.today.return_value = today
+                annotated = User.objects.with_age().get(pk=user.pk)
+            self.assertEqual(annotated.current_age, age, today)
+
+
+class EligibleRacesTests(TestCase):
+    def setUp(self):
+        today = timezone.now().date()
+        self.adults = RaceCategory.objects.create(
+            name="Adults",
+            description="Adults",
+            min_age=18,
+            max_age=35
+        )
+        juniors = RaceCategory.objects.create(
+            name="Juniors",
+            description="Juniors",
+            min_age=8,
+            max_age=14
+        )
+        self.kart = Kart.objects.create(
+            name="Kart 1",
+            category=self.adults,
+            speed=100,
+            description="Fast Kart",
+            available_quantity=5
+        )
+        self.open = Race.objects.create(
+            name="Open Race",
+            category=self.adults,
+            date=today + timezone.timedelta(days=3),
+            max_participants=10
+        )
+        self.full = Race.objects.create(
+            name="Full Race",
+            category=self.adults,
+            date=today + timezone.timedelta(days=4),
+            max_participants=1,
+            participant_count=1
+        )
+        self.entered = Race.objects.create(
+            name="Entered Race",
+            category=self.adults,
+            date=today + timezone.timedelta(days=5),
+            max_participants=10
+        )
+        Race.objects.create(
+            name="Past Race",
+            category=self.adults,
+            date=today - timezone.timedelta(days=1),
+            max_participants=10
+        )
+        Race.objects.create(
+            name="Junior Race",
+            category=juniors,
+            date=today + timezone.timedelta(days=3),
+            max_participants=10
+        )
+        self.driver = User.objects.create_user(
+            username="driver",
+            password="password",
+            date_of_birth=today - relativedelta(years=25)
+        )
+        register_for_race(self.driver, self.entered, self.kart)
+
+    def test_races_filtered_by_age_in_one_query(self):
+        with self.assertNumQueries(1):
+            names = set(
+                Race.objects.eligible_for(self.driver).values_list(
+                    "name", flat=True
+                )
+            )
+
+        self.assertEqual(
+            names,
+            {"Open Race", "Full Race", "Entered Race", "Past Race"}
+        )
+
+    def test_open_races(self):
+        self.assertEqual(
+            list(Race.objects.open_to(self.driver)),
+            [self.open]
+        )
+
+    def test_eligible_users(self):
+        User.objects.create_user(
+            username="kid",
+            password="password",
+            date_of_birth=date.today() - relativedelta(years=10)
+        )
+
+        self.assertEqual(
+            list(User.objects.eligible_for(self.adults)),
+            [self.driver]
+        )
+
+    def test_page(self):
+        url = reverse("karting:eligible-races")
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.client.force_login(self.driver)
+
+        response = self.client.get(url)
+
+        self.assertEqual(list(response.context["race_list"]), [self.open])
+        self.assertContains(response, "drivers of your age (25)")
+
+    def test_admin_age_column(self):
+        admin = User.objects.create_superuser(
+            username="admin",
+            password="password"
+        )
+        self.client.force_login(admin)
+
+        response = self.client.get(
+            reverse("admin:karting_customuser_changelist"),
+            {"o": "6"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        ages = [
+            user.current_age for user in response.context["cl"].result_list
+        ]
+        self.assertEqual(ages, sorted(ages))
@@ -0,0 +1,148 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from karting.models import (
+    Kart,
+    KartHold,
+    Race,
+    RaceCategory,
+    RaceParticipation
+)
+from karting.services import GroupEntry, hold_kart, register_group
+
+User = get_user_model()
+
+
+class GroupRegistrationTests(TestCase):
+    def setUp(self):
+        self.category = RaceCategory.objects.create(
+            name="Category 1",
+            description="Description 1",
+            min_age=18,
+            max_age=35
+        )
+        self.fast_kart = Kart.objects.create(
+            name="Fast Kart",
+            category=self.category,
+            speed=120,
+            description="Fast Kart",
+            available_quantity=3
+        )
+        self.slow_kart = Kart.objects.create(
+            name="Slow Kart",
+            category=self.category,
+            speed=80,
+            description="Slow Kart",
+            available_quantity=1
+        )
+        self.race = Race.objects.create(
+            name="Corporate Cup",
+            category=self.category,
+            date=timezone.now().date() + timezone.timedelta(days=5),
+            max_participants=4
+        )
+        adult = timezone.now().date() - timezone.timedelta(days=25 * 365)
+        for i in range(5):
+            User.objects.create_user(
+                username=f"driver{i}",
+                password="password",
+                date_of_birth=adult
+            )
+        User.objects.create_user(
+            username="junior",
+            password="password",
+            date_of_birth=timezone.now().date()
+        )
+        self.staff = User.objects.create_user(
+            username="captain",
+            password="password",
+            is_staff=True,
+            date_of_birth="1990-01-01"
+        )
+
+    def test_allocates_karts_and_reports_per_driver(self):
+        results = register_group(self.race, [
+            GroupEntry("driver0", "slow kart"),
+            GroupEntry("driver1"),
+            GroupEntry("driver1"),
+            GroupEntry("ghost"),
+            GroupEntry("junior"),
+            GroupEntry("driver2", "Slow Kart"),
+            GroupEntry("driver3"),
+            GroupEntry("driver4"),
+        ])
+
+        self.assertEqual(
+            [(result.kart and result.kart.name, result.error)
+             for result in results],
+            [
+                ("Slow Kart", ""),
+                ("Fast Kart", ""),
+                (None, "Listed more than once."),
+                (None, "Unknown driver."),
+                (None, "Not eligible for this race category."),
+                ("Fast Kart", ""),
+                ("Fast Kart", ""),
+                (None, "This race is full."),
+            ]
+        )
+        self.race.refresh_from_db()
+        self.assertEqual(self.race.participant_count, 4)
+        self.assertEqual(RaceParticipation.objects.count(), 4)
+        self.fast_kart.refresh_from_db()
+        self.slow_kart.refresh_from_db()
+        self.assertEqual(self.fast_kart.available_quantity, 0)
+        self.assertEqual(self.slow_kart.available_quantity, 0)
+
+    def test_already_registered_driver_is_skipped(self):
+        register_group(self.race, [GroupEntry("driver0")])
+
+        results = register_group(self.race, [GroupEntry("driver0")])
+
+        self.assertEqual(
+            results[0].error,
+            "You are already registered for this race."
+        )
+
+    def test_registered_drivers_lose_their_holds(self):
+        hold_kart(User.objects.get(username="driver0"), self.race)
+        hold_kart(User.objects.get(username="driver1"), self.race)
+
+        register_group(self.race, [GroupEntry("driver0")])
+
+        self.assertQuerySetEqual(
+            KartHold.objects.values_list("user__username", flat=True),
+            ["driver1"]
+        )
+
+    def test_query_count_does_not_grow_with_team_size(self):
+        entries = [GroupEntry(f"driver{i}") for i in range(4)]
+
+        # savepoint, race lock, drivers, holds, karts, insert, hold
+        # removal, race update, one update for all karts and release
+        with self.assertNumQueries(10):
+            register_group(self.race, entries)
+
+    def test_view_requires_staff(self):
+        self.client.login(username="driver0", password="password")
+
+        response = self.client.get(
+            reverse("karting:register-group-for-race", args=[self.race.id])
+        )
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_view_renders_results(self):
+        self.client.login(username="captain", password="password")
+
+        response = self.client.post(
+            reverse("karting:register-group-for-race", args=[self.race.id]),
+            {"drivers": "driver0, Slow Kart\ndriver1\nghost\n"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "2 of 3 drivers have been registered.")
+        self.assertContains(response, "Unknown driver.")
+        self.assertContains(response, "Seats taken: 2 / 4")
@@ -0,0 +1,108 @@
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from karting.cache import get_home_data
+from karting.models import Race, RaceCategory, Kart
+
+
+class HomeCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.category = RaceCategory.objects.create(
+            name="Category 1",
+            description="Description 1",
+            min_age=18,
+            max_age=35
+        )
+        self.kart = Kart.objects.create(
+            name="Kart 1",
+            category=self.category,
+            speed=100,
+            description="Fast Kart",
+            available_quantity=1
+        )
+        self.past_race = Race.objects.create(
+            name="Past Race",
+            category=self.category,
+            date=self.today - timezone.timedelta(days=1),
+            max_participants=5
+        )
+        self.race = Race.objects.create(
+            name="Today Race",
+            category=self.category,
+            date=self.today,
+            max_participants=5
+        )
+
+    def test_second_read_hits_cache(self):
+        get_home_data(is_staff=False)
+
+        with self.assertNumQueries(0):
+            data = get_home_data(is_staff=False)
+
+        self.assertEqual(data["upcoming_races"], [self.race])
+        self.assertEqual(data["popular_karts"], [self.kart])
+
+    def test_staff_and_public_are_cached_separately(self):
+        self.assertEqual(
+            get_home_data(is_staff=False)["upcoming_races"],
+            [self.race]
+        )
+        self.assertEqual(
+            get_home_data(is_staff=True)["upcoming_races"],
+            [self.past_race, self.race]
+        )
+
+    def test_saving_models_invalidates(self):
+        get_home_data(is_staff=False)
+
+        self.race.name = "Renamed Race"
+        self.race.save()
+        self.assertEqual(
+            get_home_data(is_staff=False)["upcoming_races"][0].name,
+            "Renamed Race"
+        )
+
+        self.kart.delete()
+        self.assertEqual(get_home_data(is_staff=False)["popular_karts"], [])
+
+        self.category.save()
+        with self.assertNumQueries(2):
+            get_home_data(is_staff=False)
+
+    def test_rolls_over_at_midnight(self):
+        get_home_data(is_staff=False)
+        tomorrow = timezone.now() + timezone.timedelta(days=1)
+
+        with mock.patch("django.utils.timezone.now", return_value=tomorrow):
+            data = get_home_data(is_staff=False)
+
+        self.assertEqual(data["upcoming_races"], [])
+
+    def test_works_with_file_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            backend = {
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased."
+                               "FileBasedCache",
+                    "LOCATION": location,
+                }
+            }
+            with override_settings(CACHES=backend):
+                get_home_data(is_staff=False)
+                with self.assertNumQueries(0):
+                    data = get_home_data(is_staff=False)
+
+        self.assertEqual(data["upcoming_races"], [self.race])
+
+    def test_index_view_uses_cached_data(self):
+        response = self.client.get(reverse("karting:index"))
+
+        self.assertContains(response, "Today Race")
+        self.assertNotContains(response, "Past Race")
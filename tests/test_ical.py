@@ -0,0 +1,172 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from karting.ical import feed_token, fold
+from karting.models import Race, RaceCategory, Kart
+from karting.services import register_for_race
+
+User = get_user_model()
+
+
+def read(response) -> str:
+    if response.streaming:
+        return b"".join(response.streaming_content).decode()
+    return response.content.decode()
+
+
+class FoldTests(SimpleTestCase):
+    def test_long_lines_are_folded_at_75_octets(self):
+        folded = fold("SUMMARY:" + "é" * 80)
+
+        lines = folded.removesuffix("\r\n").split("\r\n")
+        self.assertTrue(all(len(line.encode()) <= 75 for line in lines))
+        self.assertTrue(all(line.startswith(" ") for line in lines[1:]))
+        self.assertEqual(
+            "".join(line.removeprefix(" ") for line in lines),
+            "SUMMARY:" + "é" * 80
+        )
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = RaceCategory.objects.create(
+            name="Category 1",
+            description="Description 1",
+            min_age=18,
+            max_age=35
+        )
+        self.other = RaceCategory.objects.create(
+            name="Category 2",
+            description="Description 2",
+            min_age=8,
+            max_age=14
+        )
+        self.kart = Kart.objects.create(
+            name="Kart 1",
+            category=self.category,
+            speed=100,
+            description="Fast Kart",
+            available_quantity=2
+        )
+        today = timezone.now().date()
+        self.race = Race.objects.create(
+            name="Night Race, Round 1",
+            category=self.category,
+            date=today + timezone.timedelta(days=5),
+            max_participants=3
+        )
+        Race.objects.create(
+            name="Junior Race",
+            category=self.other,
+            date=today + timezone.timedelta(days=6),
+            max_participants=3
+        )
+        Race.objects.create(
+            name="Past Race",
+            category=self.category,
+            date=today - timezone.timedelta(days=1),
+            max_participants=3
+        )
+        self.driver = User.objects.create_user(
+            username="driver",
+            password="password",
+            date_of_birth="1990-01-01"
+        )
+        self.url = reverse("karting:race-calendar")
+
+    def test_feed_lists_upcoming_races(self):
+        response = self.client.get(self.url)
+        body = read(response)
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response["Content-Type"],
+            "text/calendar; charset=utf-8"
+        )
+        self.assertTrue(body.startswith("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n"))
+        self.assertIn("SUMMARY:Night Race\\, Round 1\r\n", body)
+        self.assertIn(
+            f"DTSTART;VALUE=DATE:{self.race.date:%Y%m%d}\r\n",
+            body
+        )
+        self.assertIn("SUMMARY:Junior Race\r\n", body)
+        self.assertNotIn("Past Race", body)
+        self.assertTrue(body.endswith("END:VCALENDAR\r\n"))
+
+    def test_category_feed(self):
+        body = read(self.client.get(
+            reverse("karting:category-calendar", args=[self.other.id])
+        ))
+
+        self.assertIn("X-WR-CALNAME:Karting races: Category 2", body)
+        self.assertIn("Junior Race", body)
+        self.assertNotIn("Night Race", body)
+        response = self.client.get(
+            reverse("karting:category-calendar", args=[0])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_user_feed_follows_registrations(self):
+        url = reverse("karting:user-calendar", args=[feed_token(self.driver)])
+        self.assertNotIn("BEGIN:VEVENT", read(self.client.get(url)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            register_for_race(self.driver, self.race, self.kart)
+        body = read(self.client.get(url))
+
+        self.assertIn("Night Race", body)
+        self.assertNotIn("Junior Race", body)
+        self.assertIn("1/3 drivers", body)
+
+    def test_forged_token(self):
+        response = self.client.get(
+            reverse("karting:user-calendar", args=[f"{self.driver.pk}:x"])
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_body_is_cached_until_a_race_changes(self):
+        body = read(self.client.get(self.url))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertFalse(response.streaming)
+        self.assertEqual(read(response), body)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.race.name = "Day Race"
+            self.race.save()
+        self.assertIn("SUMMARY:Day Race", read(self.client.get(self.url)))
+
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        read(response)
+        etag = response["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                self.url,
+                headers={"if-none-match": etag}
+            )
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.name = "Juniors"
+            self.other.save()
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_race_list_links_the_feeds(self):
+        self.client.force_login(self.driver)
+
+        response = self.client.get(reverse("karting:race-list"))
+
+        self.assertContains(response, self.url)
+        self.assertContains(
+            response,
+            reverse("karting:user-calendar", args=[feed_token(self.driver)])
+        )
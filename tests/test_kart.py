@@ -1,10 +1,12 @@
 from django.urls import reverse
 from django.test import TestCase
+from django.core.cache import cache
 from karting.models import Kart, RaceCategory, CustomUser
 
 
 class KartViewTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.category = RaceCategory.objects.create(
             name="Category 1",
             description="Description 1",
@@ -0,0 +1,153 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from karting.models import Race, RaceCategory, Kart, KartHold
+from karting.services import (
+    KartUnavailableError,
+    RaceFullError,
+    hold_kart,
+    register_for_race
+)
+
+User = get_user_model()
+
+
+class KartHoldTests(TestCase):
+    def setUp(self):
+        self.category = RaceCategory.objects.create(
+            name="Category 1",
+            description="Description 1",
+            min_age=18,
+            max_age=35
+        )
+        self.kart = Kart.objects.create(
+            name="Kart 1",
+            category=self.category,
+            speed=100,
+            description="Fast Kart",
+            available_quantity=1
+        )
+        self.race = Race.objects.create(
+            name="Race 1",
+            category=self.category,
+            date=timezone.now().date() + timezone.timedelta(days=5),
+            max_participants=5
+        )
+        self.driver = User.objects.create_user(
+            username="driver",
+            password="password",
+            date_of_birth="1990-01-01"
+        )
+        self.rival = User.objects.create_user(
+            username="rival",
+            password="password",
+            date_of_birth="1990-01-01"
+        )
+
+    def test_get_creates_hold_and_preselects_kart(self):
+        self.client.login(username="driver", password="password")
+
+        response = self.client.get(
+            reverse("karting:register-for-race", args=[self.race.id])
+        )
+
+        hold = KartHold.objects.get(user=self.driver, race=self.race)
+        self.assertEqual(hold.kart, self.kart)
+        self.assertGreater(hold.expires_at, timezone.now())
+        self.assertEqual(
+            response.context["form"].initial["kart"],
+            self.kart.id
+        )
+        self.assertContains(response, "is held for you until")
+
+    def test_repeated_get_keeps_single_hold(self):
+        hold_kart(self.driver, self.race)
+        hold_kart(self.driver, self.race)
+
+        self.assertEqual(KartHold.objects.count(), 1)
+
+    def test_held_kart_is_hidden_from_others(self):
+        hold_kart(self.driver, self.race)
+
+        self.assertFalse(Kart.objects.available(self.rival).exists())
+        self.assertTrue(Kart.objects.available(self.driver).exists())
+        self.assertIsNone(hold_kart(self.rival, self.race))
+
+    def test_holds_never_exceed_free_seats(self):
+        self.race.max_participants = 3
+        self.race.save()
+        self.kart.available_quantity = 10
+        self.kart.save()
+        register_for_race(self.driver, self.race, self.kart)
+        drivers = [
+            User.objects.create_user(
+                username=f"driver{i}",
+                password="password",
+                date_of_birth="1990-01-01"
+            )
+            for i in range(4)
+        ]
+
+        holds = [hold_kart(driver, self.race) for driver in drivers]
+
+        self.assertEqual(
+            [hold is not None for hold in holds],
+            [True, True, False, False]
+        )
+        self.assertEqual(KartHold.objects.live().count(), 2)
+
+    def test_race_is_locked_while_seats_are_counted(self):
+        with mock.patch.object(
+            Race.objects,
+            "select_for_update",
+            wraps=Race.objects.select_for_update
+        ) as lock:
+            hold_kart(self.driver, self.race)
+
+        lock.assert_called_once_with()
+
+    def test_held_kart_cannot_be_taken_by_others(self):
+        hold_kart(self.driver, self.race)
+
+        with self.assertRaises(KartUnavailableError):
+            register_for_race(self.rival, self.race, self.kart)
+
+    def test_held_seat_cannot_be_taken_by_others(self):
+        self.race.max_participants = 1
+        self.race.save()
+        self.kart.available_quantity = 2
+        self.kart.save()
+        hold_kart(self.driver, self.race)
+
+        with self.assertRaises(RaceFullError):
+            register_for_race(self.rival, self.race, self.kart)
+
+    def test_post_consumes_hold(self):
+        hold_kart(self.driver, self.race)
+
+        register_for_race(self.driver, self.race, self.kart)
+
+        self.assertFalse(KartHold.objects.exists())
+        self.kart.refresh_from_db()
+        self.assertEqual(self.kart.available_quantity, 0)
+
+    def test_expired_hold_is_ignored_and_swept(self):
+        KartHold.objects.create(
+            user=self.driver,
+            race=self.race,
+            kart=self.kart,
+            expires_at=timezone.now() - timezone.timedelta(seconds=1)
+        )
+
+        register_for_race(self.rival, self.race, self.kart)
+
+        out = StringIO()
+        call_command("release_expired_holds", stdout=out)
+        self.assertIn("Released 1 expired holds.", out.getvalue())
+        self.assertFalse(KartHold.objects.exists())
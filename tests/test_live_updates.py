@@ -0,0 +1,184 @@
+import asyncio
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from karting import live
+from karting.live import LiveHub
+from karting.models import Race, RaceCategory, Kart
+from karting.services import register_for_race, unregister_from_race
+
+User = get_user_model()
+
+
+def snapshot_loader(calls):
+    async def load(race_id):
+        calls.append(race_id)
+        return {
+            "participant_count": 0,
+            "max_participants": 10,
+            "karts": {1: 5, 2: 5},
+        }
+    return load
+
+
+class LiveHubTests(SimpleTestCase):
+    async def test_burst_is_coalesced_into_one_message(self):
+        hub = LiveHub(interval=0.05)
+        updates = hub.subscribe(1, snapshot_loader([]), keepalive=0.2)
+
+        first = await anext(updates)
+        for _ in range(5):
+            hub.publish(seats={1: 1}, karts={1: -1})
+        second = await anext(updates)
+        idle = await anext(updates)
+        await updates.aclose()
+
+        self.assertEqual(first["seats_left"], 10)
+        self.assertEqual(second["participant_count"], 5)
+        self.assertEqual(second["karts"], {1: 0, 2: 5})
+        self.assertIsNone(idle)
+
+    async def test_messages_are_rate_limited_per_race(self):
+        hub = LiveHub(interval=0.1)
+        updates = hub.subscribe(1, snapshot_loader([]))
+        await anext(updates)
+        loop = asyncio.get_running_loop()
+
+        hub.publish(seats={1: 1})
+        await anext(updates)
+        sent = loop.time()
+        hub.publish(seats={1: 1})
+        message = await anext(updates)
+        await updates.aclose()
+
+        self.assertGreaterEqual(loop.time() - sent, 0.09)
+        self.assertEqual(message["participant_count"], 2)
+
+    async def test_viewers_share_one_snapshot_load(self):
+        hub = LiveHub(interval=0)
+        calls = []
+        viewers = [
+            hub.subscribe(1, snapshot_loader(calls)) for _ in range(3)
+        ]
+        for viewer in viewers:
+            await anext(viewer)
+
+        await asyncio.to_thread(hub.publish, seats={1: 2}, karts={9: -1})
+        messages = [await anext(viewer) for viewer in viewers]
+        for viewer in viewers:
+            await viewer.aclose()
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(
+            [message["participant_count"] for message in messages],
+            [2, 2, 2]
+        )
+        self.assertFalse(hub.watching(1))
+
+    async def test_changes_made_elsewhere_reach_viewers(self):
+        hub = LiveHub(interval=0, refresh=0.05)
+        database = {"participant_count": 0, "max_participants": 10}
+
+        async def load(race_id):
+            return {**database, "karts": {}}
+
+        updates = hub.subscribe(1, load)
+        first = await anext(updates)
+        # e.g. a sign-up confirmed by the worker
+        database["participant_count"] = 1
+        second = await anext(updates)
+        await updates.aclose()
+
+        self.assertEqual(first["participant_count"], 0)
+        self.assertEqual(second["participant_count"], 1)
+
+    async def test_delta_published_during_the_first_load_is_kept(self):
+        hub = LiveHub(interval=0)
+        database = {"participant_count": 0, "max_participants": 10}
+        calls = []
+
+        async def load(race_id):
+            calls.append(race_id)
+            snapshot = {**database, "karts": {}}
+            if len(calls) == 1:
+                # a booking commits while the first read is under way
+                database["participant_count"] = 1
+                hub.publish(seats={1: 1})
+            return snapshot
+
+        updates = hub.subscribe(1, load)
+        first = await anext(updates)
+        await updates.aclose()
+
+        self.assertEqual(calls, [1, 1])
+        self.assertEqual(first["participant_count"], 1)
+
+
+class LiveViewTests(TestCase):
+    def setUp(self):
+        self.category = RaceCategory.objects.create(
+            name="Category 1",
+            description="Description 1",
+            min_age=18,
+            max_age=35
+        )
+        self.kart = Kart.objects.create(
+            name="Kart 1",
+            category=self.category,
+            speed=100,
+            description="Fast Kart",
+            available_quantity=2
+        )
+        self.race = Race.objects.create(
+            name="Race 1",
+            category=self.category,
+            date=timezone.now().date() + timezone.timedelta(days=5),
+            max_participants=3
+        )
+        self.driver = User.objects.create_user(
+            username="driver",
+            password="password",
+            date_of_birth="1990-01-01"
+        )
+
+    def test_services_publish_deltas_on_commit(self):
+        with mock.patch.object(live.hub, "publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                register_for_race(self.driver, self.race, self.kart)
+            with self.captureOnCommitCallbacks(execute=True):
+                unregister_from_race(self.driver, self.race.id)
+
+        publish.assert_has_calls([
+            mock.call(seats={self.race.id: 1}, karts={self.kart.id: -1}),
+            mock.call(seats={self.race.id: -1}, karts={self.kart.id: 1}),
+        ])
+
+    async def test_stream_starts_with_snapshot(self):
+        with mock.patch("karting.views.hub", LiveHub()):
+            response = await self.async_client.get(
+                reverse("karting:race-live", args=[self.race.id])
+            )
+            chunk = await anext(response.streaming_content)
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertTrue(chunk.startswith(b"event: seats\ndata: "))
+        self.assertIn(b'"seats_left": 3', chunk)
+        self.assertIn(f'"{self.kart.id}": 2'.encode(), chunk)
+
+    async def test_unknown_race(self):
+        response = await self.async_client.get(
+            reverse("karting:race-live", args=[0])
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_wsgi_gets_no_stream(self):
+        response = self.client.get(
+            reverse("karting:race-live", args=[self.race.id])
+        )
+
+        self.assertEqual(response.status_code, 204)
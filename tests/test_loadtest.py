@@ -0,0 +1,77 @@
+import asyncio
+from io import StringIO
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase
+
+from karting.loadtest import Connection, Results, hammer
+from karting.models import Race
+
+User = get_user_model()
+
+
+class ResultsTests(SimpleTestCase):
+    def test_summary(self):
+        results = Results(
+            latencies=[i / 1000 for i in range(1, 101)], errors=25, elapsed=5
+        )
+
+        self.assertEqual(results.percentile(50), 0.05)
+        self.assertEqual(results.percentile(99), 0.099)
+        self.assertEqual(
+            results.summary(),
+            "125 requests, 25.0 req/s, p50 50.0ms p95 95.0ms p99 99.0ms, "
+            "20.0% errors"
+        )
+
+
+class LoadTests(LiveServerTestCase):
+    def setUp(self):
+        url = urlsplit(self.live_server_url)
+        self.host, self.port = url.hostname, url.port
+
+    def test_hammer_keeps_connections_alive(self):
+        results = asyncio.run(
+            hammer(self.host, self.port, ["/race/", "/karts/"], 12, 3)
+        )
+
+        self.assertEqual(results.requests, 12)
+        self.assertEqual(results.errors, 0)
+
+    def test_cookies_of_responses_are_read(self):
+        async def get():
+            connection = Connection(self.host, self.port)
+            response = await connection.request("GET", "/accounts/login/")
+            await connection.close()
+            return response
+
+        response = asyncio.run(get())
+
+        self.assertEqual(response.status, 200)
+        self.assertIn("csrftoken", response.cookies)
+        self.assertIn(b"csrfmiddlewaretoken", response.body)
+
+
+class SignupRushTests(LiveServerTestCase):
+    def test_rush(self):
+        out = StringIO()
+
+        call_command(
+            "signup_rush",
+            url=self.live_server_url,
+            drivers=3,
+            seats=2,
+            karts=1,
+            browse=10,
+            concurrency=3,
+            stdout=out
+        )
+
+        self.assertIn(
+            "2 of 3 logged-in drivers got one of 2 seats", out.getvalue()
+        )
+        self.assertNotIn("FAIL", out.getvalue())
+        self.assertFalse(Race.objects.exists())
+        self.assertFalse(User.objects.exists())
@@ -0,0 +1,153 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from karting import metrics
+from karting.metrics import Metrics
+from karting.models import Race, RaceCategory
+
+User = get_user_model()
+
+
+def observe(registry, view="karting:index", method="GET", **values):
+    registry.observe(**{
+        "view": view,
+        "method": method,
+        "status": 200,
+        "seconds": 0.02,
+        "queries": 3,
+        "query_seconds": 0.004,
+        "size": 2000,
+        **values,
+    })
+
+
+class MetricsRegistryTests(SimpleTestCase):
+    def test_histograms_are_cumulative(self):
+        registry = Metrics(max_series=10)
+        observe(registry, seconds=0.02)
+        observe(registry, seconds=0.3, size=None)
+
+        text = registry.render()
+
+        labels = 'view="karting:index",method="GET",status="2xx"'
+        bucket = f"karting_request_duration_seconds_bucket{{{labels},le="
+        self.assertIn(f'{bucket}"0.01"}} 0', text)
+        self.assertIn(f'{bucket}"0.025"}} 1', text)
+        self.assertIn(f'{bucket}"+Inf"}} 2', text)
+        self.assertIn(f"karting_request_queries_sum{{{labels}}} 6", text)
+        # streaming responses have no size
+        self.assertIn(f"karting_response_size_bytes_count{{{labels}}} 1", text)
+
+    def test_label_combinations_are_capped(self):
+        registry = Metrics(max_series=2)
+        for view in ("a", "b", "c", "d"):
+            observe(registry, view=view)
+        observe(registry, method="BREW")
+
+        totals = registry.collect()
+
+        self.assertEqual(
+            set(totals),
+            {
+                ("a", "GET", "2xx"),
+                ("b", "GET", "2xx"),
+                ("other", "other", "other"),
+            }
+        )
+        self.assertEqual(totals[("other", "other", "other")][0].counts[2], 3)
+
+    def test_shards_of_finished_threads_are_folded(self):
+        registry = Metrics(max_series=10)
+        for _ in range(3):
+            thread = threading.Thread(target=observe, args=(registry,))
+            thread.start()
+            thread.join()
+        observe(registry)
+
+        duration = registry.collect()[("karting:index", "GET", "2xx")][0]
+
+        self.assertEqual(len(registry._shards), 1)
+        self.assertEqual(sum(duration.counts), 4)
+
+
+class MetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        metrics.registry.reset()
+        category = RaceCategory.objects.create(
+            name="Category 1",
+            description="Description 1",
+            min_age=18,
+            max_age=35
+        )
+        Race.objects.create(
+            name="Race 1",
+            category=category,
+            date=timezone.now().date() + timezone.timedelta(days=5),
+            max_participants=3
+        )
+
+    def tearDown(self):
+        metrics.registry.reset()
+
+    def test_requests_are_recorded_per_view(self):
+        response = self.client.get(reverse("karting:race-list"))
+        self.client.get("/no-such-page/")
+
+        totals = metrics.registry.collect()
+
+        duration, queries, query_seconds, size = totals[
+            ("karting:race-list", "GET", "2xx")
+        ]
+        self.assertEqual(sum(duration.counts), 1)
+        self.assertGreater(queries.sum, 0)
+        self.assertGreater(query_seconds.sum, 0)
+        self.assertEqual(size.sum, len(response.content))
+        self.assertIn(("unmatched", "GET", "4xx"), totals)
+
+    async def test_async_views_count_their_queries(self):
+        await self.async_client.get(reverse("karting:race-live", args=[0]))
+
+        totals = metrics.registry.collect()
+
+        queries = totals[("karting:race-live", "GET", "4xx")][1]
+        self.assertEqual(queries.sum, 1)
+
+    def test_endpoint_serves_internal_addresses(self):
+        self.client.get(reverse("karting:index"))
+
+        response = self.client.get(reverse("karting:metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        self.assertIn(
+            b'karting_request_queries_count{view="karting:index",'
+            b'method="GET",status="2xx"} 1',
+            response.content
+        )
+
+    def test_endpoint_serves_staff_only_from_outside(self):
+        url = reverse("karting:metrics")
+        outside = {"REMOTE_ADDR": "203.0.113.7"}
+        driver = User.objects.create_user(
+            username="driver",
+            password="password",
+            date_of_birth="1990-01-01"
+        )
+        staff = User.objects.create_user(
+            username="staff",
+            password="password",
+            date_of_birth="1990-01-01",
+            is_staff=True
+        )
+
+        self.assertEqual(self.client.get(url, **outside).status_code, 403)
+        self.client.force_login(driver)
+        self.assertEqual(self.client.get(url, **outside).status_code, 403)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(url, **outside).status_code, 200)
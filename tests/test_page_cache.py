@@ -0,0 +1,130 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.vary import vary_on_headers
+
+from karting.cache import anonymous_page_cache, page_cache_stats
+from karting.models import Race, RaceCategory, Kart
+from karting.services import register_for_race
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = RaceCategory.objects.create(
+            name="Category 1",
+            description="Description 1",
+            min_age=18,
+            max_age=35
+        )
+        self.kart = Kart.objects.create(
+            name="Kart 1",
+            category=self.category,
+            speed=100,
+            description="Fast Kart",
+            available_quantity=2
+        )
+        self.race = Race.objects.create(
+            name="Race 1",
+            category=self.category,
+            date=timezone.now().date() + timezone.timedelta(days=5),
+            max_participants=3
+        )
+        self.driver = User.objects.create_user(
+            username="driver",
+            password="password",
+            date_of_birth="1990-01-01"
+        )
+        self.urls = [
+            reverse("karting:race-list"),
+            reverse("karting:race-detail", args=[self.race.id]),
+            reverse("karting:karts-list"),
+            reverse("karting:kart-detail", args=[self.kart.id]),
+        ]
+
+    def test_hit_rate(self):
+        for _ in range(10):
+            for url in self.urls:
+                self.client.get(url)
+
+        stats = page_cache_stats()
+        self.assertEqual(stats["misses"], len(self.urls))
+        self.assertEqual(stats["hits"], 9 * len(self.urls))
+        self.assertEqual(stats["hit_rate"], 0.9)
+
+    def test_hit_skips_the_database(self):
+        url = reverse("karting:race-detail", args=[self.race.id])
+        first = self.client.get(url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+
+        self.assertEqual(first["X-Page-Cache"], "miss")
+        self.assertEqual(second["X-Page-Cache"], "hit")
+        self.assertEqual(first.content, second.content)
+
+    def test_query_string_is_part_of_the_key(self):
+        url = reverse("karting:karts-list")
+        self.client.get(url)
+
+        response = self.client.get(url, {"search": "Kart"})
+
+        self.assertEqual(response["X-Page-Cache"], "miss")
+
+    def test_model_change_invalidates(self):
+        url = reverse("karting:race-detail", args=[self.race.id])
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            register_for_race(self.driver, self.race, self.kart)
+        response = self.client.get(url)
+
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, 'id="participant-count">1<')
+
+    def test_category_change_invalidates_kart_pages(self):
+        url = reverse("karting:kart-detail", args=[self.kart.id])
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Renamed"
+            self.category.save()
+        response = self.client.get(url)
+
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, "Renamed")
+
+    def test_vary_headers_split_the_cache(self):
+        calls = []
+
+        @anonymous_page_cache(Race)
+        @vary_on_headers("Accept-Language")
+        def view(request):
+            calls.append(request.headers.get("accept-language"))
+            return HttpResponse(request.headers.get("accept-language"))
+
+        factory = RequestFactory()
+        for language in ["en", "uk", "en", "uk"]:
+            response = view(
+                factory.get("/", headers={"accept-language": language})
+            )
+            self.assertEqual(response.content, language.encode())
+
+        self.assertEqual(calls, ["en", "uk"])
+
+    def test_authenticated_users_bypass(self):
+        url = reverse("karting:race-detail", args=[self.race.id])
+        self.client.get(url)
+        self.client.force_login(self.driver)
+
+        response = self.client.get(url)
+
+        self.assertNotIn("X-Page-Cache", response)
+        self.assertContains(response, "csrfmiddlewaretoken")
+        self.client.logout()
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "hit")
@@ -0,0 +1,218 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from karting.models import Race, RaceCategory, Kart, RaceParticipation
+from karting.services import register_for_race, unregister_from_race
+
+User = get_user_model()
+
+
+class ParticipantCountTests(TestCase):
+    def setUp(self):
+        self.category = RaceCategory.objects.create(
+            name="Category 1",
+            description="Description 1",
+            min_age=18,
+            max_age=35
+        )
+        self.kart = Kart.objects.create(
+            name="Kart 1",
+            category=self.category,
+            speed=100,
+            description="Fast Kart",
+            available_quantity=5
+        )
+        self.race = Race.objects.create(
+            name="Race 1",
+            category=self.category,
+            date=timezone.now().date() + timezone.timedelta(days=5),
+            max_participants=2
+        )
+        self.user = User.objects.create_user(
+            username="testuser",
+            password="password",
+            date_of_birth="1990-01-01"
+        )
+        self.admin = User.objects.create_superuser(
+            username="admin",
+            email="admin@example.com",
+            password="password"
+        )
+
+    def test_register_and_unregister_update_counter(self):
+        register_for_race(self.user, self.race, self.kart)
+        self.race.refresh_from_db()
+        self.assertEqual(self.race.participant_count, 1)
+
+        unregister_from_race(self.user, self.race.id)
+        self.race.refresh_from_db()
+        self.assertEqual(self.race.participant_count, 0)
+
+    def test_is_full_reads_column(self):
+        self.race.participant_count = 2
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.race.is_full())
+
+    def test_admin_delete_releases_seat_and_kart(self):
+        participation = register_for_race(self.user, self.race, self.kart)
+        self.client.login(username="admin", password="password")
+
+        self.client.post(
+            reverse(
+                "admin:karting_raceparticipation_delete",
+                args=[participation.id]
+            ),
+            {"post": "yes"}
+        )
+
+        self.race.refresh_from_db()
+        self.kart.refresh_from_db()
+        self.assertEqual(self.race.participant_count, 0)
+        self.assertEqual(self.kart.available_quantity, 5)
+        self.assertFalse(RaceParticipation.objects.exists())
+
+    def test_clear_past_registrations_resets_counter(self):
+        register_for_race(self.user, self.race, self.kart)
+        self.race.date = timezone.now().date() - timezone.timedelta(days=1)
+        self.race.save()
+
+        self.race.clear_past_registrations()
+
+        self.race.refresh_from_db()
+        self.kart.refresh_from_db()
+        self.assertEqual(self.race.participant_count, 0)
+        self.assertEqual(self.kart.available_quantity, 5)
+
+    def test_recount_command_repairs_drift(self):
+        RaceParticipation.objects.create(
+            user=self.user,
+            race=self.race,
+            kart=self.kart
+        )
+        out = StringIO()
+
+        call_command("recount_participants", stdout=out)
+
+        self.race.refresh_from_db()
+        self.assertEqual(self.race.participant_count, 1)
+        self.assertIn("1 races", out.getvalue())
+
+    def test_admin_change_moves_seat_and_kart(self):
+        participation = register_for_race(self.user, self.race, self.kart)
+        other_race = Race.objects.create(
+            name="Race 2",
+            category=self.category,
+            date=self.race.date,
+            max_participants=2
+        )
+        other_kart = Kart.objects.create(
+            name="Kart 2",
+            category=self.category,
+            speed=90,
+            description="Kart",
+            available_quantity=5
+        )
+        self.client.login(username="admin", password="password")
+
+        self.client.post(
+            reverse(
+                "admin:karting_raceparticipation_change",
+                args=[participation.id]
+            ),
+            {
+                "user": self.user.id,
+                "race": other_race.id,
+                "kart": other_kart.id,
+            }
+        )
+
+        for obj, field, expected in (
+            (self.race, "participant_count", 0),
+            (other_race, "participant_count", 1),
+            (self.kart, "available_quantity", 5),
+            (other_kart, "available_quantity", 4),
+        ):
+            obj.refresh_from_db()
+            self.assertEqual(getattr(obj, field), expected)
+
+    def add_in_admin(self, user):
+        self.client.login(username="admin", password="password")
+        return self.client.post(
+            reverse("admin:karting_raceparticipation_add"),
+            {"user": user.id, "race": self.race.id, "kart": self.kart.id}
+        )
+
+    def test_admin_add_takes_seat_and_kart(self):
+        self.add_in_admin(self.user)
+
+        self.race.refresh_from_db()
+        self.kart.refresh_from_db()
+        self.assertEqual(self.race.participant_count, 1)
+        self.assertEqual(self.kart.available_quantity, 4)
+
+    def test_admin_add_refuses_kart_out_of_stock(self):
+        Kart.objects.filter(pk=self.kart.pk).update(available_quantity=0)
+
+        response = self.add_in_admin(self.user)
+
+        self.assertContains(
+            response, "The selected kart is no longer available."
+        )
+        self.assertFalse(RaceParticipation.objects.exists())
+        self.race.refresh_from_db()
+        self.kart.refresh_from_db()
+        self.assertEqual(self.race.participant_count, 0)
+        self.assertEqual(self.kart.available_quantity, 0)
+
+    def test_admin_add_refuses_full_race(self):
+        register_for_race(self.user, self.race, self.kart)
+        register_for_race(self.admin, self.race, self.kart)
+        driver = User.objects.create_user(
+            username="late",
+            password="password",
+            date_of_birth="1990-01-01"
+        )
+
+        response = self.add_in_admin(driver)
+
+        self.assertContains(response, "This race is full.")
+        self.race.refresh_from_db()
+        self.kart.refresh_from_db()
+        self.assertEqual(self.race.participant_count, 2)
+        self.assertEqual(self.kart.available_quantity, 3)
+
+    def test_deleting_a_driver_releases_seat_and_kart(self):
+        register_for_race(self.user, self.race, self.kart)
+        register_for_race(self.admin, self.race, self.kart)
+
+        self.user.delete()
+
+        self.race.refresh_from_db()
+        self.kart.refresh_from_db()
+        self.assertEqual(self.race.participant_count, 1)
+        self.assertEqual(self.kart.available_quantity, 4)
+
+    def test_deleting_a_race_hands_karts_back(self):
+        register_for_race(self.user, self.race, self.kart)
+
+        self.race.delete()
+
+        self.kart.refresh_from_db()
+        self.assertEqual(self.kart.available_quantity, 5)
+
+    def test_saving_a_race_keeps_concurrent_sign_ups(self):
+        stale = Race.objects.get(pk=self.race.pk)
+        register_for_race(self.user, self.race, self.kart)
+
+        stale.max_participants = 3
+        stale.save()
+
+        self.race.refresh_from_db()
+        self.assertEqual(self.race.max_participants, 3)
+        self.assertEqual(self.race.participant_count, 1)
@@ -0,0 +1,428 @@
+import json
+import os
+import time
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+
+from karting import ical
+from karting.models import (
+    Race,
+    RaceCategory,
+    Kart,
+    RaceParticipation,
+    RegistrationTicket
+)
+
+User = get_user_model()
+
+REPORT_PATH = os.environ.get(
+    "QUERY_BUDGET_REPORT",
+    os.path.join(settings.BASE_DIR, "query_budget.json")
+)
+
+# Maximum number of queries per URL name. Budgets do not depend on the
+# size of the seeded data, so any per-row query (N+1) breaks them. The API
+# counts a cold version cache: two queries per model it depends on.
+BUDGETS = {
+    "karting:index": 7,
+    "karting:karts-list": 2,
+    "karting:kart-create": 3,
+    "karting:kart-detail": 1,
+    "karting:kart-update": 4,
+    "karting:kart-delete": 3,
+    "karting:race-list": 4,
+    "karting:eligible-races": 3,
+    "karting:race-create": 3,
+    "karting:race-detail": 3,
+    "karting:race-live": 1,
+    "karting:race-calendar": 1,
+    "karting:category-calendar": 2,
+    "karting:user-calendar": 1,
+    "karting:race-update": 4,
+    "karting:race-delete": 3,
+    "karting:register-for-race": 16,
+    "karting:register-group-for-race": 14,
+    "karting:registration-ticket": 3,
+    "karting:unregister-from-race": 8,
+    "karting:clear-registrations": 15,
+    "karting:metrics": 0,
+    "accounts:login": 10,
+    "accounts:logout": 4,
+    "accounts:register": 0,
+    "api-v1:race-list": 3,
+    "api-v1:race-detail": 3,
+    "api-v1:race-availability": 6,
+    "api-v1:kart-list": 3,
+    "api-v1:kart-detail": 3,
+    "api-v1:category-list": 3,
+    "api-v1:suggestions": 3,
+}
+
+
+class QueryBudgetTests(TestCase):
+    report = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.now().date()
+        adult = today - timezone.timedelta(days=25 * 365)
+        categories = [
+            RaceCategory.objects.create(
+                name=f"Category {i}",
+                description="Description",
+                min_age=18,
+                max_age=60
+            )
+            for i in range(5)
+        ]
+        karts = Kart.objects.bulk_create(
+            Kart(
+                name=f"Kart {i}",
+                category=categories[i % 5],
+                speed=60 + i,
+                description="Kart",
+                available_quantity=20
+            )
+            for i in range(40)
+        )
+        races = Race.objects.bulk_create(
+            Race(
+                name=f"Race {i}",
+                category=categories[i % 5],
+                date=today + timezone.timedelta(days=i - 10),
+                max_participants=50,
+                participant_count=10
+            )
+            for i in range(60)
+        )
+        users = User.objects.bulk_create(
+            User(
+                username=f"driver{i}",
+                email=f"driver{i}@example.com",
+                date_of_birth=adult
+            )
+            for i in range(30)
+        )
+        RaceParticipation.objects.bulk_create(
+            RaceParticipation(
+                user=users[(i + j) % 30],
+                race=race,
+                kart=karts[i % 5 + 5 * (j % 8)]
+            )
+            for i, race in enumerate(races)
+            for j in range(10)
+        )
+        cls.staff = User.objects.create_user(
+            username="staff",
+            password="password",
+            email="staff@example.com",
+            is_staff=True,
+            date_of_birth=adult
+        )
+        cls.driver = users[0]
+        cls.race = races[15]
+        cls.kart = karts[0]
+        cls.ticket = RegistrationTicket.objects.create(
+            user=cls.driver,
+            race=cls.race,
+            kart=cls.kart
+        )
+
+    def setUp(self):
+        # measure the cold path of cached views
+        cache.clear()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with open(REPORT_PATH, "w") as report:
+            json.dump(
+                {
+                    "generated_at": timezone.now().isoformat(),
+                    "results": cls.report,
+                },
+                report,
+                indent=2,
+                sort_keys=True
+            )
+
+    def assert_within_budget(self, name, request, *args, **kwargs):
+        url = reverse(name, args=args)
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = request(url, **kwargs)
+            elapsed = time.perf_counter() - started
+
+        self.report[self._testMethodName] = {
+            "url": name,
+            "method": request.__name__.upper(),
+            "budget": BUDGETS[name],
+            "queries": len(queries),
+            "seconds": round(elapsed, 4),
+            "status": response.status_code,
+        }
+        self.assertLess(response.status_code, 400)
+        self.assertLessEqual(
+            len(queries),
+            BUDGETS[name],
+            "\n".join(query["sql"] for query in queries)
+        )
+        return response
+
+    def test_every_url_has_a_budget(self):
+        resolver = get_resolver()
+        names = {
+            f"{namespace}:{name}"
+            for namespace in ("karting", "accounts", "api-v1")
+            for name in resolver.namespace_dict[namespace][1].reverse_dict
+            if isinstance(name, str)
+        }
+
+        self.assertEqual(names - BUDGETS.keys(), set())
+
+    def test_index(self):
+        self.assert_within_budget("karting:index", self.client.get)
+
+    def test_index_staff(self):
+        self.client.force_login(self.staff)
+        self.assert_within_budget("karting:index", self.client.get)
+
+    def test_kart_list(self):
+        self.assert_within_budget("karting:karts-list", self.client.get)
+
+    def test_kart_list_search(self):
+        self.assert_within_budget(
+            "karting:karts-list",
+            self.client.get,
+            data={"search": "Category 1"}
+        )
+
+    def test_kart_create(self):
+        self.client.force_login(self.staff)
+        self.assert_within_budget("karting:kart-create", self.client.get)
+
+    def test_kart_detail(self):
+        self.assert_within_budget(
+            "karting:kart-detail",
+            self.client.get,
+            self.kart.id
+        )
+
+    def test_kart_update(self):
+        self.client.force_login(self.staff)
+        self.assert_within_budget(
+            "karting:kart-update",
+            self.client.get,
+            self.kart.id
+        )
+
+    def test_kart_delete(self):
+        self.client.force_login(self.staff)
+        self.assert_within_budget(
+            "karting:kart-delete",
+            self.client.get,
+            self.kart.id
+        )
+
+    def test_race_list(self):
+        self.assert_within_budget("karting:race-list", self.client.get)
+
+    def test_race_list_staff(self):
+        self.client.force_login(self.staff)
+        self.assert_within_budget(
+            "karting:race-list",
+            self.client.get,
+            data={"page": 3}
+        )
+
+    def test_race_create(self):
+        self.client.force_login(self.staff)
+        self.assert_within_budget("karting:race-create", self.client.get)
+
+    def test_race_detail(self):
+        self.client.force_login(self.driver)
+        self.assert_within_budget(
+            "karting:race-detail",
+            self.client.get,
+            self.race.id
+        )
+
+    def test_race_live(self):
+        def get(url, **kwargs):
+            return async_to_sync(self.async_client.get)(url, **kwargs)
+
+        response = self.assert_within_budget(
+            "karting:race-live",
+            get,
+            self.race.id
+        )
+        self.assertTrue(response.streaming)
+
+    def test_eligible_races(self):
+        self.client.force_login(self.driver)
+        self.assert_within_budget("karting:eligible-races", self.client.get)
+
+    def get_feed(self, url, **kwargs):
+        # the events are read while the body streams
+        response = self.client.get(url, **kwargs)
+        b"".join(response.streaming_content)
+        return response
+
+    def test_race_calendar(self):
+        self.assert_within_budget("karting:race-calendar", self.get_feed)
+
+    def test_category_calendar(self):
+        self.assert_within_budget(
+            "karting:category-calendar",
+            self.get_feed,
+            self.race.category_id
+        )
+
+    def test_user_calendar(self):
+        self.assert_within_budget(
+            "karting:user-calendar",
+            self.get_feed,
+            ical.feed_token(self.driver)
+        )
+
+    def test_race_update(self):
+        self.client.force_login(self.staff)
+        self.assert_within_budget(
+            "karting:race-update",
+            self.client.get,
+            self.race.id
+        )
+
+    def test_race_delete(self):
+        self.client.force_login(self.staff)
+        self.assert_within_budget(
+            "karting:race-delete",
+            self.client.get,
+            self.race.id
+        )
+
+    def test_register_for_race_form(self):
+        self.client.force_login(self.staff)
+        self.assert_within_budget(
+            "karting:register-for-race",
+            self.client.get,
+            self.race.id
+        )
+
+    def test_register_for_race(self):
+        self.client.force_login(self.staff)
+        self.assert_within_budget(
+            "karting:register-for-race",
+            self.client.post,
+            self.race.id,
+            data={"kart": self.kart.id}
+        )
+
+    def test_register_group_form(self):
+        self.client.force_login(self.staff)
+        self.assert_within_budget(
+            "karting:register-group-for-race",
+            self.client.get,
+            self.race.id
+        )
+
+    def test_register_group(self):
+        self.client.force_login(self.staff)
+        self.assert_within_budget(
+            "karting:register-group-for-race",
+            self.client.post,
+            self.race.id,
+            data={
+                "drivers": "\n".join(f"driver{i}" for i in range(10, 30))
+            }
+        )
+
+    def test_registration_ticket(self):
+        self.client.force_login(self.driver)
+        self.assert_within_budget(
+            "karting:registration-ticket",
+            self.client.get,
+            self.race.id,
+            self.ticket.id
+        )
+
+    def test_unregister_from_race(self):
+        self.client.force_login(self.driver)
+        participation = self.driver.race_participations.first()
+        self.assert_within_budget(
+            "karting:unregister-from-race",
+            self.client.post,
+            participation.race_id
+        )
+
+    def test_clear_registrations(self):
+        self.client.force_login(self.staff)
+        self.assert_within_budget(
+            "karting:clear-registrations",
+            self.client.post
+        )
+
+    def test_metrics(self):
+        self.assert_within_budget("karting:metrics", self.client.get)
+
+    def test_login_form(self):
+        self.assert_within_budget("accounts:login", self.client.get)
+
+    def test_login(self):
+        self.assert_within_budget(
+            "accounts:login",
+            self.client.post,
+            data={"username": "staff@example.com", "password": "password"}
+        )
+
+    def test_logout(self):
+        self.client.force_login(self.driver)
+        self.assert_within_budget("accounts:logout", self.client.post)
+
+    def test_register_form(self):
+        self.assert_within_budget("accounts:register", self.client.get)
+
+    def test_api_race_list(self):
+        self.assert_within_budget("api-v1:race-list", self.client.get)
+
+    def test_api_race_detail(self):
+        self.assert_within_budget(
+            "api-v1:race-detail",
+            self.client.get,
+            self.race.id
+        )
+
+    def test_api_race_availability(self):
+        self.assert_within_budget(
+            "api-v1:race-availability",
+            self.client.get,
+            self.race.id
+        )
+
+    def test_api_kart_list(self):
+        self.assert_within_budget("api-v1:kart-list", self.client.get)
+
+    def test_api_kart_detail(self):
+        self.assert_within_budget(
+            "api-v1:kart-detail",
+            self.client.get,
+            self.kart.id
+        )
+
+    def test_api_category_list(self):
+        self.assert_within_budget("api-v1:category-list", self.client.get)
+
+    def test_api_suggestions(self):
+        self.assert_within_budget(
+            "api-v1:suggestions",
+            self.client.get,
+            data={"q": "kart"}
+        )
@@ -0,0 +1,90 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+
+from karting.models import Race, RaceCategory
+from karting.querycheck import (
+    RepeatedQueryError,
+    RepeatedQueryMiddleware,
+    check_queries
+)
+
+
+def category_names(races) -> list[str]:
+    return [race.category.name for race in races]
+
+
+def race_list(request):
+    return HttpResponse(", ".join(category_names(Race.objects.all())))
+
+
+class QueryCheckTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.now().date()
+        for i in range(3):
+            category = RaceCategory.objects.create(
+                name=f"Category {i}",
+                description="Description",
+                min_age=18,
+                max_age=35
+            )
+            for j in range(2):
+                Race.objects.create(
+                    name=f"Race {i}.{j}",
+                    category=category,
+                    date=today + timezone.timedelta(days=j + 1),
+                    max_participants=10
+                )
+
+    def setUp(self):
+        self.request = RequestFactory().get("/race/")
+
+    def test_repeated_shapes_are_reported_with_their_caller(self):
+        with check_queries(threshold=5) as check:
+            category_names(Race.objects.all())
+
+        [repeated] = check.repeated()
+        self.assertEqual(repeated.count, 6)
+        self.assertIn('FROM "karting_racecategory"', repeated.sql)
+        self.assertIn("in category_names", str(repeated))
+        self.assertIn(__file__, repeated.stack[-1])
+
+    def test_select_related_is_not_reported(self):
+        with check_queries(threshold=1) as check:
+            category_names(Race.objects.select_related("category"))
+
+        self.assertEqual(check.repeated(), [])
+
+    async def test_queries_of_async_code_are_counted(self):
+        with check_queries(threshold=5) as check:
+            await sync_to_async(category_names)(Race.objects.all())
+
+        self.assertEqual(len(check.repeated()), 1)
+
+    @override_settings(QUERY_REPEAT_ACTION="log")
+    def test_middleware_logs(self):
+        middleware = RepeatedQueryMiddleware(race_list)
+
+        with self.assertLogs("karting.querycheck", "WARNING") as logs:
+            response = middleware(self.request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Repeated query in GET /race/: 6 x", logs.output[0])
+
+    @override_settings(QUERY_REPEAT_ACTION="raise")
+    def test_middleware_raises(self):
+        middleware = RepeatedQueryMiddleware(race_list)
+
+        with self.assertRaisesMessage(RepeatedQueryError, "in race_list"):
+            middleware(self.request)
+
+    @override_settings(QUERY_REPEAT_ACTION="off")
+    def test_middleware_can_be_turned_off(self):
+        middleware = RepeatedQueryMiddleware(race_list)
+
+        with self.assertNoLogs("karting.querycheck"):
+            response = middleware(self.request)
+
+        self.assertEqual(response.status_code, 200)
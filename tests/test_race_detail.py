@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from karting.models import Race, RaceCategory, Kart
+from karting.services import register_for_race
+
+User = get_user_model()
+
+
+class RaceDetailQueryBudgetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = RaceCategory.objects.create(
+            name="Category 1",
+            description="Description 1",
+            min_age=18,
+            max_age=35
+        )
+        self.kart = Kart.objects.create(
+            name="Kart 1",
+            category=self.category,
+            speed=100,
+            description="Fast Kart",
+            available_quantity=5
+        )
+        self.race = Race.objects.create(
+            name="Race 1",
+            category=self.category,
+            date=timezone.now().date() + timezone.timedelta(days=5),
+            max_participants=10
+        )
+        self.user = User.objects.create_user(
+            username="testuser",
+            password="password",
+            date_of_birth=timezone.now().date() - timezone.timedelta(
+                days=25 * 365
+            )
+        )
+        self.url = reverse("karting:race-detail", args=[self.race.id])
+
+    def test_anonymous_visitor_costs_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+
+        self.assertContains(response, 'id="participant-count">0<')
+
+    def test_logged_in_driver_costs_one_race_query(self):
+        register_for_race(self.user, self.race, self.kart)
+        self.client.login(username="testuser", password="password")
+
+        # session and user, then the annotated race
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+
+        self.assertTrue(response.context["is_registered"])
+        self.assertFalse(response.context["can_register"])
+        self.assertContains(response, 'id="participant-count">1<')
+
+    def test_eligible_driver_sees_sign_up_button(self):
+        self.client.login(username="testuser", password="password")
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+
+        self.assertFalse(response.context["is_registered"])
+        self.assertTrue(response.context["is_eligible"])
+        self.assertContains(response, "Sign Up for this Race")
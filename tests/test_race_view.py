@@ -2,11 +2,13 @@ from datetime import date, timedelta
 
 from django.urls import reverse
 from django.test import TestCase
+from django.core.cache import cache
 from karting.models import Race, RaceCategory, CustomUser
 
 
 class RaceListViewTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.category = RaceCategory.objects.create(
             name="Category 1",
             description="Description 1",
@@ -83,6 +85,7 @@ class RaceListViewTests(TestCase):
 
 class RaceViewTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.category = RaceCategory.objects.create(
             name="Category 1",
             description="Description 1",
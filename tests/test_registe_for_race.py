@@ -116,6 +116,7 @@ class RegisterForRaceViewTests(TestCase):
                 race=self.race,
                 kart=self.kart
             )
+        Race.objects.recount_participants()
 
         response = self.client.post(
             reverse(
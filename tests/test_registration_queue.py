@@ -0,0 +1,265 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from karting.models import (
+    Race,
+    RaceCategory,
+    Kart,
+    RaceParticipation,
+    RegistrationTicket
+)
+from karting import services
+from karting.services import (
+    hold_kart,
+    process_registration_queue,
+    register_for_race
+)
+from karting_race_manager.celery import app
+
+User = get_user_model()
+
+
+class QueueFixtures:
+    def setUp(self):
+        self.category = RaceCategory.objects.create(
+            name="Category 1",
+            description="Description 1",
+            min_age=18,
+            max_age=35
+        )
+        self.kart = Kart.objects.create(
+            name="Kart 1",
+            category=self.category,
+            speed=100,
+            description="Fast Kart",
+            available_quantity=2
+        )
+        self.race = Race.objects.create(
+            name="Race 1",
+            category=self.category,
+            date=timezone.now().date() + timezone.timedelta(days=5),
+            max_participants=3,
+            queued_registration=True
+        )
+        self.users = [
+            User.objects.create_user(
+                username=f"driver{i}",
+                password="password",
+                date_of_birth="1990-01-01"
+            )
+            for i in range(4)
+        ]
+
+    def enqueue(self, user, kart=None):
+        return RegistrationTicket.objects.create(
+            user=user,
+            race=self.race,
+            kart=kart or self.kart
+        )
+
+
+class RegistrationQueueTests(QueueFixtures, TestCase):
+    def test_post_enqueues_ticket_and_redirects_to_status(self):
+        self.client.login(username="driver0", password="password")
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            response = self.client.post(
+                reverse("karting:register-for-race", args=[self.race.id]),
+                {"kart": self.kart.id}
+            )
+
+        ticket = RegistrationTicket.objects.get()
+        self.assertRedirects(
+            response,
+            reverse(
+                "karting:registration-ticket",
+                args=[self.race.id, ticket.id]
+            )
+        )
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(RaceParticipation.objects.exists())
+
+    def test_without_a_broker_tickets_are_processed_at_once(self):
+        self.client.login(username="driver0", password="password")
+        app.conf.CELERY_TASK_ALWAYS_EAGER = True
+        self.addCleanup(app.conf.update, CELERY_TASK_ALWAYS_EAGER=False)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("karting:register-for-race", args=[self.race.id]),
+                {"kart": self.kart.id}
+            )
+
+        ticket = RegistrationTicket.objects.get()
+        self.assertEqual(ticket.status, RegistrationTicket.Status.CONFIRMED)
+        self.assertTrue(RaceParticipation.objects.exists())
+
+    def test_worker_drains_in_fifo_order(self):
+        tickets = [self.enqueue(user) for user in self.users[:3]]
+
+        processed = process_registration_queue(self.race.id, batch_size=2)
+
+        self.assertEqual(processed, 3)
+        statuses = [
+            ticket.status
+            for ticket in RegistrationTicket.objects.order_by("id")
+        ]
+        self.assertEqual(statuses, ["confirmed", "confirmed", "rejected"])
+        self.kart.refresh_from_db()
+        self.race.refresh_from_db()
+        self.assertEqual(self.kart.available_quantity, 0)
+        self.assertEqual(self.race.participant_count, 2)
+        self.assertEqual(
+            list(
+                RaceParticipation.objects.order_by("id")
+                .values_list("user_id", flat=True)
+            ),
+            [tickets[0].user_id, tickets[1].user_id]
+        )
+
+    def test_batch_rejects_full_race_and_duplicates(self):
+        self.kart.available_quantity = 10
+        self.kart.save()
+        self.enqueue(self.users[0])
+        self.enqueue(self.users[0])
+        for user in self.users[1:]:
+            self.enqueue(user)
+
+        process_registration_queue(self.race.id)
+
+        reasons = list(
+            RegistrationTicket.objects.order_by("id")
+            .values_list("reason", flat=True)
+        )
+        self.assertEqual(reasons, [
+            "",
+            "You are already registered for this race.",
+            "",
+            "",
+            "This race is full.",
+        ])
+        self.race.refresh_from_db()
+        self.assertEqual(self.race.participant_count, 3)
+
+    def test_batch_leaves_held_seats_alone(self):
+        self.race.max_participants = 2
+        self.race.save()
+        hold_kart(self.users[3], self.race)
+        self.enqueue(self.users[0])
+        self.enqueue(self.users[1])
+
+        process_registration_queue(self.race.id)
+
+        reasons = list(
+            RegistrationTicket.objects.order_by("id")
+            .values_list("reason", flat=True)
+        )
+        self.assertEqual(reasons, ["", "This race is full."])
+        register_for_race(self.users[3], self.race, self.kart)
+
+    def test_batch_leaves_held_karts_alone(self):
+        self.kart.available_quantity = 1
+        self.kart.save()
+        hold_kart(self.users[3], self.race)
+        ticket = self.enqueue(self.users[0])
+
+        process_registration_queue(self.race.id)
+
+        ticket.refresh_from_db()
+        self.assertEqual(
+            ticket.reason,
+            "The selected kart is no longer available."
+        )
+        register_for_race(self.users[3], self.race, self.kart)
+
+    def test_batch_query_count_does_not_grow_with_tickets(self):
+        self.kart.available_quantity = 10
+        self.kart.save()
+        for user in self.users[:3]:
+            self.enqueue(user)
+
+        # tickets, race, holds, registered users, karts, insert, hold
+        # removal, race and kart updates, ticket update, savepoints and the
+        # final race lock and empty probe
+        with self.assertNumQueries(16):
+            process_registration_queue(self.race.id)
+
+    def test_ticket_status_page(self):
+        ticket = self.enqueue(self.users[0])
+        self.client.login(username="driver0", password="password")
+        url = reverse(
+            "karting:registration-ticket",
+            args=[self.race.id, ticket.id]
+        )
+
+        response = self.client.get(url)
+        self.assertContains(response, "Your request is in the queue.")
+
+        process_registration_queue(self.race.id)
+        response = self.client.get(url)
+        self.assertContains(response, "You are registered for this race.")
+
+    def test_ticket_status_page_is_private(self):
+        ticket = self.enqueue(self.users[0])
+        self.client.login(username="driver1", password="password")
+
+        response = self.client.get(
+            reverse(
+                "karting:registration-ticket",
+                args=[self.race.id, ticket.id]
+            )
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+
+class ConcurrentQueueTests(QueueFixtures, TransactionTestCase):
+    def test_interleaved_drains_keep_ticket_order(self):
+        self.kart.available_quantity = 10
+        self.kart.save()
+        tickets = [self.enqueue(user) for user in self.users]
+        apply_tickets = services._apply_tickets
+        calls = []
+
+        def slow_apply(race, batch):
+            # Give the other worker time to reach for the queue while the
+            # first batch is still being applied.
+            calls.append([ticket.id for ticket in batch])
+            if len(calls) == 1:
+                time.sleep(0.2)
+            apply_tickets(race, batch)
+
+        def drain():
+            try:
+                process_registration_queue(self.race.id, batch_size=2)
+            finally:
+                connections.close_all()
+
+        with mock.patch.object(services, "_apply_tickets", slow_apply):
+            threads = [threading.Thread(target=drain) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(
+            calls,
+            [[tickets[0].id, tickets[1].id], [tickets[2].id, tickets[3].id]]
+        )
+        statuses = [
+            RegistrationTicket.objects.get(pk=ticket.pk).status
+            for ticket in tickets
+        ]
+        self.assertEqual(statuses, [
+            RegistrationTicket.Status.CONFIRMED,
+            RegistrationTicket.Status.CONFIRMED,
+            RegistrationTicket.Status.CONFIRMED,
+            RegistrationTicket.Status.REJECTED
+        ])
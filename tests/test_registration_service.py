@@ -0,0 +1,176 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import TestCase, TransactionTestCase
+
+from karting.models import Race, RaceCategory, Kart, RaceParticipation
+from karting.services import (
+    AlreadyRegisteredError,
+    KartUnavailableError,
+    RaceFullError,
+    RegistrationError,
+    register_for_race,
+    unregister_from_race
+)
+
+User = get_user_model()
+
+
+class RegistrationFixtures:
+    def setUp(self):
+        self.category = RaceCategory.objects.create(
+            name="Category 1",
+            description="Description 1",
+            min_age=18,
+            max_age=35
+        )
+        self.kart = Kart.objects.create(
+            name="Kart 1",
+            category=self.category,
+            speed=100,
+            description="Fast Kart",
+            available_quantity=1
+        )
+        self.race = Race.objects.create(
+            name="Race 1",
+            category=self.category,
+            date="2030-10-01",
+            max_participants=2
+        )
+        self.users = [
+            User.objects.create_user(
+                username=f"driver{i}",
+                password="password",
+                date_of_birth="1990-01-01"
+            )
+            for i in range(3)
+        ]
+
+
+class RegistrationServiceTests(RegistrationFixtures, TestCase):
+    def test_register_takes_fixed_number_of_queries(self):
+        # savepoint, seat update, duplicate check, kart update,
+        # hold cleanup, insert, release
+        with self.assertNumQueries(7):
+            register_for_race(self.users[0], self.race, self.kart)
+
+        self.kart.refresh_from_db()
+        self.assertEqual(self.kart.available_quantity, 0)
+
+    def test_kart_is_never_oversold(self):
+        register_for_race(self.users[0], self.race, self.kart)
+
+        with self.assertRaises(KartUnavailableError):
+            register_for_race(self.users[1], self.race, self.kart)
+
+        self.kart.refresh_from_db()
+        self.assertEqual(self.kart.available_quantity, 0)
+        self.assertEqual(RaceParticipation.objects.count(), 1)
+
+    def test_race_is_never_overbooked(self):
+        self.kart.available_quantity = 10
+        self.kart.save()
+
+        register_for_race(self.users[0], self.race, self.kart)
+        register_for_race(self.users[1], self.race, self.kart)
+
+        with self.assertRaises(RaceFullError):
+            register_for_race(self.users[2], self.race, self.kart)
+
+        self.kart.refresh_from_db()
+        self.assertEqual(self.kart.available_quantity, 8)
+
+    def test_duplicate_registration_rolls_back(self):
+        self.kart.available_quantity = 10
+        self.kart.save()
+        register_for_race(self.users[0], self.race, self.kart)
+
+        with self.assertRaises(AlreadyRegisteredError):
+            register_for_race(self.users[0], self.race, self.kart)
+
+        self.kart.refresh_from_db()
+        self.assertEqual(self.kart.available_quantity, 9)
+
+    def test_kart_from_other_category_is_rejected(self):
+        other_category = RaceCategory.objects.create(
+            name="Category 2",
+            description="Description 2",
+            min_age=6,
+            max_age=12
+        )
+        other_kart = Kart.objects.create(
+            name="Kart 2",
+            category=other_category,
+            speed=60,
+            description="Slow Kart",
+            available_quantity=3
+        )
+
+        with self.assertRaises(KartUnavailableError):
+            register_for_race(self.users[0], self.race, other_kart)
+
+    def test_unregister_returns_kart(self):
+        register_for_race(self.users[0], self.race, self.kart)
+
+        unregister_from_race(self.users[0], self.race.id)
+
+        self.kart.refresh_from_db()
+        self.assertEqual(self.kart.available_quantity, 1)
+        self.assertFalse(RaceParticipation.objects.exists())
+
+    def test_unregister_without_registration(self):
+        with self.assertRaises(RaceParticipation.DoesNotExist):
+            unregister_from_race(self.users[0], self.race.id)
+
+
+class ConcurrentRegistrationTests(RegistrationFixtures, TransactionTestCase):
+    def register_at_once(self, *users):
+        """Register ``users`` from a thread each, released together, and
+        return what each got: ``None`` or the error class."""
+        ready = threading.Barrier(len(users))
+        outcomes = {}
+
+        def register(user):
+            ready.wait()
+            try:
+                register_for_race(user, self.race, self.kart)
+                outcomes[user.username] = None
+            except RegistrationError as error:
+                outcomes[user.username] = type(error)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=register, args=(user,)) for user in users
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return list(outcomes.values())
+
+    def test_last_seat_goes_to_one_driver(self):
+        self.race.max_participants = 1
+        self.race.save()
+        self.kart.available_quantity = 10
+        self.kart.save()
+
+        outcomes = self.register_at_once(self.users[0], self.users[1])
+
+        self.assertCountEqual(outcomes, [None, RaceFullError])
+        self.race.refresh_from_db()
+        self.kart.refresh_from_db()
+        self.assertEqual(self.race.participant_count, 1)
+        self.assertEqual(self.kart.available_quantity, 9)
+        self.assertEqual(RaceParticipation.objects.count(), 1)
+
+    def test_last_kart_goes_to_one_driver(self):
+        outcomes = self.register_at_once(self.users[0], self.users[1])
+
+        self.assertCountEqual(outcomes, [None, KartUnavailableError])
+        self.race.refresh_from_db()
+        self.kart.refresh_from_db()
+        self.assertEqual(self.race.participant_count, 1)
+        self.assertEqual(self.kart.available_quantity, 0)
+        self.assertEqual(RaceParticipation.objects.count(), 1)
@@ -0,0 +1,131 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from karting.models import Race, RaceCategory, Kart
+from karting.search import rebuild_index, search
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.junior = RaceCategory.objects.create(
+            name="Junior Cup",
+            description="Description 1",
+            min_age=8,
+            max_age=14
+        )
+        self.senior = RaceCategory.objects.create(
+            name="Senior Series",
+            description="Description 2",
+            min_age=18,
+            max_age=60
+        )
+        date = timezone.now().date() + timezone.timedelta(days=5)
+        self.grand_prix = Race.objects.create(
+            name="Grand Prix",
+            category=self.senior,
+            date=date,
+            max_participants=10
+        )
+        self.night_race = Race.objects.create(
+            name="Night Race",
+            category=self.junior,
+            date=date,
+            max_participants=10
+        )
+        self.kart = Kart.objects.create(
+            name="Thunderbolt",
+            category=self.junior,
+            speed=80,
+            description="Kart",
+            available_quantity=1
+        )
+
+    def test_prefix_matching(self):
+        self.assertEqual(
+            list(search(Race.objects.all(), "gran")),
+            [self.grand_prix]
+        )
+        self.assertEqual(
+            list(search(Kart.objects.all(), "thun")),
+            [self.kart]
+        )
+
+    def test_matches_category_name(self):
+        self.assertEqual(
+            list(search(Race.objects.all(), "junior")),
+            [self.night_race]
+        )
+
+    def test_name_match_ranks_first(self):
+        Race.objects.create(
+            name="Senior Final",
+            category=self.junior,
+            date=self.grand_prix.date,
+            max_participants=10
+        )
+
+        names = [race.name for race in search(Race.objects.all(), "senior")]
+
+        self.assertEqual(names, ["Senior Final", "Grand Prix"])
+
+    def test_index_follows_changes(self):
+        self.grand_prix.name = "Endurance"
+        self.grand_prix.save()
+        self.senior.name = "Masters"
+        self.senior.save()
+        self.night_race.delete()
+
+        self.assertFalse(search(Race.objects.all(), "grand").exists())
+        self.assertEqual(
+            list(search(Race.objects.all(), "masters endurance")),
+            []
+        )
+        self.assertEqual(
+            list(search(Race.objects.all(), "masters")),
+            [self.grand_prix]
+        )
+        self.assertFalse(search(Race.objects.all(), "night").exists())
+
+    def test_rebuild_indexes_bulk_created_rows(self):
+        Race.objects.bulk_create([
+            Race(
+                name="Sprint",
+                category=self.senior,
+                date=self.grand_prix.date,
+                max_participants=10
+            )
+        ])
+        self.assertFalse(search(Race.objects.all(), "sprint").exists())
+
+        rebuild_index()
+
+        self.assertTrue(search(Race.objects.all(), "sprint").exists())
+
+    def test_punctuation_falls_back_to_icontains(self):
+        self.assertFalse(search(Race.objects.all(), "%").exists())
+
+    def test_list_views_use_index(self):
+        response = self.client.get(
+            reverse("karting:race-list") + "?search=grand"
+        )
+        self.assertContains(response, "Grand Prix")
+        self.assertNotContains(response, "Night Race")
+
+        response = self.client.get(
+            reverse("karting:karts-list") + "?search=junior"
+        )
+        self.assertContains(response, "Thunderbolt")
+
+    def test_benchmark_command(self):
+        out = StringIO()
+
+        call_command("benchmark_search", rows=30, repeat=1, stdout=out)
+
+        self.assertIn("index p50", out.getvalue())
+        self.assertEqual(Race.objects.count(), 2)
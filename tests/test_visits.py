@@ -0,0 +1,112 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from karting import visits
+from karting.models import VisitCounter
+
+User = get_user_model()
+
+
+class VisitCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        visits.buffer.drain()
+        self.driver = User.objects.create_user(
+            username="driver",
+            password="password",
+            date_of_birth="1990-01-01"
+        )
+        self.url = reverse("karting:index")
+
+    def tearDown(self):
+        visits.buffer.drain()
+
+    def test_home_page_does_not_write(self):
+        self.client.force_login(self.driver)
+
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(3):
+                response = self.client.get(self.url)
+
+        self.assertFalse([
+            query["sql"] for query in queries
+            if not query["sql"].startswith("SELECT")
+        ])
+        self.assertEqual(response.context["num_visits"], 3)
+        self.assertEqual(response.context["total_visits"], 3)
+
+    def test_anonymous_visitors_get_no_session(self):
+        response = self.client.get(self.url)
+
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertIsNone(response.context["num_visits"])
+        self.assertContains(response, "1 visit in total")
+
+    @override_settings(VISIT_FLUSH_SIZE=3)
+    def test_buffer_is_flushed_in_batches(self):
+        self.client.force_login(self.driver)
+
+        with mock.patch("karting.visits.apply_visits") as apply_visits:
+            for _ in range(5):
+                self.client.get(self.url)
+            visits.buffer._writer.join()
+
+        apply_visits.assert_called_once_with([(None, 3), (self.driver.pk, 3)])
+        self.assertEqual(visits.buffer.pending(), 2)
+
+    def test_failed_batches_are_put_back(self):
+        visits.buffer.add(self.driver.pk)
+
+        with mock.patch(
+            "karting.visits.apply_visits", side_effect=DatabaseError
+        ), self.assertLogs("karting.visits", "ERROR"):
+            visits.buffer.store()
+
+        self.assertEqual(visits.buffer.pending(), 1)
+        self.assertEqual(visits.buffer.pending(self.driver.pk), 1)
+
+    def test_batches_are_added_to_the_stored_counts(self):
+        other = User.objects.create_user(
+            username="other",
+            password="password",
+            date_of_birth="1990-01-01"
+        )
+        visits.apply_visits([(None, 5), (self.driver.pk, 5)])
+
+        with self.assertNumQueries(4):
+            visits.apply_visits(
+                [(None, 4), (self.driver.pk, 2), (other.pk, 2)]
+            )
+
+        self.assertEqual(
+            dict(VisitCounter.objects.values_list("user_id", "count")),
+            {None: 9, self.driver.pk: 7, other.pk: 2}
+        )
+
+    def test_visits_of_deleted_users_are_dropped(self):
+        visits.apply_visits([(None, 1), (self.driver.pk + 100, 1)])
+
+        self.assertEqual(
+            list(VisitCounter.objects.values_list("user_id", "count")),
+            [(None, 1)]
+        )
+
+    def test_counts_add_stored_and_buffered_visits(self):
+        self.client.force_login(self.driver)
+        self.client.get(self.url)
+        visits.apply_visits(visits.buffer.drain())
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.context["num_visits"], 2)
+        self.assertEqual(response.context["total_visits"], 2)
+        with self.assertNumQueries(2):
+            # session and user only, the stored counts are cached
+            self.client.get(self.url)